@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ponta a ponta do catálogo (validação -> remoção -> composição -> export)
+Uso: python benchmarks/bench_catalog.py [--products N] [--backgrounds M] [--workers W]
+                                        [--latency S] [--failure-rate F] [--modes serial parallel]
+
+Gera um catálogo sintético (fotos de produto sobre fundo claro e
+backgrounds de tamanhos variados) e troca o cliente Gradio por um
+substituto local determinístico, com latência e taxa de falha
+configuráveis: roda offline, sem o Space do Hugging Face nem modelo rembg.
+Cada modo roda em um processo novo (pico de RSS isolado).
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import resource
+import argparse
+import tempfile
+import threading
+import statistics
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+STAGES = ("validate", "removal", "compose", "export")
+
+
+def generate_catalog(root: Path, products: int, backgrounds: int, seed: int = 0) -> tuple[list[str], list[str]]:
+    """Catálogo sintético determinístico: fotos JPEG de produto e backgrounds PNG/JPEG"""
+    rng = random.Random(seed)
+    product_dir = root / "produtos"
+    background_dir = root / "backgrounds"
+    product_dir.mkdir(parents=True, exist_ok=True)
+    background_dir.mkdir(parents=True, exist_ok=True)
+
+    product_paths = []
+    for index in range(products):
+        width = rng.randint(900, 2400)
+        height = int(width * rng.uniform(0.7, 1.3))
+        # Fundo de estúdio claro com ruído de sensor
+        noise = Image.effect_noise((width, height), 6).point(lambda v: 236 + v // 16)
+        photo = Image.merge('RGB', (noise, noise, noise))
+        draw = ImageDraw.Draw(photo)
+        color = tuple(rng.randint(20, 200) for _ in range(3))
+        box = (int(width * rng.uniform(0.1, 0.25)), int(height * rng.uniform(0.1, 0.25)),
+               int(width * rng.uniform(0.75, 0.9)), int(height * rng.uniform(0.75, 0.9)))
+        if index % 3 == 0:
+            draw.ellipse(box, fill=color)
+        elif index % 3 == 1:
+            draw.rounded_rectangle(box, radius=min(width, height) // 12, fill=color)
+        else:
+            draw.polygon([(box[0], box[3]), ((box[0] + box[2]) // 2, box[1]), (box[2], box[3])], fill=color)
+        path = product_dir / f"produto_{index:04d}.jpg"
+        photo.save(path, quality=90)
+        product_paths.append(str(path))
+
+    background_paths = []
+    for index in range(backgrounds):
+        width, height = rng.choice([(1080, 1080), (1920, 1080), (2400, 1600), (3000, 2000)])
+        background = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+        tint = Image.new('RGB', (width, height), tuple(rng.randint(60, 255) for _ in range(3)))
+        background = ImageChops.multiply(background, tint).filter(ImageFilter.GaussianBlur(2))
+        extension = "png" if index % 2 == 0 else "jpg"
+        path = background_dir / f"background_{index:03d}.{extension}"
+        background.save(path)
+        background_paths.append(str(path))
+
+    return product_paths, background_paths
+
+
+class FakeBackgroundRemovalClient:
+    """Substituto local e determinístico do GradioBackgroundRemovalClient
+
+    Mesma interface usada por BackgroundRemovalUseCase. Cada imagem "falha"
+    na API de forma determinística (hash do conteúdo + seed) com
+    probabilidade failure_rate; a falha custa a latência da API mais a do
+    fallback local, como no cliente real sem fallback fixo. O recorte é
+    uma máscara por limiar sobre o fundo claro (custo real de pixels).
+    """
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.1, failure_rate: float = 0.0,
+                 fallback_latency: float = 1.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.fallback_latency = fallback_latency
+        self.seed = seed
+        self.use_fallback = False
+        self.sessions = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    @property
+    def last_source(self):
+        return getattr(self._local, 'last_source', None)
+
+    def _draw(self, image: Image.Image) -> tuple[float, bool]:
+        """Latência e falha derivadas do conteúdo (independem da ordem das threads)"""
+        digest = hashlib.blake2b(image.resize((16, 16)).tobytes() + str(self.seed).encode(),
+                                 digest_size=8).digest()
+        rng = random.Random(digest)
+        return self.latency + rng.uniform(-self.jitter, self.jitter), rng.random() < self.failure_rate
+
+    def _mask(self, image: Image.Image) -> Image.Image:
+        difference = ImageChops.difference(image.convert('RGB'), Image.new('RGB', image.size, (240, 240, 240)))
+        return difference.convert('L').point(lambda v: 255 if v > 40 else 0).filter(ImageFilter.MedianFilter(3))
+
+    def _remove(self, image: Image.Image, timeout=None, sticky_fallback: bool = True) -> Image.Image:
+        latency, failed = self._draw(image)
+        time.sleep(max(0.0, latency if timeout is None else min(latency, timeout)))
+        with self._lock:
+            self.calls += 1
+            self.failures += failed
+        if failed:
+            time.sleep(self.fallback_latency)
+        self._local.last_source = "fallback_local" if failed else "success"
+        return self._mask(image)
+
+    def remove_background(self, image: Image.Image, timeout=None, sticky_fallback: bool = True,
+                          encoded=None) -> Image.Image:
+        mask = self._remove(image, timeout, sticky_fallback)
+        cutout = image.convert('RGBA')
+        cutout.putalpha(mask)
+        return cutout
+
+    def remove_matte(self, image: Image.Image, timeout=None, sticky_fallback: bool = True,
+                     encoded=None, source=None) -> Image.Image:
+        return self._remove(image, timeout, sticky_fallback)
+
+    def is_available(self) -> bool:
+        return True
+
+
+def percentiles(values: list[float]) -> dict:
+    """p50/p95/p99 em ms"""
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    if len(values) == 1:
+        values = values * 2
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': round(cuts[49] * 1000, 1), 'p95': round(cuts[94] * 1000, 1), 'p99': round(cuts[98] * 1000, 1)}
+
+
+def peak_rss_mb() -> float:
+    """Pico de RSS do processo (ru_maxrss: KB no Linux, bytes no macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_app(work_dir: Path, client: FakeBackgroundRemovalClient):
+    """Aplicação real com o cliente de remoção substituído"""
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["LOG_FILE"] = str(work_dir / "bench.log")
+    os.environ["REMOVAL_CACHE_ENABLED"] = "false"
+    from main import ThumbnailGeneratorApp
+
+    app = ThumbnailGeneratorApp(str(work_dir))
+    app.gradio_client = client
+    app.background_remover.gradio_client = client
+    app.thumbnail_exporter.output_dir = str(work_dir / "saida")
+    return app
+
+
+def run_mode(mode: str, work_dir: str, product_paths: list[str], background_paths: list[str],
+             workers: int, client_options: dict) -> dict:
+    """Executa o catálogo em um modo (chamado no processo filho)"""
+    from domain.entities import Transform
+
+    client = FakeBackgroundRemovalClient(**client_options)
+    app = make_app(Path(work_dir) / mode, client)
+    transform = Transform(x=0, y=20, scale=0.85, rotation=0)
+    latencies = {stage: [] for stage in STAGES}
+    errors = 0
+
+    def timed(stage, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        latencies[stage].append(time.perf_counter() - start)
+        return result
+
+    def compose_and_export(index, removed):
+        background = background_paths[index % len(background_paths)]
+        composition = timed("compose", app.compose_preview, removed, background, transform)
+        if composition is None:
+            return False
+        return timed("export", app.export_thumbnail, composition, f"thumb_{index:04d}") is not None
+
+    start = time.perf_counter()
+    if mode == "serial":
+        # Um item por vez, estágio a estágio (como process_complete_workflow)
+        for index, product in enumerate(product_paths):
+            if not timed("validate", app.validate_image, product):
+                errors += 1
+                continue
+            removed = timed("removal", app.remove_background, product)
+            if removed is None or not compose_and_export(index, removed):
+                errors += 1
+    else:
+        # Remoção com até `workers` requisições simultâneas; composição e
+        # export em paralelo conforme cada remoção termina
+        valid = {}
+        for index, product in enumerate(product_paths):
+            if timed("validate", app.validate_image, product):
+                valid[index] = product
+            else:
+                errors += 1
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for index, result in app.background_remover.execute_many(valid, max_in_flight=workers):
+                latencies["removal"].append(result.processing_time)
+                if not result.success:
+                    errors += 1
+                    continue
+                futures.append(executor.submit(compose_and_export, index, result.cutout()))
+            errors += sum(1 for future in as_completed(futures) if not future.result())
+
+    elapsed = time.perf_counter() - start
+    return {
+        'images': len(product_paths),
+        'errors': errors,
+        'fallbacks': client.failures,
+        'seconds': round(elapsed, 2),
+        'images_per_sec': round(len(product_paths) / elapsed, 2),
+        'stages': {stage: percentiles(values) for stage, values in latencies.items()},
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta do catálogo")
+    parser.add_argument("--products", type=int, default=40)
+    parser.add_argument("--backgrounds", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=4, help="Paralelismo do modo parallel")
+    parser.add_argument("--latency", type=float, default=0.3, help="Latência média da API falsa (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Variação da latência (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Fração de chamadas que caem no fallback")
+    parser.add_argument("--fallback-latency", type=float, default=1.0, help="Custo extra de cada fallback (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", nargs="+", choices=["serial", "parallel"], default=["serial", "parallel"])
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    client_options = {
+        'latency': args.latency, 'jitter': args.jitter, 'failure_rate': args.failure_rate,
+        'fallback_latency': args.fallback_latency, 'seed': args.seed
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.perf_counter()
+        product_paths, background_paths = generate_catalog(Path(work_dir) / "catalogo", args.products,
+                                                           args.backgrounds, args.seed)
+        print(f"🧪 Catálogo sintético: {len(product_paths)} produtos x {len(background_paths)} backgrounds "
+              f"(gerado em {time.perf_counter() - start:.1f}s)")
+        print(f"🌐 API falsa: {args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms, "
+              f"{args.failure_rate:.0%} de falhas (+{args.fallback_latency * 1000:.0f} ms no fallback)")
+        print("=" * 72)
+
+        context = multiprocessing.get_context("spawn")
+        results = {}
+        for mode in args.modes:
+            # Processo novo por modo: pico de RSS isolado
+            with context.Pool(1) as pool:
+                results[mode] = pool.apply(run_mode, (mode, work_dir, product_paths, background_paths,
+                                                      args.workers, client_options))
+            stats = results[mode]
+            label = mode if mode == "serial" else f"{mode} ({args.workers})"
+            print(f"\n📦 {label}: {stats['images_per_sec']:.2f} imagens/s em {stats['seconds']:.1f}s | "
+                  f"{stats['errors']} erros | {stats['fallbacks']} fallbacks | pico {stats['peak_rss_mb']:.0f} MB")
+            for stage, cuts in stats['stages'].items():
+                print(f"   {stage:>9}: p50 {cuts['p50']:8.1f} ms | p95 {cuts['p95']:8.1f} ms | "
+                      f"p99 {cuts['p99']:8.1f} ms")
+
+    if len(results) == 2:
+        speedup = results['parallel']['images_per_sec'] / results['serial']['images_per_sec']
+        print(f"\n📊 parallel x serial: {speedup:.2f}x imagens/s")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({'options': vars(args), 'results': results}, indent=2) + "\n",
+                                   encoding='utf-8')
+        print(f"💾 Resultados gravados em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark da composição em matriz: compose_preview por par x compose_matrix
+Uso: python benchmarks/bench_compose_matrix.py [--products N] [--backgrounds N] [--transforms N]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domain.entities import Transform
+from infrastructure.image_service import ImageCompositionService
+
+ROOT = Path(__file__).parent.parent
+
+TRANSFORMS = [
+    Transform(x=0, y=0, scale=0.8, rotation=0),
+    Transform(x=0, y=-50, scale=0.9, rotation=8),
+    Transform(x=0, y=0, scale=1.0, rotation=0),
+    Transform(x=0, y=30, scale=0.85, rotation=-12),
+]
+
+
+def load_inputs(products: int, backgrounds: int) -> tuple[list[Image.Image], list[Image.Image]]:
+    """Produtos e backgrounds do repositório, repetidos (backgrounds variam por espelhamento)"""
+    product_sources = []
+    for path in sorted((ROOT / "produtos-sem-fundo").glob("*.png")):
+        with Image.open(path) as product:
+            product_sources.append(product.convert('RGBA'))
+    background_sources = []
+    for path in sorted((ROOT / "backgrounds").glob("*.png")):
+        with Image.open(path) as background:
+            background_sources.append(background.convert('RGB'))
+
+    product_list = [product_sources[i % len(product_sources)] for i in range(products)]
+    background_list = []
+    for j in range(backgrounds):
+        background = background_sources[j % len(background_sources)]
+        background_list.append(ImageOps.mirror(background) if (j // len(background_sources)) % 2 else background)
+    return product_list, background_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da composição em matriz")
+    parser.add_argument("--products", type=int, default=4)
+    parser.add_argument("--backgrounds", type=int, default=8)
+    parser.add_argument("--transforms", type=int, default=2, choices=range(1, len(TRANSFORMS) + 1),
+                        help="Transforms distintos por produto")
+    parser.add_argument("--engine", choices=["affine", "two_pass"], default="affine")
+    args = parser.parse_args()
+
+    products, backgrounds = load_inputs(args.products, args.backgrounds)
+    transform_for = lambda i, j: TRANSFORMS[j % args.transforms]
+    pairs = len(products) * len(backgrounds)
+
+    print(f"🧪 Matriz {len(products)} produtos x {len(backgrounds)} backgrounds "
+          f"({args.transforms} transforms, motor {args.engine})")
+    print("=" * 60)
+
+    # Backgrounds em memória não entram no cache: preparar uma vez para os dois lados
+    service = ImageCompositionService(transform_engine=args.engine)
+    prepared = [service._prepare_background(background) for background in backgrounds]
+
+    start = time.perf_counter()
+    for i, product in enumerate(products):
+        for j, background in enumerate(prepared):
+            service.compose_preview(product, background, transform_for(i, j))
+    pairwise = time.perf_counter() - start
+    print(f"{'por par':>10}: {pairwise:6.2f}s | {pairs / pairwise:6.1f} composições/s")
+
+    service = ImageCompositionService(transform_engine=args.engine)
+    start = time.perf_counter()
+    for _ in service.compose_matrix(products, prepared, transform_for):
+        pass
+    matrix = time.perf_counter() - start
+    print(f"{'matriz':>10}: {matrix:6.2f}s | {pairs / matrix:6.1f} composições/s | {pairwise / matrix:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos perfis de export (bytes x ms de codificação)
+Uso: python benchmarks/bench_export_profiles.py [--repeat N] [--quality Q] [--quantize]
+"""
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+from PIL import Image
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domain.entities import Transform
+from domain.export_profiles import EXPORT_PROFILE_NAMES, get_export_profile, encode_image
+from infrastructure.image_service import ImageCompositionService
+
+ROOT = Path(__file__).parent.parent
+
+
+def make_composition() -> Image.Image:
+    """Composição real do repositório (primeiro produto sobre o primeiro background)"""
+    background_path = sorted((ROOT / "backgrounds").glob("*.png"))[0]
+    product_path = sorted((ROOT / "produtos-sem-fundo").glob("*.png"))[0]
+
+    service = ImageCompositionService()
+    with Image.open(background_path) as background, Image.open(product_path) as product:
+        return service.compose_preview(product.convert('RGBA'), background.convert('RGB'),
+                                       Transform(x=0, y=0, scale=1.0, rotation=0))
+
+
+def benchmark_profile(name: str, image: Image.Image, quality: int, quantize: bool, repeat: int) -> dict:
+    """Mede o tempo de encode_image e o tamanho gerado por um perfil"""
+    profile = get_export_profile(name, quality, quantize)
+    data = encode_image(image, profile)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode_image(image, profile)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'bytes': len(data),
+        'median': statistics.median(times),
+        'min': min(times)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos perfis de export")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições por perfil")
+    parser.add_argument("--quality", type=int, default=95, help="Qualidade de webp/jpeg")
+    parser.add_argument("--quantize", action="store_true", help="Paleta de 256 cores no perfil smallest")
+    args = parser.parse_args()
+
+    image = make_composition()
+
+    print(f"🧪 Benchmark de export (composição {image.width}x{image.height}, qualidade {args.quality})")
+    print("=" * 60)
+    results = {}
+    for name in EXPORT_PROFILE_NAMES:
+        results[name] = benchmark_profile(name, image, args.quality, args.quantize, args.repeat)
+        stats = results[name]
+        print(f"{name:>9}: {stats['bytes'] / 1024:8.1f} KB | "
+              f"mediana {stats['median']:7.1f} ms | min {stats['min']:7.1f} ms")
+
+    baseline = results['balanced']
+    print("\n📊 Relativo ao perfil balanced:")
+    for name, stats in results.items():
+        print(f"{name:>9}: {stats['bytes'] / baseline['bytes']:.2f}x bytes | "
+              f"{stats['median'] / baseline['median']:.2f}x tempo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark da remoção de fundo local: rembg.remove por imagem x inferência em lotes
+Uso: python benchmarks/bench_local_removal.py [--model u2net] [--images N] [--batch-sizes 1 2 4 8]
+Requer rembg e onnxruntime instalados.
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from PIL import Image
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from infrastructure.rembg_sessions import RembgSessionRegistry, REMBG_MODELS, MODEL_ALIASES
+from infrastructure.batch_segmentation import BatchSegmenter
+
+ROOT = Path(__file__).parent.parent
+
+
+def load_images(count: int) -> list[Image.Image]:
+    """Produtos do repositório (sobre branco), repetidos até completar count"""
+    sources = []
+    for path in sorted((ROOT / "produtos-sem-fundo").glob("*.png")):
+        with Image.open(path) as product:
+            product = product.convert('RGBA')
+            flat = Image.new('RGB', product.size, (255, 255, 255))
+            flat.paste(product, mask=product.getchannel('A'))
+            sources.append(flat)
+    return [sources[i % len(sources)] for i in range(count)]
+
+
+def benchmark_per_image(registry: RembgSessionRegistry, model: str, images: list[Image.Image]) -> float:
+    """Caminho atual do fallback: rembg.remove uma imagem por vez"""
+    from rembg import remove
+
+    with registry.session(model) as session:
+        remove(images[0], session=session)  # Aquecimento
+        start = time.perf_counter()
+        for image in images:
+            remove(image, session=session)
+        return time.perf_counter() - start
+
+
+def benchmark_batched(registry: RembgSessionRegistry, model: str, images: list[Image.Image],
+                      batch_size: int) -> float:
+    """Inferência em lotes de batch_size imagens"""
+    segmenter = BatchSegmenter(model, batch_size, registry)
+    segmenter.remove(images[:batch_size])  # Aquecimento
+    start = time.perf_counter()
+    segmenter.remove(images)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da remoção de fundo local")
+    parser.add_argument("--model", default="u2net", choices=list(REMBG_MODELS) + list(MODEL_ALIASES))
+    parser.add_argument("--images", type=int, default=16, help="Imagens por medição")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    try:
+        import rembg  # noqa: F401
+    except ImportError:
+        print("❌ rembg não instalado (pip install rembg onnxruntime)")
+        sys.exit(1)
+
+    images = load_images(args.images)
+    registry = RembgSessionRegistry(idle_timeout=0)
+
+    print(f"🧪 Remoção local ({args.model}, {len(images)} imagens)")
+    print("=" * 60)
+    baseline = benchmark_per_image(registry, args.model, images)
+    print(f"{'por imagem':>12}: {baseline:6.2f}s | {len(images) / baseline:5.2f} img/s")
+
+    for batch_size in args.batch_sizes:
+        elapsed = benchmark_batched(registry, args.model, images, batch_size)
+        print(f"{f'lote {batch_size}':>12}: {elapsed:6.2f}s | {len(images) / elapsed:5.2f} img/s | "
+              f"{baseline / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
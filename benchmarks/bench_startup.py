@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo de inicialização (imports) da aplicação e dos workers do lote
+Uso: python benchmarks/bench_startup.py [--runs 5] [--budget-ms 350]
+
+Cada import roda em um processo novo com -X importtime; vale o melhor de
+--runs (descarta disco frio e ruído da máquina). Sai com código 1 se algum
+módulo passar de --budget-ms.
+"""
+import os
+import sys
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+MODULES = ["main", "batch_engine"]
+
+# Dependências pesadas que só podem ser importadas no primeiro uso
+HEAVY_MODULES = ("gradio_client", "httpx", "huggingface_hub", "rembg", "onnxruntime", "numpy")
+
+
+def import_time_ms(module: str, cwd: str) -> tuple[float, list[str]]:
+    """Tempo acumulado do import (ms) e dependências pesadas carregadas, em um processo novo"""
+    code = f"import sys, {module}; print(','.join(sys.modules))"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": str(SRC_DIR)}
+    )
+
+    cumulative_us = 0
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    loaded = set(completed.stdout.strip().split(","))
+    return cumulative_us / 1000, [name for name in HEAVY_MODULES if name in loaded]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de import")
+    parser.add_argument("--runs", type=int, default=5, help="Processos por módulo (vale o melhor)")
+    parser.add_argument("--budget-ms", type=float, default=350, help="Orçamento do import por módulo")
+    args = parser.parse_args()
+
+    print(f"🧪 Tempo de import (melhor de {args.runs}, orçamento {args.budget_ms:.0f} ms)")
+    print("=" * 60)
+    over_budget = []
+    # Diretório vazio: o import não encontra nem cria arquivos do projeto
+    with tempfile.TemporaryDirectory() as cwd:
+        for module in MODULES:
+            runs = [import_time_ms(module, cwd) for _ in range(args.runs)]
+            best = min(elapsed for elapsed, _ in runs)
+            heavy = runs[0][1]
+            status = "✅" if best < args.budget_ms else "❌"
+            print(f"{status} {module:<14} {best:8.1f} ms"
+                  + (f" | pesadas: {', '.join(heavy)}" if heavy else ""))
+            if best >= args.budget_ms:
+                over_budget.append(module)
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Suíte de micro-benchmarks dos caminhos quentes (composição, transformação e export)
+Uso:
+  python benchmarks/bench_suite.py run [--output resultados.json] [--filter texto]
+  python benchmarks/bench_suite.py run --save-baseline
+  python benchmarks/bench_suite.py compare benchmarks/baseline.json resultados.json [--threshold 0.10]
+
+Sem --output, os resultados vão para um arquivo no diretório temporário;
+o baseline versionado só é sobrescrito com --save-baseline.
+
+Cada caso roda em um processo novo, para que o pico de RSS seja do próprio
+caso. ops/s é o melhor de --repeat rodadas de pelo menos --min-time segundos.
+"""
+import sys
+import json
+import time
+import resource
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+import PIL
+from PIL import Image, ImageDraw
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domain.entities import Transform
+from domain.export_profiles import get_export_profile, encode_image
+from application.use_cases import ThumbnailExportUseCase
+from infrastructure.image_service import ImageCompositionService
+
+# Tamanhos sintéticos: (produto, background)
+SIZES = {
+    'small': ((400, 300), (800, 600)),
+    'medium': ((1000, 800), (1920, 1080)),
+    'large': ((2000, 1600), (4000, 3000)),
+}
+
+TRANSFORMS = {
+    'scale': Transform(x=0, y=0, scale=1.3, rotation=0),
+    'rotation': Transform(x=0, y=0, scale=1.0, rotation=15),
+    'scale_rotation': Transform(x=40, y=-60, scale=0.7, rotation=-30),
+}
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_RESULTS = Path(tempfile.gettempdir()) / "bench_suite_results.json"
+
+
+def make_product(size: tuple[int, int]) -> Image.Image:
+    """Produto RGBA com elipse opaca e margem transparente"""
+    product = Image.new('RGBA', size, (0, 0, 0, 0))
+    width, height = size
+    ImageDraw.Draw(product).ellipse((width // 10, height // 10, width * 9 // 10, height * 9 // 10),
+                                    fill=(220, 40, 40, 255))
+    return product
+
+
+def make_background(size: tuple[int, int]) -> Image.Image:
+    """Background RGB com gradiente (comprime como uma foto simples)"""
+    return Image.linear_gradient('L').convert('RGB').resize(size)
+
+
+def build_case(name: str):
+    """Função sem argumentos que executa uma operação do caso 'operação/tamanho'"""
+    operation, size_name = name.rsplit('/', 1)
+    product_size, background_size = SIZES[size_name]
+    product = make_product(product_size)
+    background = make_background(background_size)
+    service = ImageCompositionService(background_cache_size=0, transform_engine="two_pass")
+
+    if operation == 'prepare_background':
+        return lambda: service._prepare_background(background)
+
+    if operation.startswith('apply_transform:'):
+        transform = TRANSFORMS[operation.split(':', 1)[1]]
+        return lambda: service._apply_transform(product, transform)
+
+    if operation.startswith('render_sprite:'):
+        affine = ImageCompositionService(background_cache_size=0)
+        transform = TRANSFORMS[operation.split(':', 1)[1]]
+        return lambda: affine.render_sprite(product, transform)
+
+    if operation == 'compose_images':
+        transform = TRANSFORMS['scale_rotation']
+        prepared = service._prepare_background(background)
+        sprite = service._apply_transform(product, transform)
+        return lambda: service._compose_images(prepared, sprite, transform)
+
+    if operation == 'resize_to_target':
+        exporter = ThumbnailExportUseCase()
+        return lambda: exporter._resize_to_target(background)
+
+    if operation == 'png_encode':
+        profile = get_export_profile('balanced')
+        canvas = service.compose_preview(product, background, TRANSFORMS['scale_rotation'])
+        return lambda: encode_image(canvas, profile)
+
+    raise ValueError(f"Caso desconhecido: {name}")
+
+
+def case_names() -> list[str]:
+    operations = ['prepare_background']
+    operations += [f'apply_transform:{name}' for name in TRANSFORMS]
+    operations += [f'render_sprite:{name}' for name in TRANSFORMS]
+    operations += ['compose_images', 'resize_to_target', 'png_encode']
+    return [f'{operation}/{size}' for operation in operations for size in SIZES]
+
+
+def peak_rss_mb() -> float:
+    """Pico de RSS do processo (ru_maxrss: KB no Linux, bytes no macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(name: str, min_time: float, repeat: int) -> dict:
+    """Executa o caso no processo atual (chamado no processo filho)"""
+    operation = build_case(name)
+    operation()  # Aquecimento
+    setup_rss = peak_rss_mb()
+
+    best = 0.0
+    for _ in range(repeat):
+        iterations = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            operation()
+            iterations += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, iterations / elapsed)
+
+    peak = peak_rss_mb()
+    return {
+        'ops_per_sec': round(best, 3),
+        'ms_per_op': round(1000 / best, 3),
+        'peak_rss_mb': round(peak, 1),
+        'rss_growth_mb': round(peak - setup_rss, 1)
+    }
+
+
+def command_run(args) -> int:
+    names = [name for name in case_names() if not args.filter or args.filter in name]
+    if not names:
+        print(f"❌ Nenhum caso corresponde a '{args.filter}'")
+        return 1
+
+    print(f"🧪 Micro-benchmarks ({len(names)} casos, min {args.min_time}s x {args.repeat})")
+    print("=" * 72)
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for name in names:
+        # Processo novo por caso: pico de RSS isolado
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(run_case, (name, args.min_time, args.repeat))
+        stats = results[name]
+        print(f"{name:<36} {stats['ops_per_sec']:10.1f} ops/s {stats['ms_per_op']:9.2f} ms "
+              f"{stats['peak_rss_mb']:8.1f} MB pico")
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'min_time': args.min_time,
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+    content = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    outputs = [Path(args.output)]
+    if args.save_baseline:
+        outputs.append(DEFAULT_BASELINE)
+    print()
+    for output in outputs:
+        output.write_text(content, encoding='utf-8')
+        print(f"💾 Resultados gravados em {output}")
+    return 0
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Casos com queda de ops/s ou aumento de pico de RSS acima do limite"""
+    regressions = []
+    for name, stats in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        speed = stats['ops_per_sec'] / reference['ops_per_sec']
+        if speed < 1 - threshold:
+            regressions.append(f"{name}: {speed:.2f}x ops/s "
+                               f"({reference['ops_per_sec']:.1f} -> {stats['ops_per_sec']:.1f})")
+        memory = stats['peak_rss_mb'] / reference['peak_rss_mb']
+        if memory > 1 + threshold:
+            regressions.append(f"{name}: {memory:.2f}x pico de RSS "
+                               f"({reference['peak_rss_mb']:.1f} -> {stats['peak_rss_mb']:.1f} MB)")
+    return regressions
+
+
+def command_compare(args) -> int:
+    baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+    current = json.loads(Path(args.current).read_text(encoding='utf-8'))
+
+    print(f"📊 {args.current} x {args.baseline} (limite {args.threshold:.0%})")
+    print("=" * 72)
+    for name, stats in sorted(current['results'].items()):
+        reference = baseline['results'].get(name)
+        if reference is None:
+            print(f"{name:<36} (novo)")
+            continue
+        print(f"{name:<36} {stats['ops_per_sec'] / reference['ops_per_sec']:6.2f}x ops/s "
+              f"{stats['peak_rss_mb'] / reference['peak_rss_mb']:6.2f}x RSS")
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressão(ões):")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+    print("\n✅ Sem regressões")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks dos caminhos quentes")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Executa a suíte e grava o JSON")
+    run_parser.add_argument("--output", default=str(DEFAULT_RESULTS), help="Arquivo JSON de saída")
+    run_parser.add_argument("--save-baseline", action="store_true",
+                            help=f"Grava também o baseline versionado ({DEFAULT_BASELINE.name})")
+    run_parser.add_argument("--filter", help="Só casos cujo nome contém o texto")
+    run_parser.add_argument("--min-time", type=float, default=0.3, help="Segundos mínimos por rodada")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Rodadas por caso (vale a melhor)")
+
+    compare_parser = subparsers.add_parser("compare", help="Compara dois JSONs e sinaliza regressões")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Queda de ops/s (ou aumento de RSS) tolerada, ex.: 0.10 = 10%%")
+
+    args = parser.parse_args()
+    handler = command_run if args.command == "run" else command_compare
+    sys.exit(handler(args))
+
+
+if __name__ == "__main__":
+    main()
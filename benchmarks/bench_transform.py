@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos motores de transformação (affine x two_pass)
+Uso: python benchmarks/bench_transform.py [--repeat N]
+"""
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from domain.entities import Transform
+from infrastructure.image_service import ImageCompositionService, TRANSFORM_ENGINES
+
+
+CASES = {
+    'escala': Transform(x=0, y=0, scale=1.4, rotation=0),
+    'rotação': Transform(x=0, y=0, scale=1.0, rotation=15),
+    'escala+rotação': Transform(x=30, y=-50, scale=0.8, rotation=30),
+    'redução+rotação': Transform(x=0, y=0, scale=0.4, rotation=-45),
+}
+
+
+def make_inputs():
+    """Cria background e produto com borda transparente"""
+    background = Image.new('RGB', (1080, 1080), color=(0, 200, 0))
+    product = Image.new('RGBA', (1000, 800), color=(0, 0, 0, 0))
+    ImageDraw.Draw(product).ellipse((50, 50, 950, 750), fill=(255, 0, 0, 255))
+    return background, product
+
+
+def benchmark_compose(engine: str, background: Image.Image, product: Image.Image,
+                      transform: Transform, repeat: int) -> float:
+    """Mediana (ms) de compose_preview com o background já em cache"""
+    service = ImageCompositionService(transform_engine=engine)
+    service.compose_preview(product, background, transform)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        service.compose_preview(product, background, transform)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos motores de transformação")
+    parser.add_argument("--repeat", type=int, default=10, help="Repetições por caso")
+    args = parser.parse_args()
+
+    background, product = make_inputs()
+
+    print("🧪 Benchmark de transformação (produto 1000x800 RGBA, mediana em ms)")
+    print("=" * 60)
+    for name, transform in CASES.items():
+        medians = {
+            engine: benchmark_compose(engine, background, product, transform, args.repeat)
+            for engine in TRANSFORM_ENGINES
+        }
+        columns = " | ".join(f"{engine} {median:.1f}" for engine, median in medians.items())
+        print(f"{name:>16}: {columns}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,23 +2,27 @@
 """Script para gerar thumbnails de todos os produtos disponíveis"""
 
 import sys
+import time
+import argparse
 from pathlib import Path
-from PIL import Image
 
 # Adicionar src ao path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from src.main import ThumbnailGeneratorApp
-from src.domain.entities import Transform
+from src.batch_engine import BatchThumbnailEngine
+from src.domain.entities import Transform, BatchWorkItem
+from src.domain.export_profiles import EXPORT_PROFILE_NAMES, get_export_profile
+from src.config import AppConfig, ImageConfig
+from src.infrastructure.async_logging import configure_logging
 
-def generate_all_thumbnails():
+def generate_all_thumbnails(workers: int = 1, compositor: str = "pil", profile: str = "balanced",
+                            quality: int = 95, quantize: bool = False, full: bool = False,
+                            prune: bool = False, trim: bool = ImageConfig.trim_products,
+                            transform_engine: str = ImageConfig.transform_engine):
     """Gera thumbnails para todos os produtos disponíveis"""
     print("🎨 Gerador de Thumbnails - Processamento Completo")
     print("=" * 60)
     
-    app = ThumbnailGeneratorApp()
-    app.initialize()
-    
     # Verificar diretórios
     produtos_dir = Path("produtos-sem-fundo")
     backgrounds_dir = Path("backgrounds")
@@ -52,64 +56,85 @@ def generate_all_thumbnails():
         Transform(x=0, y=30, scale=0.85, rotation=0),    # Ligeiramente abaixo
     ]
     
-    thumbnails_geradas = 0
-    erros = 0
-    
-    # Processar cada produto com cada background
+    # Montar itens de trabalho (produto x background)
+    work_items = []
     for i, produto in enumerate(produtos):
-        print(f"\n📦 Processando produto {i+1}/{len(produtos)}: {produto.name}")
-        
         for j, background in enumerate(backgrounds):
-            print(f"  🖼️ Background {j+1}/{len(backgrounds)}: {background.name}")
-            
             # Usar diferentes configurações de transformação
             transform_idx = (i + j) % len(transforms_configs)
-            transform = transforms_configs[transform_idx]
             
-            try:
-                # Compor preview
-                composition = app.compose_preview(
-                    str(produto), 
-                    str(background), 
-                    transform
-                )
-                
-                if composition:
-                    # Gerar nome único e descritivo
-                    produto_clean = produto.stem.replace(" ", "_")
-                    background_clean = background.stem.replace(" ", "_")
-                    filename = f"{produto_clean}_com_{background_clean}"
-                    
-                    # Exportar thumbnail
-                    output_path = app.export_thumbnail(composition, filename)
-                    
-                    if output_path and Path(output_path).exists():
-                        file_size = Path(output_path).stat().st_size / 1024
-                        print(f"    ✅ Salva: {Path(output_path).name} ({file_size:.1f} KB)")
-                        thumbnails_geradas += 1
-                    else:
-                        print(f"    ❌ Erro ao salvar")
-                        erros += 1
-                else:
-                    print(f"    ❌ Erro na composição")
-                    erros += 1
-                    
-            except Exception as e:
-                print(f"    ❌ Erro: {str(e)[:50]}...")
-                erros += 1
+            # Gerar nome único e descritivo
+            produto_clean = produto.stem.replace(" ", "_")
+            background_clean = background.stem.replace(" ", "_")
+            
+            work_items.append(BatchWorkItem(
+                product_path=str(produto),
+                background_path=str(background),
+                transform=transforms_configs[transform_idx],
+                output_name=f"{produto_clean}_com_{background_clean}"
+            ))
+    
+    export_profile = get_export_profile(profile, quality, quantize)
+    engine = BatchThumbnailEngine(workers=workers, compositor=compositor, export_profile=export_profile,
+                                  trim_products=trim, transform_engine=transform_engine)
+    print(f"⚙️ Workers: {engine.workers} | Compositor: {compositor} | Perfil: {profile}")
+    
+    erros = 0
+    total_bytes = 0
+    total_encode_ms = 0.0
+    start_time = time.perf_counter()
+    
+    # Resultados chegam na ordem de conclusão
+    # Incremental por padrão: só recompõe saídas com entradas alteradas
+    for done, result in enumerate(engine.run(work_items, incremental=not full, prune=prune), start=1):
+        produto_nome = Path(result.item.product_path).name
+        background_nome = Path(result.item.background_path).name
+        if result.skipped:
+            print(f"\n⏭️ [{done}/{len(work_items)}] {produto_nome} + 🖼️ {background_nome}: inalterado")
+            continue
+        
+        print(f"\n📦 [{done}/{len(work_items)}] {produto_nome} + 🖼️ {background_nome}")
+        
+        if result.success and result.file_path and Path(result.file_path).exists():
+            file_size = Path(result.file_path).stat().st_size / 1024
+            print(f"    ✅ Salva: {Path(result.file_path).name} ({file_size:.1f} KB, "
+                  f"codificação {result.encode_ms:.0f} ms)")
+            total_bytes += Path(result.file_path).stat().st_size
+            total_encode_ms += result.encode_ms
+        else:
+            print(f"    ❌ Erro: {str(result.error)[:50]}...")
+            erros += 1
+    
+    elapsed = time.perf_counter() - start_time
+    build_stats = engine.get_build_stats()
+    thumbnails_geradas = build_stats['built']
+    thumbnails_inalteradas = build_stats['skipped']
     
     # Relatório final
     print("\n" + "=" * 60)
     print("📊 RELATÓRIO FINAL")
     print("=" * 60)
     print(f"✅ Thumbnails geradas com sucesso: {thumbnails_geradas}")
+    print(f"⏭️ Thumbnails inalteradas (puladas): {thumbnails_inalteradas}")
     print(f"❌ Erros encontrados: {erros}")
-    print(f"📈 Taxa de sucesso: {(thumbnails_geradas/(thumbnails_geradas+erros)*100):.1f}%")
+    if thumbnails_geradas + erros:
+        print(f"📈 Taxa de sucesso: {(thumbnails_geradas/(thumbnails_geradas+erros)*100):.1f}%")
+    if prune:
+        print(f"🧹 Saídas órfãs removidas: {build_stats['pruned']}")
+    
+    print(f"⏱️ Tempo total: {elapsed:.1f}s ({len(work_items) / elapsed:.2f} thumbnails/s)")
+    
+    if thumbnails_geradas:
+        print(f"🗜️ Perfil {profile}: {total_bytes / thumbnails_geradas / 1024:.1f} KB e "
+              f"{total_encode_ms / thumbnails_geradas:.0f} ms de codificação por thumbnail")
+    
+    cache_stats = engine.get_cache_stats()
+    print(f"🗃️ Cache de backgrounds: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
     
     # Listar todos os arquivos gerados
     thumbnails_dir = Path("thumbnails-prontas")
     if thumbnails_dir.exists():
-        arquivos = list(thumbnails_dir.glob("*.png"))
+        arquivos = list(thumbnails_dir.glob(f"*{export_profile.extension}"))
         total_size = sum(arquivo.stat().st_size for arquivo in arquivos) / (1024 * 1024)
         
         print(f"\n📁 Pasta thumbnails-prontas:")
@@ -126,4 +151,47 @@ def generate_all_thumbnails():
     print(f"💡 As thumbnails estão prontas para uso em e-commerce")
 
 if __name__ == "__main__":
-    generate_all_thumbnails()
\ No newline at end of file
+    app_config = AppConfig()
+    parser = argparse.ArgumentParser(description="Gera thumbnails de todos os produtos x backgrounds")
+    parser.add_argument(
+        "--workers", type=int, default=app_config.image.batch_workers,
+        help="Número de processos paralelos (0 = todos os núcleos; padrão: BATCH_WORKERS)"
+    )
+    parser.add_argument(
+        "--compositor", choices=["pil", "numpy"], default="pil",
+        help="Motor de composição das imagens"
+    )
+    parser.add_argument(
+        "--transform-engine", choices=["affine", "two_pass"], default=ImageConfig.transform_engine,
+        help="Motor de transformação (reamostragem) dos produtos"
+    )
+    parser.add_argument(
+        "--profile", choices=list(EXPORT_PROFILE_NAMES), default="balanced",
+        help="Perfil de export (velocidade x tamanho do arquivo)"
+    )
+    parser.add_argument(
+        "--quality", type=int, default=ImageConfig.default_quality,
+        help="Qualidade dos perfis webp e jpeg"
+    )
+    parser.add_argument(
+        "--quantize", action="store_true",
+        help="Paleta de 256 cores no perfil smallest"
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Regenera todas as combinações, ignorando o manifesto de build"
+    )
+    parser.add_argument(
+        "--prune", action="store_true",
+        help="Remove thumbnails de combinações que não existem mais"
+    )
+    parser.add_argument(
+        "--trim", action="store_true",
+        help="Recortar as margens transparentes dos produtos (muda o posicionamento)"
+    )
+    args = parser.parse_args()
+    
+    # Logging em fila + arquivo rotativo, como na aplicação
+    configure_logging(app_config.logging)
+    generate_all_thumbnails(args.workers, args.compositor, args.profile, args.quality, args.quantize,
+                            args.full, args.prune, args.trim, args.transform_engine)
\ No newline at end of file
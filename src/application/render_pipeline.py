@@ -0,0 +1,94 @@
+"""Render Pipeline - Application Layer"""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# Render: (*args) -> (bytes codificados, segundos de composição, ms de codificação)
+RenderFunction = Callable[..., Tuple[bytes, float, float]]
+# Gravação: (bytes, chave) -> caminho do arquivo gravado
+WriteFunction = Callable[[bytes, Any], str]
+
+
+class ThumbnailRenderPipeline:
+    """Composição/codificação em um pool de threads e gravação na thread que chama
+
+    submit() enfileira uma thumbnail no pool (PIL libera o GIL), collect()
+    grava as que já ficaram prontas sem bloquear e finish() espera as
+    restantes. Uma falha no render ou na gravação vira o resultado de erro
+    daquela thumbnail, sem interromper as demais; results() devolve os
+    resultados na ordem de submit()/fail(), não na ordem de conclusão.
+    """
+
+    def __init__(self, render: RenderFunction, write: WriteFunction, workers: int = 1,
+                 on_result: Optional[Callable[[Any, Dict[str, Any]], None]] = None):
+        self.render = render
+        self.write = write
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.on_result = on_result
+        self.compose_seconds = 0.0
+        self.encode_ms = 0.0
+        self.encoded_bytes = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[Future, Any] = {}
+        self._results: Dict[Any, Dict[str, Any]] = {}
+        self._order: List[Any] = []
+
+    def __enter__(self) -> "ThumbnailRenderPipeline":
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+
+    def submit(self, key: Any, *args: Any) -> None:
+        """Enfileira o render de uma thumbnail com os argumentos dados"""
+        self._order.append(key)
+        self._futures[self._pool.submit(self.render, *args)] = key
+
+    def fail(self, key: Any, message: str) -> None:
+        """Registra uma thumbnail que falhou antes do render (ex.: remoção de fundo)"""
+        self._order.append(key)
+        self._record(key, {'filename': key, 'status': 'error', 'message': message})
+
+    def collect(self) -> None:
+        """Grava as thumbnails já renderizadas, sem esperar as demais"""
+        self._write([future for future in list(self._futures) if future.done()])
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Espera e grava todas as thumbnails pendentes; retorna results()"""
+        self._write(as_completed(list(self._futures)))
+        return self.results()
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Resultados concluídos na ordem de submissão"""
+        return [self._results[key] for key in self._order if key in self._results]
+
+    @property
+    def completed(self) -> int:
+        """Número de thumbnails com resultado (sucesso ou erro)"""
+        return len(self._results)
+
+    def _write(self, done_futures: Iterable[Future]) -> None:
+        for future in done_futures:
+            key = self._futures.pop(future)
+            try:
+                image_data, elapsed, item_encode_ms = future.result()
+                output_path = self.write(image_data, key)
+                self.compose_seconds += elapsed
+                self.encode_ms += item_encode_ms
+                self.encoded_bytes += len(image_data)
+                self._record(key, {
+                    'filename': key,
+                    'status': 'success',
+                    'size': len(image_data),
+                    'path': output_path
+                })
+            except Exception as e:
+                self._record(key, {'filename': key, 'status': 'error', 'message': str(e)})
+
+    def _record(self, key: Any, result: Dict[str, Any]) -> None:
+        self._results[key] = result
+        if self.on_result:
+            self.on_result(key, result)
@@ -1,8 +1,12 @@
 """Use Cases - Application Layer"""
 import os
+import io
+import time
 import logging
 from datetime import datetime
-from typing import Optional, List
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, List, Iterable, Iterator, Mapping, Union, Any
 from PIL import Image
 
 try:
@@ -11,16 +15,22 @@ try:
         BackgroundRemovalResult,
         BackgroundInfo,
         Transform,
-        ExportResult
+        ExportResult,
+        AlphaMatte
     )
+    from domain.export_profiles import ExportProfile, get_export_profile, encode_image
+    from domain.alpha_trim import alpha_bbox
 except ImportError:
     from domain.entities import (
         ValidationResult,
         BackgroundRemovalResult,
         BackgroundInfo,
         Transform,
-        ExportResult
+        ExportResult,
+        AlphaMatte
     )
+    from domain.export_profiles import ExportProfile, get_export_profile, encode_image
+    from domain.alpha_trim import alpha_bbox
 
 
 class ImageValidationUseCase:
@@ -105,42 +115,187 @@ class ImageValidationUseCase:
 class BackgroundRemovalUseCase:
     """Caso de uso para remoção de fundo via API Gradio"""
     
-    def __init__(self, gradio_client):
+    def __init__(self, gradio_client, local_batch_size: int = 1, output_mode: str = "image",
+                 trim: bool = False):
+        if output_mode not in ("image", "matte"):
+            raise ValueError(f"Modo de saída inválido: {output_mode}")
         self.gradio_client = gradio_client
         self.timeout = 30
+        # Imagens por lote de inferência local quando o fallback está ativo
+        self.local_batch_size = max(1, local_batch_size)
+        # "matte": resultado é só a máscara alpha + referência à original (AlphaMatte)
+        self.output_mode = output_mode
+        # Recortar o resultado às margens do conteúdo visível (calculado uma vez aqui)
+        self.trim = trim
     
-    def execute(self, image_path: str) -> BackgroundRemovalResult:
-        """Remove fundo da imagem usando API Gradio com fallback local"""
+    def execute(self, image_path: Union[str, bytes]) -> BackgroundRemovalResult:
+        """Remove fundo da imagem usando API Gradio com fallback local
+        
+        Aceita caminho de arquivo ou bytes já codificados (ex.: upload),
+        que seguem em memória sem arquivo temporário.
+        """
+        return self._execute(image_path)
+    
+    def execute_many(self, image_paths: Union[Iterable[str], Mapping[Any, Union[str, bytes]]],
+                     max_in_flight: int = 4,
+                     timeout: Optional[float] = None) -> Iterator[tuple[Any, BackgroundRemovalResult]]:
+        """Remove fundo de várias imagens mantendo até max_in_flight requisições simultâneas
+        
+        Entrega (caminho, resultado) conforme cada imagem termina. Com um
+        mapeamento {chave: caminho ou bytes}, entrega (chave, resultado).
+        Falha ou timeout de uma requisição usa o fallback local só para
+        aquela imagem. Com o fallback já ativo e local_batch_size > 1, as
+        imagens vão direto para a inferência local em lotes.
+        """
+        max_in_flight = max(1, max_in_flight)
+        request_timeout = self.timeout if timeout is None else timeout
+        if isinstance(image_paths, Mapping):
+            paths_iter = iter(image_paths.items())
+        else:
+            paths_iter = ((image_path, image_path) for image_path in image_paths)
+        
+        if self.local_batch_size > 1 and bool(self.gradio_client.use_fallback):
+            yield from self._execute_many_local(paths_iter)
+            return
+        
+        pending = {}
+        
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        key, image_source = next(paths_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future = executor.submit(
+                        self._execute, image_source,
+                        timeout=request_timeout, sticky_fallback=False
+                    )
+                    pending[future] = key
+                
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+    
+    def _execute_many_local(self, paths_iter: Iterator[tuple[Any, Union[str, bytes]]]
+                            ) -> Iterator[tuple[Any, BackgroundRemovalResult]]:
+        """Remove fundo localmente, local_batch_size imagens por inferência"""
+        while True:
+            chunk = list(islice(paths_iter, self.local_batch_size))
+            if not chunk:
+                break
+            
+            start_time = datetime.now()
+            keys, sources, images = [], [], []
+            for key, image_source in chunk:
+                try:
+                    if isinstance(image_source, bytes):
+                        image = Image.open(io.BytesIO(image_source))
+                    else:
+                        image = Image.open(image_source)
+                    image.load()
+                except Exception as e:
+                    yield key, BackgroundRemovalResult(
+                        success=False,
+                        image_no_bg=None,
+                        error=f"Erro ao carregar imagem: {e}",
+                        processing_time=0,
+                        api_status="api_error"
+                    )
+                    continue
+                keys.append(key)
+                sources.append(image_source)
+                images.append(image)
+            
+            if not images:
+                continue
+            
+            removed = self.gradio_client.remove_backgrounds_local(images, matte=self.output_mode == "matte")
+            # Tempo do lote dividido entre as imagens
+            processing_time = (datetime.now() - start_time).total_seconds() / len(images)
+            for key, image_source, (result_image, source) in zip(keys, sources, removed):
+                if result_image is not None:
+                    yield key, self._success(result_image, image_source, processing_time, source)
+                else:
+                    yield key, BackgroundRemovalResult(
+                        success=False,
+                        image_no_bg=None,
+                        error="Falha na remoção de fundo (fallback local)",
+                        processing_time=processing_time,
+                        api_status="api_error"
+                    )
+    
+    def _success(self, result_image: Image.Image, image_source: Union[str, bytes],
+                 processing_time: float, api_status: str) -> BackgroundRemovalResult:
+        """Resultado de sucesso: recorte RGBA ou máscara referenciando a original"""
+        trim_box = None
+        if self.trim:
+            trim_box = alpha_bbox(result_image) if self.output_mode == "image" else result_image.getbbox()
+            if trim_box == (0, 0, result_image.width, result_image.height):
+                trim_box = None
+        
+        if self.output_mode == "matte":
+            return BackgroundRemovalResult(
+                success=True,
+                image_no_bg=None,
+                error=None,
+                processing_time=processing_time,
+                api_status=api_status,
+                matte=AlphaMatte(source=image_source, matte=result_image, box=trim_box),
+                trim_box=trim_box
+            )
+        return BackgroundRemovalResult(
+            success=True,
+            image_no_bg=result_image.crop(trim_box) if trim_box else result_image,
+            error=None,
+            processing_time=processing_time,
+            api_status=api_status,
+            trim_box=trim_box
+        )
+    
+    def _execute(self, image_path: Union[str, bytes], **remove_options) -> BackgroundRemovalResult:
         start_time = datetime.now()
         
         try:
-            # Verificar se arquivo existe
-            if not os.path.exists(image_path):
-                return BackgroundRemovalResult(
-                    success=False,
-                    image_no_bg=None,
-                    error="Arquivo não encontrado",
-                    processing_time=0,
-                    api_status="api_error"
-                )
-            
-            # Carregar imagem
-            input_image = Image.open(image_path)
+            if isinstance(image_path, bytes):
+                # Bytes do upload: decodificar em memória e repassar os originais
+                input_image = Image.open(io.BytesIO(image_path))
+                remove_options['encoded'] = image_path
+            else:
+                # Verificar se arquivo existe
+                if not os.path.exists(image_path):
+                    return BackgroundRemovalResult(
+                        success=False,
+                        image_no_bg=None,
+                        error="Arquivo não encontrado",
+                        processing_time=0,
+                        api_status="api_error"
+                    )
+                
+                # Carregar imagem
+                input_image = Image.open(image_path)
             
             # Chamar método de remoção de fundo (com fallback automático)
-            result_image = self.gradio_client.remove_background(input_image)
+            if self.output_mode == "matte":
+                if not isinstance(image_path, bytes):
+                    remove_options['source'] = os.path.abspath(image_path)
+                result_image = self.gradio_client.remove_matte(input_image, **remove_options)
+            else:
+                result_image = self.gradio_client.remove_background(input_image, **remove_options)
             
             processing_time = (datetime.now() - start_time).total_seconds()
             
             if result_image:
-                api_status = "fallback_local" if self.gradio_client.use_fallback else "success"
-                return BackgroundRemovalResult(
-                    success=True,
-                    image_no_bg=result_image,
-                    error=None,
-                    processing_time=processing_time,
-                    api_status=api_status
-                )
+                # Cliente informa a origem do resultado (cache, API ou fallback local)
+                api_status = getattr(self.gradio_client, 'last_source', None)
+                if api_status not in ("cache_hit", "success", "fallback_local"):
+                    api_status = "fallback_local" if self.gradio_client.use_fallback else "success"
+                return self._success(result_image, image_path, processing_time, api_status)
             else:
                 return BackgroundRemovalResult(
                     success=False,
@@ -177,16 +332,25 @@ class BackgroundRemovalUseCase:
 
 
 class BackgroundLoaderUseCase:
-    """Caso de uso para carregar backgrounds disponíveis"""
+    """Caso de uso para carregar backgrounds disponíveis
+    
+    Com um índice (objeto com refresh() -> List[BackgroundInfo]) a listagem
+    vem do índice persistido, com dimensões e miniaturas reais; sem ele,
+    cada background é aberto a cada chamada.
+    """
     
-    def __init__(self, backgrounds_dir: str = "backgrounds"):
+    def __init__(self, backgrounds_dir: str = "backgrounds", index: Any = None):
         self.backgrounds_dir = backgrounds_dir
+        self.index = index
     
     def execute(self) -> List[BackgroundInfo]:
         """Carrega lista de backgrounds disponíveis"""
         backgrounds = []
         
         try:
+            if self.index is not None:
+                return self.index.refresh()
+            
             if not os.path.exists(self.backgrounds_dir):
                 logging.warning(f"Pasta {self.backgrounds_dir} não encontrada")
                 return backgrounds
@@ -217,9 +381,14 @@ class BackgroundLoaderUseCase:
 class ThumbnailExportUseCase:
     """Caso de uso para export de thumbnails padronizados"""
     
-    def __init__(self, output_dir: str = "thumbnails-prontas"):
+    def __init__(self, output_dir: str = "thumbnails-prontas",
+                 profile: Union[str, ExportProfile] = "balanced", quality: int = 95,
+                 quantize: bool = False):
         self.output_dir = output_dir
         self.target_size = (1080, 1080)
+        if isinstance(profile, str):
+            profile = get_export_profile(profile, quality, quantize)
+        self.profile = profile
     
     def execute(self, composition: Image.Image, filename: Optional[str] = None, original_name: Optional[str] = None) -> ExportResult:
         """Exporta thumbnail final padronizado"""
@@ -227,41 +396,48 @@ class ThumbnailExportUseCase:
             # Criar pasta de output se não existir
             os.makedirs(self.output_dir, exist_ok=True)
             
+            # Extensão definida pelo perfil de export (.png, .webp, .jpg)
+            extension = self.profile.extension
+            
             # Gerar nome seguindo padrão: nome_original_thumb.png
             if filename is None:
                 if original_name:
                     # Remove extensão do nome original e adiciona sufixo _thumb
                     base_name = os.path.splitext(original_name)[0]
-                    filename = f"{base_name}_thumb.png"
+                    filename = f"{base_name}_thumb{extension}"
                 else:
                     # Fallback para timestamp se não tiver nome original
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"produto_{timestamp}_thumb.png"
+                    filename = f"produto_{timestamp}_thumb{extension}"
             else:
                 # Se filename foi fornecido, garantir que termina com _thumb
                 base_name = os.path.splitext(filename)[0]
                 if not base_name.endswith('_thumb'):
-                    filename = f"{base_name}_thumb.png"
-                elif not filename.lower().endswith('.png'):
-                    filename = f"{filename}.png"
+                    filename = f"{base_name}_thumb{extension}"
+                elif not filename.lower().endswith(extension):
+                    filename = f"{filename}{extension}"
             
             file_path = os.path.join(self.output_dir, filename)
             
             # Redimensionar para 1080x1080 mantendo proporção
             resized_composition = self._resize_to_target(composition)
             
-            # Salvar como PNG
-            resized_composition.save(file_path, "PNG", optimize=True)
+            # Codificar segundo o perfil (tempo medido para comparar perfis)
+            encode_start = time.perf_counter()
+            data = encode_image(resized_composition, self.profile)
+            encode_ms = (time.perf_counter() - encode_start) * 1000
             
-            # Calcular tamanho do arquivo
-            size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            with open(file_path, 'wb') as f:
+                f.write(data)
             
             return ExportResult(
                 success=True,
                 file_path=file_path,
                 filename=filename,
                 error=None,
-                size_mb=size_mb
+                size_mb=len(data) / (1024 * 1024),
+                profile=self.profile.name,
+                encode_ms=encode_ms
             )
             
         except Exception as e:
@@ -0,0 +1,319 @@
+"""Batch Engine - Processamento em lote de thumbnails com pool de processos"""
+import os
+import time
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterable, Iterator, Optional, Union
+from PIL import Image
+
+try:
+    # Imports relativos (quando usado como módulo)
+    from .domain.entities import BatchWorkItem, BatchItemResult
+    from .domain.export_profiles import ExportProfile, get_export_profile
+    from .application.use_cases import ThumbnailExportUseCase
+    from .infrastructure.image_service import ImageCompositionService
+    from .infrastructure.file_service import FileService
+    from .infrastructure.build_manifest import BuildManifest
+    from .infrastructure.trimmed_product_cache import TrimmedProductCache
+    from .infrastructure.async_logging import LogAggregator
+except ImportError:
+    # Imports absolutos (quando executado diretamente)
+    from domain.entities import BatchWorkItem, BatchItemResult
+    from domain.export_profiles import ExportProfile, get_export_profile
+    from application.use_cases import ThumbnailExportUseCase
+    from infrastructure.image_service import ImageCompositionService
+    from infrastructure.file_service import FileService
+    from infrastructure.build_manifest import BuildManifest
+    from infrastructure.trimmed_product_cache import TrimmedProductCache
+    from infrastructure.async_logging import LogAggregator
+
+
+class BatchWorkerServices:
+    """Serviços mantidos aquecidos por cada worker do lote"""
+
+    def __init__(self, base_path: str = ".", output_dir: str = "thumbnails-prontas",
+                 background_cache_size: int = 8, compositor: str = "pil",
+                 export_profile: Union[str, ExportProfile] = "balanced", trim_products: bool = False,
+                 transform_engine: str = "affine"):
+        # Contagens de log repassadas ao motor a cada item (o processo do pool
+        # termina com os._exit, sem atexit para publicá-las)
+        self.file_service = FileService(base_path, log_interval=float('inf'))
+        self.image_service = ImageCompositionService(background_cache_size, compositor, transform_engine)
+        self.exporter = ThumbnailExportUseCase(output_dir, export_profile)
+        # Produtos recortados ao alpha uma vez por arquivo (itens vêm agrupados por produto)
+        self.trimmed_products = TrimmedProductCache(4) if trim_products else None
+        # Chave do produto no cache de sprites, calculada uma vez por arquivo
+        self._product_keys: dict[str, Optional[tuple]] = {}
+
+    def process(self, item: BatchWorkItem) -> BatchItemResult:
+        """Compõe e exporta um item do lote"""
+        start_time = time.perf_counter()
+
+        try:
+            product = self._load_product(item.product_path)
+            background = self.file_service.load_image(item.background_path)
+
+            if not product or not background:
+                return self._result(item, start_time, error="Erro ao carregar imagens para composição")
+
+            composition = self.image_service.compose_preview(product, background, item.transform,
+                                                             product_key=self._product_key(item.product_path))
+            export = self.exporter.execute(composition, item.output_name)
+
+            if not export.success:
+                return self._result(item, start_time, error=export.error)
+
+            return self._result(item, start_time, file_path=export.file_path,
+                                size_mb=export.size_mb, encode_ms=export.encode_ms)
+
+        except Exception as e:
+            return self._result(item, start_time, error=str(e))
+
+    def _load_product(self, path: str) -> Optional[Image.Image]:
+        """Produto decodificado uma única vez (já recortado ao alpha, se ativo)"""
+        if self.trimmed_products is None:
+            return self.file_service.load_image(path)
+        try:
+            return self.trimmed_products.load(path)
+        except OSError:
+            return None
+
+    def _product_key(self, path: str) -> Optional[tuple]:
+        """Produto transformado reaproveitado nos demais backgrounds com o mesmo Transform"""
+        if self.image_service.sprite_cache.max_entries == 0:
+            return None
+        if path not in self._product_keys:
+            self._product_keys[path] = (os.path.abspath(path), os.stat(path).st_mtime_ns,
+                                        self.trimmed_products is not None)
+        return self._product_keys[path]
+
+    def _result(self, item: BatchWorkItem, start_time: float, file_path: Optional[str] = None,
+                size_mb: float = 0, error: Optional[str] = None, encode_ms: float = 0.0) -> BatchItemResult:
+        return BatchItemResult(
+            item=item,
+            success=error is None,
+            file_path=file_path,
+            error=error,
+            size_mb=size_mb,
+            processing_time=time.perf_counter() - start_time,
+            worker_id=os.getpid(),
+            cache_stats=self.image_service.get_cache_stats(),
+            encode_ms=encode_ms,
+            log_counts=self.drain_log_counts()
+        )
+
+    def drain_log_counts(self) -> dict:
+        """Eventos por imagem contados desde o último item"""
+        aggregators = (self.file_service.loads_log, self.file_service.saves_log)
+        return {aggregator.event: aggregator.drain() for aggregator in aggregators}
+
+
+# Serviços do worker atual (um por processo do pool)
+_worker_services: Optional[BatchWorkerServices] = None
+
+
+def _init_worker(base_path: str, output_dir: str, background_cache_size: int, compositor: str,
+                 export_profile: ExportProfile, trim_products: bool, transform_engine: str) -> None:
+    """Inicializa serviços uma única vez por processo do pool"""
+    global _worker_services
+    _worker_services = BatchWorkerServices(base_path, output_dir, background_cache_size,
+                                           compositor, export_profile, trim_products, transform_engine)
+
+
+def _process_item(item: BatchWorkItem) -> BatchItemResult:
+    """Processa item no worker usando os serviços já inicializados"""
+    return _worker_services.process(item)
+
+
+class BatchThumbnailEngine:
+    """Motor de geração de thumbnails em lote
+
+    Com workers > 1 os itens são distribuídos para um pool de processos;
+    os resultados são entregues na ordem em que ficam prontos. No modo
+    incremental, saídas cujas entradas não mudaram (segundo o manifesto
+    da pasta de saída) são puladas.
+    """
+
+    def __init__(self, base_path: str = ".", output_dir: str = "thumbnails-prontas",
+                 workers: int = 1, background_cache_size: int = 8, compositor: str = "pil",
+                 export_profile: Union[str, ExportProfile] = "balanced", trim_products: bool = False,
+                 transform_engine: str = "affine", log_interval: float = 30.0):
+        self.base_path = base_path
+        self.output_dir = output_dir
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.background_cache_size = background_cache_size
+        self.compositor = compositor
+        if isinstance(export_profile, str):
+            export_profile = get_export_profile(export_profile)
+        self.export_profile = export_profile
+        self.trim_products = trim_products
+        self.transform_engine = transform_engine
+        # Canvas fixo de ImageCompositionService/ThumbnailExportUseCase
+        self.canvas_size = (1080, 1080)
+        self.logger = logging.getLogger(__name__)
+        self._worker_cache_stats: dict[int, dict] = {}
+        self._build_stats = {'built': 0, 'skipped': 0, 'pruned': 0}
+        # Resumo periódico dos eventos por imagem de todos os workers
+        self.log_interval = log_interval
+        self._log_aggregators: dict[str, LogAggregator] = {}
+
+    def run(self, items: Iterable[BatchWorkItem], incremental: bool = False,
+            prune: bool = False) -> Iterator[BatchItemResult]:
+        """Processa itens e entrega resultados conforme forem concluídos
+
+        incremental: pula saídas já geradas com as mesmas entradas
+        prune: ao final, apaga saídas do manifesto que não estão no lote
+        """
+        self._worker_cache_stats = {}
+        self._build_stats = {'built': 0, 'skipped': 0, 'pruned': 0}
+
+        try:
+            yield from self._run(items, incremental, prune)
+        finally:
+            for aggregator in self._log_aggregators.values():
+                aggregator.flush()
+
+    def _run(self, items: Iterable[BatchWorkItem], incremental: bool, prune: bool) -> Iterator[BatchItemResult]:
+        # Manifesto sempre atualizado: um lote completo deixa as impressões
+        # digitais prontas para o próximo incremental (ou --prune)
+        manifest = BuildManifest(self.output_dir)
+        fingerprints: dict[str, Optional[str]] = {}
+        skipped: deque = deque()
+
+        def pending_items():
+            for item in items:
+                fingerprint = self._fingerprint(manifest, item)
+                fingerprints[item.output_name] = fingerprint
+                current = None
+                if incremental and fingerprint:
+                    current = manifest.current_output(item.output_name, fingerprint)
+                if current:
+                    skipped.append(BatchItemResult(
+                        item=item,
+                        success=True,
+                        file_path=current,
+                        error=None,
+                        size_mb=os.path.getsize(current) / (1024 * 1024),
+                        processing_time=0,
+                        skipped=True
+                    ))
+                else:
+                    yield item
+
+        try:
+            for result in self._collect(self._run_items(pending_items())):
+                fingerprint = fingerprints.get(result.item.output_name)
+                if result.success and fingerprint:
+                    manifest.record(result.item, fingerprint, result.file_path)
+                while skipped:
+                    yield self._skip(skipped.popleft())
+                yield result
+            while skipped:
+                yield self._skip(skipped.popleft())
+
+            if prune:
+                removed = manifest.prune(fingerprints)
+                self._build_stats['pruned'] = len(removed)
+                for file_path in removed:
+                    self.logger.info(f"Saída órfã removida: {file_path}")
+        finally:
+            manifest.save()
+
+    def _fingerprint(self, manifest: BuildManifest, item: BatchWorkItem) -> Optional[str]:
+        try:
+            # Opções que mudam os pixels: motor de composição (numpy recorta fora do
+            # canvas, PIL limita), reamostragem da transformação e recorte ao alpha
+            return manifest.fingerprint(item, self.canvas_size, self.export_profile, {
+                'compositor': self.compositor,
+                'transform_engine': self.transform_engine,
+                'trim_products': self.trim_products
+            })
+        except OSError:
+            # Entrada ausente: o worker reporta o erro normalmente
+            return None
+
+    def _skip(self, result: BatchItemResult) -> BatchItemResult:
+        self._build_stats['skipped'] += 1
+        return result
+
+    def _run_items(self, items: Iterable[BatchWorkItem]) -> Iterator[BatchItemResult]:
+        if self.workers == 1:
+            return self._run_serial(items)
+        return self._run_parallel(items)
+
+    def _collect(self, results: Iterator[BatchItemResult]) -> Iterator[BatchItemResult]:
+        for result in results:
+            if result.cache_stats is not None:
+                self._worker_cache_stats[result.worker_id] = result.cache_stats
+            for event, count in (result.log_counts or {}).items():
+                if event not in self._log_aggregators:
+                    self._log_aggregators[event] = LogAggregator(self.logger, event, self.log_interval)
+                self._log_aggregators[event].add(count)
+            if result.success:
+                self._build_stats['built'] += 1
+            yield result
+
+    def _run_serial(self, items: Iterable[BatchWorkItem]) -> Iterator[BatchItemResult]:
+        services = BatchWorkerServices(self.base_path, self.output_dir, self.background_cache_size,
+                                       self.compositor, self.export_profile, self.trim_products,
+                                       self.transform_engine)
+        for item in items:
+            yield services.process(item)
+
+    def _run_parallel(self, items: Iterable[BatchWorkItem]) -> Iterator[BatchItemResult]:
+        self.logger.info(f"Processando lote com {self.workers} workers")
+
+        # Limitar itens pendentes para não materializar o lote inteiro de uma vez
+        max_pending = self.workers * 4
+        pending: dict = {}
+        items_iter = iter(items)
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.base_path, self.output_dir, self.background_cache_size,
+                      self.compositor, self.export_profile, self.trim_products, self.transform_engine)
+        ) as executor:
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        item = next(items_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(_process_item, item)] = item
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Falha do próprio worker (ex.: processo encerrado)
+                        self.logger.error(f"Worker falhou em {item.output_name}: {e}")
+                        result = BatchItemResult(
+                            item=item,
+                            success=False,
+                            file_path=None,
+                            error=str(e),
+                            size_mb=0,
+                            processing_time=0
+                        )
+                    yield result
+
+    def get_cache_stats(self) -> dict:
+        """Soma as estatísticas de cache de backgrounds de todos os workers"""
+        totals = {'workers': len(self._worker_cache_stats), 'hits': 0, 'misses': 0, 'evictions': 0}
+        for stats in self._worker_cache_stats.values():
+            for key in ('hits', 'misses', 'evictions'):
+                totals[key] += stats.get(key, 0)
+        return totals
+
+    def get_build_stats(self) -> dict:
+        """Saídas geradas, puladas (inalteradas) e removidas no último lote"""
+        return dict(self._build_stats)
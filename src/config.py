@@ -13,6 +13,11 @@ class GradioConfig:
     api_name: str = "/predict"
     max_retries: int = 3
     retry_delay: float = 1.0
+    max_in_flight: int = 4
+    health_ttl: float = 60.0
+    circuit_failure_threshold: int = 3
+    circuit_base_backoff: float = 5.0
+    circuit_max_backoff: float = 300.0
 
 
 @dataclass
@@ -23,6 +28,41 @@ class ImageConfig:
     supported_formats: tuple[str, ...] = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
     default_quality: int = 95
     thumbnail_size: tuple[int, int] = (150, 150)
+    background_cache_size: int = 8
+    compositor: str = "pil"
+    transform_engine: str = "affine"
+    preview_size: int = 360
+    decoded_cache_mb: int = 256
+    export_profile: str = "balanced"
+    export_quantize: bool = False
+    trim_products: bool = False
+    archive_download_max_mb: int = 200
+    batch_workers: int = 1
+
+
+@dataclass
+class RembgConfig:
+    """Configurações do fallback local (rembg)"""
+    model: str = "u2net"
+    idle_timeout: float = 600.0
+    batch_size: int = 4
+
+
+@dataclass
+class RemovalCacheConfig:
+    """Configurações do cache persistente de remoção de fundo"""
+    enabled: bool = True
+    cache_dir: str = ".cache/background_removal"
+    max_size_mb: int = 500
+    output_mode: str = "image"
+
+
+@dataclass
+class BackgroundIndexConfig:
+    """Configurações do índice persistido de backgrounds"""
+    enabled: bool = True
+    index_dir: str = ".cache/background_index"
+    preview_size: int = 256
 
 
 @dataclass
@@ -47,6 +87,7 @@ class LoggingConfig:
     file_path: str = "thumbnail_generator.log"
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     backup_count: int = 5
+    summary_interval: float = 30.0  # segundos entre resumos de eventos por imagem
 
 
 class AppConfig:
@@ -59,13 +100,36 @@ class AppConfig:
         self.gradio = GradioConfig(
             endpoint=os.getenv("GRADIO_ENDPOINT", GradioConfig.endpoint),
             timeout=int(os.getenv("GRADIO_TIMEOUT", str(GradioConfig.timeout))),
-            max_retries=int(os.getenv("GRADIO_MAX_RETRIES", str(GradioConfig.max_retries)))
+            max_retries=int(os.getenv("GRADIO_MAX_RETRIES", str(GradioConfig.max_retries))),
+            max_in_flight=int(os.getenv("GRADIO_MAX_IN_FLIGHT", str(GradioConfig.max_in_flight))),
+            health_ttl=float(os.getenv("GRADIO_HEALTH_TTL", str(GradioConfig.health_ttl))),
+            circuit_failure_threshold=int(os.getenv(
+                "GRADIO_CIRCUIT_FAILURES", str(GradioConfig.circuit_failure_threshold)
+            )),
+            circuit_base_backoff=float(os.getenv(
+                "GRADIO_CIRCUIT_BACKOFF", str(GradioConfig.circuit_base_backoff)
+            )),
+            circuit_max_backoff=float(os.getenv(
+                "GRADIO_CIRCUIT_MAX_BACKOFF", str(GradioConfig.circuit_max_backoff)
+            ))
         )
         
         self.image = ImageConfig(
             canvas_size=self._parse_size(os.getenv("CANVAS_SIZE", "1080x1080")),
             max_file_size_mb=int(os.getenv("MAX_FILE_SIZE_MB", str(ImageConfig.max_file_size_mb))),
-            default_quality=int(os.getenv("IMAGE_QUALITY", str(ImageConfig.default_quality)))
+            default_quality=int(os.getenv("IMAGE_QUALITY", str(ImageConfig.default_quality))),
+            background_cache_size=int(os.getenv("BACKGROUND_CACHE_SIZE", str(ImageConfig.background_cache_size))),
+            compositor=os.getenv("COMPOSITOR", ImageConfig.compositor).lower(),
+            transform_engine=os.getenv("TRANSFORM_ENGINE", ImageConfig.transform_engine).lower(),
+            preview_size=int(os.getenv("PREVIEW_SIZE", str(ImageConfig.preview_size))),
+            decoded_cache_mb=int(os.getenv("DECODED_CACHE_MB", str(ImageConfig.decoded_cache_mb))),
+            export_profile=os.getenv("EXPORT_PROFILE", ImageConfig.export_profile).lower(),
+            export_quantize=os.getenv("EXPORT_QUANTIZE", "false").lower() == "true",
+            trim_products=os.getenv("TRIM_PRODUCTS", "false").lower() == "true",
+            archive_download_max_mb=int(os.getenv(
+                "ARCHIVE_DOWNLOAD_MAX_MB", str(ImageConfig.archive_download_max_mb)
+            )),
+            batch_workers=int(os.getenv("BATCH_WORKERS", str(ImageConfig.batch_workers)))
         )
         
         self.paths = PathConfig(
@@ -76,9 +140,31 @@ class AppConfig:
             temp_dir=self.base_path / os.getenv("TEMP_DIR", "temp")
         )
         
+        self.rembg = RembgConfig(
+            model=os.getenv("REMBG_MODEL", RembgConfig.model).lower(),
+            idle_timeout=float(os.getenv("REMBG_IDLE_TIMEOUT", str(RembgConfig.idle_timeout))),
+            batch_size=int(os.getenv("REMBG_BATCH_SIZE", str(RembgConfig.batch_size)))
+        )
+        
+        self.removal_cache = RemovalCacheConfig(
+            enabled=os.getenv("REMOVAL_CACHE_ENABLED", "true").lower() == "true",
+            cache_dir=os.getenv("REMOVAL_CACHE_DIR", RemovalCacheConfig.cache_dir),
+            max_size_mb=int(os.getenv("REMOVAL_CACHE_MAX_MB", str(RemovalCacheConfig.max_size_mb))),
+            output_mode=os.getenv("REMOVAL_OUTPUT", RemovalCacheConfig.output_mode).lower()
+        )
+        
+        self.background_index = BackgroundIndexConfig(
+            enabled=os.getenv("BACKGROUND_INDEX_ENABLED", "true").lower() == "true",
+            index_dir=os.getenv("BACKGROUND_INDEX_DIR", BackgroundIndexConfig.index_dir),
+            preview_size=int(os.getenv("BACKGROUND_PREVIEW_SIZE", str(BackgroundIndexConfig.preview_size)))
+        )
+        
         self.logging = LoggingConfig(
             level=os.getenv("LOG_LEVEL", LoggingConfig.level),
-            file_path=os.getenv("LOG_FILE", LoggingConfig.file_path)
+            file_path=os.getenv("LOG_FILE", LoggingConfig.file_path),
+            max_file_size=int(os.getenv("LOG_MAX_BYTES", str(LoggingConfig.max_file_size))),
+            backup_count=int(os.getenv("LOG_BACKUP_COUNT", str(LoggingConfig.backup_count))),
+            summary_interval=float(os.getenv("LOG_SUMMARY_INTERVAL", str(LoggingConfig.summary_interval)))
         )
         
         # Configurações gerais
@@ -109,6 +195,24 @@ class AppConfig:
         if self.image.max_file_size_mb <= 0:
             errors.append("Tamanho máximo de arquivo deve ser positivo")
         
+        if self.image.compositor not in ('pil', 'numpy'):
+            errors.append("Motor de composição deve ser 'pil' ou 'numpy'")
+        
+        if self.image.transform_engine not in ('affine', 'two_pass'):
+            errors.append("Motor de transformação deve ser 'affine' ou 'two_pass'")
+        
+        if self.image.preview_size <= 0:
+            errors.append("Tamanho do preview deve ser positivo")
+        
+        if self.image.export_profile not in ('fast', 'balanced', 'smallest', 'webp', 'jpeg'):
+            errors.append("Perfil de export deve ser fast, balanced, smallest, webp ou jpeg")
+        
+        if self.image.archive_download_max_mb <= 0:
+            errors.append("Limite do ZIP para download deve ser positivo")
+        
+        if self.image.batch_workers < 0:
+            errors.append("Workers do lote não podem ser negativos (0 = todos os núcleos)")
+        
         # Validar Gradio
         if not self.gradio.endpoint.startswith(('http://', 'https://')):
             errors.append("Endpoint Gradio deve ser uma URL válida")
@@ -116,6 +220,27 @@ class AppConfig:
         if self.gradio.timeout <= 0:
             errors.append("Timeout Gradio deve ser positivo")
         
+        if self.rembg.model not in ('u2net', 'u2netp', 'isnet', 'isnet-general-use', 'silueta'):
+            errors.append("Modelo rembg deve ser u2net, u2netp, isnet ou silueta")
+        
+        if self.rembg.idle_timeout < 0:
+            errors.append("Timeout de inatividade do rembg não pode ser negativo")
+        
+        if self.rembg.batch_size <= 0:
+            errors.append("Lote de inferência do rembg deve ser positivo")
+        
+        if self.removal_cache.max_size_mb <= 0:
+            errors.append("Tamanho máximo do cache de remoção deve ser positivo")
+        
+        if self.removal_cache.output_mode not in ('image', 'matte'):
+            errors.append("Saída da remoção de fundo deve ser 'image' ou 'matte'")
+        
+        if self.background_index.preview_size <= 0:
+            errors.append("Tamanho da miniatura de background deve ser positivo")
+        
+        if self.logging.backup_count < 0:
+            errors.append("Número de arquivos de log de backup não pode ser negativo")
+        
         return errors
     
     def create_directories(self) -> None:
@@ -134,13 +259,44 @@ class AppConfig:
             'gradio': {
                 'endpoint': self.gradio.endpoint,
                 'timeout': self.gradio.timeout,
-                'max_retries': self.gradio.max_retries
+                'max_retries': self.gradio.max_retries,
+                'max_in_flight': self.gradio.max_in_flight,
+                'health_ttl': self.gradio.health_ttl,
+                'circuit_failure_threshold': self.gradio.circuit_failure_threshold,
+                'circuit_base_backoff': self.gradio.circuit_base_backoff,
+                'circuit_max_backoff': self.gradio.circuit_max_backoff
             },
             'image': {
                 'canvas_size': self.image.canvas_size,
                 'max_file_size_mb': self.image.max_file_size_mb,
                 'supported_formats': self.image.supported_formats,
-                'default_quality': self.image.default_quality
+                'default_quality': self.image.default_quality,
+                'background_cache_size': self.image.background_cache_size,
+                'compositor': self.image.compositor,
+                'transform_engine': self.image.transform_engine,
+                'preview_size': self.image.preview_size,
+                'decoded_cache_mb': self.image.decoded_cache_mb,
+                'export_profile': self.image.export_profile,
+                'export_quantize': self.image.export_quantize,
+                'trim_products': self.image.trim_products,
+                'archive_download_max_mb': self.image.archive_download_max_mb,
+                'batch_workers': self.image.batch_workers
+            },
+            'rembg': {
+                'model': self.rembg.model,
+                'idle_timeout': self.rembg.idle_timeout,
+                'batch_size': self.rembg.batch_size
+            },
+            'removal_cache': {
+                'enabled': self.removal_cache.enabled,
+                'cache_dir': self.removal_cache.cache_dir,
+                'max_size_mb': self.removal_cache.max_size_mb,
+                'output_mode': self.removal_cache.output_mode
+            },
+            'background_index': {
+                'enabled': self.background_index.enabled,
+                'index_dir': self.background_index.index_dir,
+                'preview_size': self.background_index.preview_size
             },
             'paths': {
                 'backgrounds': str(self.paths.backgrounds_dir),
@@ -0,0 +1,22 @@
+"""Alpha Trim - Recorte dos produtos ao conteúdo visível"""
+from typing import Optional
+from PIL import Image
+
+
+def alpha_bbox(image: Image.Image) -> Optional[tuple[int, int, int, int]]:
+    """Caixa do conteúdo visível (alpha > 0)
+
+    Imagens sem alpha ocupam a caixa inteira; totalmente transparentes
+    retornam None.
+    """
+    if 'A' not in image.getbands():
+        return (0, 0, image.width, image.height)
+    return image.getchannel('A').getbbox()
+
+
+def trim_to_alpha(image: Image.Image) -> Image.Image:
+    """Recorta as margens transparentes (retorna a própria imagem se não houver)"""
+    bbox = alpha_bbox(image)
+    if bbox is None or bbox == (0, 0, image.width, image.height):
+        return image
+    return image.crop(bbox)
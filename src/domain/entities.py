@@ -1,6 +1,7 @@
 """Domain Entities - Thumbnail Generator MVP"""
+import io
 from dataclasses import dataclass
-from typing import Optional, Literal
+from typing import Optional, Literal, Union
 from PIL import Image
 
 
@@ -14,6 +15,35 @@ class ValidationResult:
     dimensions: tuple[int, int]
 
 
+@dataclass
+class AlphaMatte:
+    """Máscara alpha (8 bits) e referência à imagem original
+
+    Os pixels da original continuam sendo a fonte; o recorte RGBA só é
+    montado quando necessário (apply), por exemplo na composição.
+    """
+    source: Union[str, bytes, Image.Image]  # caminho, bytes codificados ou imagem
+    matte: Image.Image  # modo 'L'
+    box: Optional[tuple[int, int, int, int]] = None  # recorte ao conteúdo visível
+
+    def load_original(self) -> Image.Image:
+        """Decodifica a imagem original"""
+        if isinstance(self.source, Image.Image):
+            return self.source
+        image = Image.open(io.BytesIO(self.source) if isinstance(self.source, bytes) else self.source)
+        image.load()
+        return image
+
+    def apply(self) -> Image.Image:
+        """Recorte RGBA: pixels da original com a máscara como alpha"""
+        cutout = self.load_original().convert('RGBA')
+        matte = self.matte
+        if matte.size != cutout.size:
+            matte = matte.resize(cutout.size, Image.Resampling.BILINEAR)
+        cutout.putalpha(matte)
+        return cutout.crop(self.box) if self.box else cutout
+
+
 @dataclass
 class BackgroundRemovalResult:
     """Resultado da remoção de fundo via API Gradio"""
@@ -21,7 +51,15 @@ class BackgroundRemovalResult:
     image_no_bg: Optional[Image.Image]
     error: Optional[str]
     processing_time: float
-    api_status: Literal["success", "timeout", "api_error", "network_error"]
+    api_status: Literal["success", "fallback_local", "cache_hit", "timeout", "api_error", "network_error"]
+    matte: Optional[AlphaMatte] = None  # modo máscara: image_no_bg fica vazio
+    trim_box: Optional[tuple[int, int, int, int]] = None  # caixa do conteúdo na imagem original
+
+    def cutout(self) -> Optional[Image.Image]:
+        """Recorte RGBA, montado a partir da máscara quando necessário"""
+        if self.image_no_bg is not None:
+            return self.image_no_bg
+        return self.matte.apply() if self.matte is not None else None
 
 
 @dataclass
@@ -31,6 +69,8 @@ class BackgroundInfo:
     path: str
     thumbnail_path: str
     dimensions: tuple[int, int]
+    mtime_ns: int = 0
+    digest: Optional[str] = None  # hash do conteúdo (preenchido pelo índice)
 
 
 @dataclass
@@ -57,6 +97,8 @@ class ExportResult:
     filename: Optional[str]
     error: Optional[str]
     size_mb: float
+    profile: Optional[str] = None
+    encode_ms: float = 0.0
 
 
 @dataclass
@@ -71,4 +113,28 @@ class AppState:
 
     def __post_init__(self):
         if self.current_transform is None:
-            self.current_transform = Transform(x=0, y=0, scale=1.0, rotation=0.0)
\ No newline at end of file
+            self.current_transform = Transform(x=0, y=0, scale=1.0, rotation=0.0)
+
+@dataclass
+class BatchWorkItem:
+    """Item de trabalho do processamento em lote (produto x background)"""
+    product_path: str
+    background_path: str
+    transform: Transform
+    output_name: str
+
+
+@dataclass
+class BatchItemResult:
+    """Resultado de um item do processamento em lote"""
+    item: BatchWorkItem
+    success: bool
+    file_path: Optional[str]
+    error: Optional[str]
+    size_mb: float
+    processing_time: float
+    worker_id: int = 0
+    cache_stats: Optional[dict] = None
+    encode_ms: float = 0.0
+    skipped: bool = False  # saída inalterada, não recomposta (lote incremental)
+    log_counts: Optional[dict] = None  # eventos por imagem contados no worker (resumidos pelo motor)
@@ -0,0 +1,73 @@
+"""Export Profiles - Perfis de codificação das thumbnails"""
+import io
+from dataclasses import dataclass
+from typing import Optional
+from PIL import Image
+
+
+@dataclass(frozen=True)
+class ExportProfile:
+    """Formato e opções de codificação de um perfil de export
+
+    save_options aceita um dict, guardado como tupla de pares ordenada: o
+    perfil é imutável e hashable (entra na impressão digital do manifesto).
+    """
+    name: str
+    format: str
+    extension: str
+    save_options: tuple = ()
+    quantize_colors: Optional[int] = None
+
+    def __post_init__(self):
+        options = self.save_options.items() if isinstance(self.save_options, dict) else self.save_options
+        object.__setattr__(self, 'save_options', tuple(sorted(options)))
+
+    @property
+    def options(self) -> dict:
+        """Opções de Image.save do perfil"""
+        return dict(self.save_options)
+
+
+# Perfis disponíveis
+EXPORT_PROFILE_NAMES = ("fast", "balanced", "smallest", "webp", "jpeg")
+
+
+def get_export_profile(name: str, quality: int = 95, quantize: bool = False) -> ExportProfile:
+    """Monta o perfil pelo nome
+
+    - fast: PNG com compressão zlib mínima
+    - balanced: PNG com compressão zlib padrão
+    - smallest: PNG com optimize (e paleta de 256 cores se quantize=True)
+    - webp / jpeg: com perdas, usando a qualidade configurada
+    """
+    if name == "fast":
+        return ExportProfile(name, "PNG", ".png", {'compress_level': 1})
+    if name == "balanced":
+        return ExportProfile(name, "PNG", ".png", {'compress_level': 6})
+    if name == "smallest":
+        return ExportProfile(name, "PNG", ".png", {'optimize': True}, 256 if quantize else None)
+    if name == "webp":
+        return ExportProfile(name, "WEBP", ".webp", {'quality': quality, 'method': 4})
+    if name == "jpeg":
+        return ExportProfile(name, "JPEG", ".jpg", {'quality': quality, 'optimize': True})
+    raise ValueError(f"Perfil de export inválido: {name}")
+
+
+def encode_image(image: Image.Image, profile: ExportProfile) -> bytes:
+    """Codifica a imagem segundo o perfil"""
+    if profile.format == "JPEG" and image.mode != 'RGB':
+        # JPEG não tem alpha: achatar sobre branco
+        if image.mode == 'RGBA':
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+
+    if profile.quantize_colors:
+        method = Image.Quantize.FASTOCTREE if image.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+        image = image.quantize(profile.quantize_colors, method=method)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=profile.format, **profile.options)
+    return buffer.getvalue()
@@ -0,0 +1,136 @@
+"""Affine Transform Engine - Infrastructure Layer"""
+import math
+from typing import Optional
+from PIL import Image
+
+
+class AffineTransformEngine:
+    """Renderiza o produto já em coordenadas do canvas com uma única reamostragem
+
+    Escala, rotação e deslocamento são combinados em uma matriz afim; apenas
+    a área visível (bounding box do produto transformado, recortada ao canvas)
+    é renderizada. O centro do produto vai para o centro do canvas + offset,
+    como no caminho resize + rotate(expand=True).
+
+    Sem rotação, a matriz se reduz a uma escala: usa-se resize (LANCZOS por
+    padrão), que produz exatamente o resultado do caminho antigo.
+    """
+
+    def __init__(self, resample: Image.Resampling = Image.Resampling.BILINEAR,
+                 scale_resample: Image.Resampling = Image.Resampling.LANCZOS):
+        self.resample = resample
+        self.scale_resample = scale_resample
+
+    def render(self, product: Image.Image, canvas_size: tuple[int, int], scale: float,
+               rotation: float, offset: tuple[int, int] = (0, 0),
+               clamp: bool = False) -> tuple[Optional[Image.Image], tuple[int, int]]:
+        """Retorna (sprite RGBA, posição no canvas); sprite é None se nada ficar visível
+
+        Com clamp=True o produto é deslocado para caber inteiro no canvas
+        (mesmo comportamento do compositor PIL), quando possível.
+        """
+        if scale <= 0:
+            return None, (0, 0)
+
+        if product.mode != 'RGBA':
+            product = product.convert('RGBA')
+
+        center = (canvas_size[0] // 2 + offset[0], canvas_size[1] // 2 + offset[1])
+
+        if rotation % 360 == 0:
+            return self._render_scaled(product, canvas_size, scale, center, clamp)
+        return self._render_affine(product, canvas_size, scale, rotation, center, clamp)
+
+    def _render_scaled(self, product: Image.Image, canvas_size: tuple[int, int], scale: float,
+                       center: tuple[int, int], clamp: bool) -> tuple[Optional[Image.Image], tuple[int, int]]:
+        """Caminho sem rotação: uma única passada de resize"""
+        if scale != 1.0:
+            new_size = (max(1, int(product.width * scale)), max(1, int(product.height * scale)))
+            product = product.resize(new_size, self.scale_resample)
+
+        left = center[0] - product.width // 2
+        top = center[1] - product.height // 2
+        box = self._visible_box((left, top, left + product.width, top + product.height), canvas_size, clamp)
+        if box is None:
+            return None, (0, 0)
+
+        # Deslocamento aplicado pelo clamp
+        visible_left, visible_top, visible_right, visible_bottom = box[1]
+        left, top = left + box[0][0], top + box[0][1]
+
+        if (visible_right - visible_left, visible_bottom - visible_top) != product.size:
+            product = product.crop((visible_left - left, visible_top - top,
+                                    visible_right - left, visible_bottom - top))
+        return product, (visible_left, visible_top)
+
+    def _render_affine(self, product: Image.Image, canvas_size: tuple[int, int], scale: float,
+                       rotation: float, center: tuple[int, int],
+                       clamp: bool) -> tuple[Optional[Image.Image], tuple[int, int]]:
+        """Caminho com rotação: Image.transform com a matriz afim inversa"""
+        # Reduções fortes: pré-reduzir por fator inteiro para evitar aliasing,
+        # já que a transformação afim não filtra ao diminuir
+        if scale < 0.5:
+            factor = int(1 / scale)
+            product = product.reduce(factor)
+            scale *= factor
+
+        width, height = product.size
+        cx, cy = width / 2, height / 2
+        tx, ty = center
+
+        # Rotação no sentido anti-horário (como Image.rotate), eixo y para baixo
+        angle = math.radians(rotation)
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+
+        # Bounding box do produto transformado
+        xs, ys = [], []
+        for px, py in ((0, 0), (width, 0), (0, height), (width, height)):
+            dx, dy = (px - cx) * scale, (py - cy) * scale
+            xs.append(tx + dx * cos_a + dy * sin_a)
+            ys.append(ty - dx * sin_a + dy * cos_a)
+
+        bounds = (math.floor(min(xs)), math.floor(min(ys)), math.ceil(max(xs)), math.ceil(max(ys)))
+        box = self._visible_box(bounds, canvas_size, clamp)
+        if box is None:
+            return None, (0, 0)
+
+        (shift_x, shift_y), (left, top, right, bottom) = box
+        tx, ty = tx + shift_x, ty + shift_y
+
+        # Matriz inversa: coordenada de saída (sprite) -> coordenada no produto
+        ox, oy = left - tx, top - ty
+        data = (
+            cos_a / scale, -sin_a / scale, cx + (cos_a * ox - sin_a * oy) / scale,
+            sin_a / scale, cos_a / scale, cy + (sin_a * ox + cos_a * oy) / scale
+        )
+
+        sprite = product.transform(
+            (right - left, bottom - top),
+            Image.Transform.AFFINE,
+            data,
+            resample=self.resample,
+            fillcolor=(0, 0, 0, 0)
+        )
+        return sprite, (left, top)
+
+    @staticmethod
+    def _visible_box(bounds: tuple[int, int, int, int], canvas_size: tuple[int, int],
+                     clamp: bool) -> Optional[tuple[tuple[int, int], tuple[int, int, int, int]]]:
+        """Retorna (deslocamento do clamp, área visível no canvas) ou None"""
+        left, top, right, bottom = bounds
+        shift_x = shift_y = 0
+
+        if clamp:
+            # Equivalente a max(0, min(pos, limite - tamanho))
+            shift_x = max(0, min(left, canvas_size[0] - (right - left))) - left
+            shift_y = max(0, min(top, canvas_size[1] - (bottom - top))) - top
+
+        visible = (
+            max(0, left + shift_x),
+            max(0, top + shift_y),
+            min(canvas_size[0], right + shift_x),
+            min(canvas_size[1], bottom + shift_y)
+        )
+        if visible[2] <= visible[0] or visible[3] <= visible[1]:
+            return None
+        return (shift_x, shift_y), visible
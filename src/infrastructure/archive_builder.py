@@ -0,0 +1,61 @@
+"""Archive Builder - Infrastructure Layer"""
+import os
+import logging
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+class StreamingArchiveBuilder:
+    """Monta arquivos ZIP direto dos arquivos exportados, em disco
+
+    As entradas são gravadas sem recompressão (ZIP_STORED), já que PNG,
+    JPEG e WebP já são comprimidos; o conteúdo é copiado em blocos do
+    arquivo de origem para um arquivo temporário, com memória constante.
+    """
+
+    def __init__(self, spool_dir: Optional[str] = None):
+        self.spool_dir = spool_dir
+        self.logger = logging.getLogger(__name__)
+
+    def build(self, files: Iterable[tuple[str, str]], destination: Optional[str] = None) -> str:
+        """Cria o ZIP a partir de pares (caminho, nome no arquivo) e retorna seu caminho"""
+        if destination is None:
+            fd, destination = tempfile.mkstemp(prefix="thumbnails_", suffix=".zip", dir=self.spool_dir)
+            os.close(fd)
+
+        used_names: set[str] = set()
+        try:
+            with zipfile.ZipFile(destination, 'w', zipfile.ZIP_STORED) as archive:
+                for path, arcname in files:
+                    if not Path(path).exists():
+                        self.logger.warning(f"Arquivo ausente ignorado no ZIP: {path}")
+                        continue
+                    arcname = self._unique_name(arcname, used_names)
+                    archive.write(path, arcname)
+        except Exception:
+            self.discard(destination)
+            raise
+
+        return destination
+
+    @staticmethod
+    def _unique_name(arcname: str, used_names: set[str]) -> str:
+        """Evita entradas duplicadas (ex.: uploads com o mesmo nome)"""
+        candidate = arcname
+        stem, suffix = Path(arcname).stem, Path(arcname).suffix
+        counter = 1
+        while candidate in used_names:
+            candidate = f"{stem}_{counter}{suffix}"
+            counter += 1
+        used_names.add(candidate)
+        return candidate
+
+    def discard(self, archive_path: Optional[str]) -> None:
+        """Remove arquivo ZIP gerado anteriormente"""
+        if archive_path and os.path.exists(archive_path):
+            try:
+                os.unlink(archive_path)
+            except OSError as e:
+                self.logger.warning(f"Erro ao remover ZIP temporário: {e}")
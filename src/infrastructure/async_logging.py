@@ -0,0 +1,187 @@
+"""Async Logging - Infrastructure Layer"""
+import os
+import sys
+import time
+import queue
+import atexit
+import logging
+import threading
+import weakref
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Callable, Optional
+
+# Bibliotecas externas com logs verbosos
+QUIET_LOGGERS = ('httpx', 'urllib3', 'gradio_client', 'PIL')
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_config_key: Optional[tuple] = None
+_setup_lock = threading.Lock()
+_aggregators: "weakref.WeakSet[LogAggregator]" = weakref.WeakSet()
+
+
+def configure_logging(config) -> Optional[QueueListener]:
+    """Logging assíncrono do processo a partir de um LoggingConfig
+
+    O root recebe apenas um QueueHandler: quem loga só enfileira o registro.
+    Uma thread (QueueListener) formata e grava no console e no arquivo com
+    rotação (max_file_size / backup_count). Chamadas seguintes com a mesma
+    configuração reaproveitam o listener; uma configuração diferente para
+    o listener atual e monta outro.
+    """
+    global _listener, _queue_handler, _config_key
+    key = (config.level.upper(), config.format, config.file_path, config.max_file_size, config.backup_count)
+    with _setup_lock:
+        if _listener is not None:
+            if key == _config_key:
+                return _listener
+            _stop_listener()
+
+        formatter = logging.Formatter(config.format)
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if config.file_path:
+            # delay: o arquivo só é aberto no primeiro registro
+            handlers.append(RotatingFileHandler(
+                config.file_path,
+                maxBytes=config.max_file_size,
+                backupCount=config.backup_count,
+                encoding='utf-8',
+                delay=True
+            ))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = QueueHandler(log_queue)
+        root = logging.getLogger()
+        root.addHandler(_queue_handler)
+        root.setLevel(config.level.upper())
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        _config_key = key
+        return _listener
+
+
+def _stop_listener() -> None:
+    """Esvazia a fila e remove o handler do root (chamar com _setup_lock)"""
+    global _listener, _queue_handler, _config_key
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+    _config_key = None
+
+
+def shutdown_logging() -> None:
+    """Publica os contadores pendentes e esvazia a fila (chamado na saída do processo)"""
+    for aggregator in list(_aggregators):
+        aggregator.flush()
+
+    with _setup_lock:
+        _stop_listener()
+
+
+def _reset_after_fork() -> None:
+    """Processos filhos (workers do lote) não herdam a thread do listener
+
+    Sem ela a fila herdada nunca seria esvaziada: o filho passa a gravar
+    direto no stderr. O arquivo fica só com o processo principal, já que a
+    rotação não é segura entre processos.
+    """
+    global _listener, _queue_handler, _config_key
+    if _queue_handler is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    handler = logging.StreamHandler(sys.stderr)
+    if _listener is not None and _listener.handlers:
+        handler.setFormatter(_listener.handlers[0].formatter)
+    root.addHandler(handler)
+    _listener = None
+    _queue_handler = None
+    _config_key = None
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class LogAggregator:
+    """Contador de um evento por imagem com resumo periódico
+
+    Cada ocorrência vai para DEBUG (só formatada se DEBUG estiver ativo);
+    em INFO sai uma linha com o total a cada interval segundos, em vez de
+    uma escrita por imagem.
+    """
+
+    def __init__(self, logger: logging.Logger, event: str, interval: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.logger = logger
+        self.event = event
+        self.interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.total = 0
+        self._pending = 0
+        self._window_start = clock()
+        _aggregators.add(self)
+
+    def record(self, message: str = "", *args) -> None:
+        """Conta uma ocorrência; message/args seguem o formato lazy do logging"""
+        if message and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("%s: " + message, self.event, *args)
+
+        with self._lock:
+            self.total += 1
+            self._pending += 1
+            now = self._clock()
+            if now - self._window_start < self.interval:
+                return
+            pending, elapsed = self._take(now)
+        self._report(pending, elapsed)
+
+    def add(self, count: int) -> None:
+        """Soma ocorrências contadas em outro lugar (ex.: workers do lote)"""
+        if count <= 0:
+            return
+        with self._lock:
+            self.total += count
+            self._pending += count
+            now = self._clock()
+            if now - self._window_start < self.interval:
+                return
+            pending, elapsed = self._take(now)
+        self._report(pending, elapsed)
+
+    def drain(self) -> int:
+        """Retira as ocorrências ainda não resumidas, sem logar (para repassar a outro agregador)"""
+        with self._lock:
+            pending = self._pending
+            self.total -= pending
+            self._take(self._clock())
+        return pending
+
+    def flush(self) -> None:
+        """Publica as ocorrências ainda não resumidas"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, elapsed = self._take(self._clock())
+        self._report(pending, elapsed)
+
+    def _take(self, now: float) -> tuple[int, float]:
+        pending, elapsed = self._pending, now - self._window_start
+        self._pending = 0
+        self._window_start = now
+        return pending, elapsed
+
+    def _report(self, pending: int, elapsed: float) -> None:
+        self.logger.info("%s: %d em %.1fs (total %d)", self.event, pending, elapsed, self.total)
@@ -0,0 +1,31 @@
+"""Background Cache - Infrastructure Layer"""
+import os
+from typing import Optional
+from PIL import Image
+
+from infrastructure.lru_cache import LRUCache
+
+
+class BackgroundCache(LRUCache):
+    """Cache LRU de backgrounds já ajustados ao canvas
+
+    A chave combina caminho, mtime e tamanho do canvas, de forma que um
+    arquivo alterado em disco ou um canvas diferente geram entradas novas.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        super().__init__(max_entries, label="Background")
+
+    def make_key(self, background: Image.Image, canvas_size: tuple[int, int]) -> Optional[tuple]:
+        """Gera chave do cache a partir do arquivo de origem do background"""
+        path = getattr(background, 'filename', None)
+        if not path:
+            # Imagens em memória não têm identidade estável
+            return None
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        return (os.path.abspath(path), mtime, tuple(canvas_size))
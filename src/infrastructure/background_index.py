@@ -0,0 +1,183 @@
+"""Background Index - Infrastructure Layer"""
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+from PIL import Image
+
+from domain.entities import BackgroundInfo
+
+BACKGROUND_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+class BackgroundIndex:
+    """Índice persistido dos backgrounds disponíveis
+
+    Um arquivo lateral (index.json) guarda, por background, dimensões,
+    tamanho, mtime, hash do conteúdo e o nome de uma miniatura JPEG gerada
+    na pasta de previews. Cada atualização é uma única passada de stat na
+    pasta: só arquivos novos ou com tamanho/mtime alterados são abertos.
+    As miniaturas são nomeadas pelo hash, então renomear um background
+    reaproveita a miniatura existente.
+    """
+
+    FILENAME = "index.json"
+    VERSION = 1
+
+    def __init__(self, backgrounds_dir: str, index_dir: str = ".cache/background_index",
+                 preview_size: int = 256):
+        self.backgrounds_dir = Path(backgrounds_dir)
+        self.index_dir = Path(index_dir)
+        self.previews_dir = self.index_dir / "previews"
+        self.path = self.index_dir / self.FILENAME
+        self.preview_size = preview_size
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.entries: dict[str, dict] = {}
+        self.indexed = 0
+        self.reused = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Índice de backgrounds inválido ignorado ({self.path}): {e}")
+            return
+
+        # Miniaturas de outro tamanho são regeneradas
+        if data.get('version') != self.VERSION or data.get('preview_size') != self.preview_size:
+            return
+        self.entries = data.get('entries', {})
+
+    def _save(self) -> None:
+        """Grava o índice de forma atômica (arquivo temporário + rename)"""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        data = {'version': self.VERSION, 'preview_size': self.preview_size, 'entries': self.entries}
+        fd, temp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def preview_path(self, digest: str) -> Path:
+        """Caminho da miniatura de um background pelo hash do conteúdo"""
+        return self.previews_dir / f"{digest}.jpg"
+
+    def _index_file(self, path: Path, stat: os.stat_result) -> dict:
+        """Abre o background uma vez: hash, dimensões e miniatura"""
+        data = path.read_bytes()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        preview = self.preview_path(digest)
+
+        with Image.open(path) as image:
+            dimensions = image.size
+            if not preview.exists():
+                image.draft('RGB', (self.preview_size, self.preview_size))
+                thumbnail = image.convert('RGB')
+                thumbnail.thumbnail((self.preview_size, self.preview_size), Image.Resampling.LANCZOS)
+                self.previews_dir.mkdir(parents=True, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=self.previews_dir, suffix=".tmp")
+                os.close(fd)
+                try:
+                    thumbnail.save(temp_path, 'JPEG', quality=85, optimize=True)
+                    os.replace(temp_path, preview)
+                except Exception:
+                    if os.path.exists(temp_path):
+                        os.unlink(temp_path)
+                    raise
+
+        return {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'digest': digest,
+            'dimensions': list(dimensions)
+        }
+
+    def refresh(self) -> list[BackgroundInfo]:
+        """Atualiza o índice pela pasta e retorna os backgrounds (ordenados por nome)"""
+        with self._lock:
+            if not self.backgrounds_dir.is_dir():
+                self.logger.warning(f"Pasta {self.backgrounds_dir} não encontrada")
+                return []
+
+            changed = False
+            entries = {}
+            with os.scandir(self.backgrounds_dir) as scan:
+                for dir_entry in scan:
+                    if not dir_entry.name.lower().endswith(BACKGROUND_EXTENSIONS) or not dir_entry.is_file():
+                        continue
+                    stat = dir_entry.stat()
+                    cached = self.entries.get(dir_entry.name)
+                    if (cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns
+                            and self.preview_path(cached['digest']).exists()):
+                        entries[dir_entry.name] = cached
+                        self.reused += 1
+                        continue
+
+                    try:
+                        entries[dir_entry.name] = self._index_file(Path(dir_entry.path), stat)
+                        self.indexed += 1
+                        changed = True
+                    except Exception as e:
+                        self.logger.warning(f"Erro ao indexar {dir_entry.name}: {e}")
+
+            if set(entries) != set(self.entries):
+                changed = True
+            if changed:
+                self._remove_orphan_previews(entries)
+                self.entries = entries
+                try:
+                    self._save()
+                except OSError as e:
+                    self.logger.warning(f"Erro ao gravar índice de backgrounds: {e}")
+
+            return [self._info(filename, entry) for filename, entry in sorted(entries.items())]
+
+    def _info(self, filename: str, entry: dict) -> BackgroundInfo:
+        return BackgroundInfo(
+            filename=filename,
+            path=str(self.backgrounds_dir / filename),
+            thumbnail_path=str(self.preview_path(entry['digest'])),
+            dimensions=tuple(entry['dimensions']),
+            mtime_ns=entry['mtime_ns'],
+            digest=entry['digest']
+        )
+
+    def _remove_orphan_previews(self, entries: dict[str, dict]) -> None:
+        """Apaga miniaturas que nenhum background atual referencia"""
+        active = {entry['digest'] for entry in entries.values()}
+        for entry in self.entries.values():
+            if entry['digest'] in active:
+                continue
+            try:
+                self.preview_path(entry['digest']).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.warning(f"Erro ao remover miniatura órfã: {e}")
+
+    def get(self, filename: str) -> Optional[BackgroundInfo]:
+        """Background indexado pelo nome do arquivo (sem nova passada na pasta)"""
+        with self._lock:
+            entry = self.entries.get(filename)
+            return self._info(filename, entry) if entry else None
+
+    def stats(self) -> dict:
+        """Backgrounds indexados e quantos foram reabertos/reaproveitados"""
+        return {
+            'entries': len(self.entries),
+            'indexed': self.indexed,
+            'reused': self.reused,
+            'index_path': str(self.path)
+        }
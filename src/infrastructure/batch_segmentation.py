@@ -0,0 +1,90 @@
+"""Batch Segmentation - Infrastructure Layer"""
+import logging
+import numpy as np
+from PIL import Image
+
+from infrastructure.rembg_sessions import RembgSessionRegistry, get_session_registry, resolve_model
+
+# Entrada de cada modelo: (lado do tensor, média, desvio), os mesmos valores
+# passados a normalize() no predict de cada sessão do rembg (U2net/Silueta/Dis)
+MODEL_INPUTS = {
+    "u2net": (320, (0.485, 0.456, 0.406), (0.229, 0.224, 0.225)),
+    "u2netp": (320, (0.485, 0.456, 0.406), (0.229, 0.224, 0.225)),
+    "silueta": (320, (0.485, 0.456, 0.406), (0.229, 0.224, 0.225)),
+    "isnet-general-use": (1024, (0.485, 0.456, 0.406), (1.0, 1.0, 1.0)),
+}
+
+
+class BatchSegmenter:
+    """Remoção de fundo local com inferência em lotes na sessão ONNX do rembg
+
+    As imagens são pré-processadas para um único tensor (N, 3, S, S) e a
+    sessão roda uma vez por lote; as máscaras são aplicadas direto sobre as
+    imagens decodificadas. O pré e pós-processamento seguem o rembg
+    (resize LANCZOS, normalização por modelo, máscara min-max). Se o modelo
+    não aceitar lotes, cai para uma inferência por imagem no mesmo caminho.
+    """
+
+    def __init__(self, model: str = "u2net", batch_size: int = 4,
+                 session_registry: RembgSessionRegistry = None):
+        self.model = resolve_model(model)
+        self.batch_size = max(1, batch_size)
+        self.sessions = session_registry or get_session_registry()
+        self.logger = logging.getLogger(__name__)
+        self.side, mean, std = MODEL_INPUTS[self.model]
+        self._mean = np.array(mean, dtype=np.float32)
+        self._std = np.array(std, dtype=np.float32)
+        self._batching_supported = True
+
+    def preprocess(self, image: Image.Image) -> np.ndarray:
+        """Tensor (3, S, S) normalizado de uma imagem"""
+        resized = image.convert('RGB').resize((self.side, self.side), Image.Resampling.LANCZOS)
+        array = np.asarray(resized, dtype=np.float32)
+        array /= max(float(array.max()), 1e-6)
+        array -= self._mean
+        array /= self._std
+        return array.transpose(2, 0, 1)
+
+    def masks_from_output(self, output: np.ndarray, sizes: list[tuple[int, int]]) -> list[Image.Image]:
+        """Máscaras 'L' no tamanho original a partir da saída (N, 1, S, S)"""
+        masks = []
+        for prediction, size in zip(output[:, 0], sizes):
+            low, high = float(prediction.min()), float(prediction.max())
+            scaled = (prediction - low) / max(high - low, 1e-6)
+            mask = Image.fromarray((scaled * 255).astype(np.uint8), 'L')
+            masks.append(mask.resize(size, Image.Resampling.LANCZOS))
+        return masks
+
+    @staticmethod
+    def apply_mask(image: Image.Image, mask: Image.Image) -> Image.Image:
+        """Recorte como o naive_cutout do rembg (RGBA com alpha = máscara)"""
+        image = image.convert('RGBA')
+        return Image.composite(image, Image.new('RGBA', image.size, 0), mask)
+
+    def _run(self, session, batch: np.ndarray) -> np.ndarray:
+        inner = session.inner_session
+        feed = {inner.get_inputs()[0].name: batch}
+        if self._batching_supported or len(batch) == 1:
+            try:
+                return inner.run(None, feed)[0]
+            except Exception as e:
+                if len(batch) == 1:
+                    raise
+                # Modelo exportado com lote fixo em 1
+                self._batching_supported = False
+                self.logger.warning(f"Modelo '{self.model}' não aceita lotes, inferindo por imagem: {e}")
+
+        name = inner.get_inputs()[0].name
+        return np.concatenate([inner.run(None, {name: batch[i:i + 1]})[0] for i in range(len(batch))])
+
+    def remove(self, images: list[Image.Image]) -> list[Image.Image]:
+        """Remove o fundo das imagens, batch_size por inferência"""
+        results = []
+        with self.sessions.session(self.model) as session:
+            for start in range(0, len(images), self.batch_size):
+                chunk = images[start:start + self.batch_size]
+                batch = np.stack([self.preprocess(image) for image in chunk])
+                output = self._run(session, batch)
+                masks = self.masks_from_output(output, [image.size for image in chunk])
+                results.extend(self.apply_mask(image, mask) for image, mask in zip(chunk, masks))
+        return results
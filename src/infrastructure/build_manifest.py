@@ -0,0 +1,139 @@
+"""Build Manifest - Infrastructure Layer"""
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterable, Optional
+
+from domain.entities import BatchWorkItem
+from domain.export_profiles import ExportProfile
+
+
+class BuildManifest:
+    """Manifesto das thumbnails geradas, gravado na pasta de saída
+
+    Para cada saída guarda uma impressão digital das entradas (hash do
+    conteúdo do produto e do background, Transform, tamanho do canvas e
+    perfil de export). Um novo lote só recompõe as saídas cuja impressão
+    mudou. O hash de cada arquivo de entrada é reaproveitado enquanto
+    tamanho e mtime não mudarem.
+    """
+
+    FILENAME = ".build_manifest.json"
+    VERSION = 1
+
+    def __init__(self, output_dir: str):
+        self.path = Path(output_dir) / self.FILENAME
+        self.logger = logging.getLogger(__name__)
+        self.outputs: dict[str, dict] = {}
+        self.inputs: dict[str, dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Manifesto inválido ignorado ({self.path}): {e}")
+            return
+
+        if data.get('version') != self.VERSION:
+            return
+        self.outputs = data.get('outputs', {})
+        self.inputs = data.get('inputs', {})
+
+    def save(self) -> None:
+        """Grava o manifesto de forma atômica (arquivo temporário + rename)"""
+        # Manter só o hash das entradas ainda referenciadas
+        referenced = {path for entry in self.outputs.values() for path in entry.get('sources', ())}
+        self.inputs = {path: info for path, info in self.inputs.items() if path in referenced}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'version': self.VERSION, 'outputs': self.outputs, 'inputs': self.inputs}
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def file_digest(self, path: str) -> str:
+        """Hash do conteúdo do arquivo (recalculado só se tamanho/mtime mudarem)"""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        cached = self.inputs.get(key)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['digest']
+
+        hasher = hashlib.blake2b(digest_size=16)
+        with open(key, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        self.inputs[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+        return digest
+
+    def fingerprint(self, item: BatchWorkItem, canvas_size: tuple[int, int], profile: ExportProfile,
+                    options: Optional[dict] = None) -> str:
+        """Impressão digital de todas as entradas que definem uma saída
+
+        options: demais opções do lote que alteram a saída (ex.: recorte ao alpha)
+        """
+        payload = {
+            'product': self.file_digest(item.product_path),
+            'background': self.file_digest(item.background_path),
+            'transform': asdict(item.transform),
+            'canvas_size': list(canvas_size),
+            'profile': [profile.format, profile.extension, profile.options, profile.quantize_colors],
+            'options': options or {}
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def current_output(self, output_name: str, fingerprint: str) -> Optional[str]:
+        """Caminho da saída se ela existe e foi gerada com as mesmas entradas"""
+        entry = self.outputs.get(output_name)
+        if not entry or entry['fingerprint'] != fingerprint:
+            return None
+        if not os.path.exists(entry['file']):
+            return None
+        return entry['file']
+
+    def record(self, item: BatchWorkItem, fingerprint: str, file_path: str) -> None:
+        """Registra saída gerada; remove o arquivo anterior se o nome mudou (ex.: outro formato)"""
+        previous = self.outputs.get(item.output_name)
+        if previous and previous['file'] != file_path:
+            self._remove_file(previous['file'])
+
+        self.outputs[item.output_name] = {
+            'fingerprint': fingerprint,
+            'file': file_path,
+            'sources': [os.path.abspath(item.product_path), os.path.abspath(item.background_path)]
+        }
+
+    def prune(self, active_names: Iterable[str]) -> list[str]:
+        """Remove saídas órfãs (fora do lote atual) e retorna os arquivos apagados"""
+        active = set(active_names)
+        removed = []
+        for output_name in [name for name in self.outputs if name not in active]:
+            file_path = self.outputs.pop(output_name)['file']
+            if self._remove_file(file_path):
+                removed.append(file_path)
+        return removed
+
+    def _remove_file(self, file_path: str) -> bool:
+        try:
+            os.unlink(file_path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            self.logger.warning(f"Erro ao remover saída órfã {file_path}: {e}")
+            return False
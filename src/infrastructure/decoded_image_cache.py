@@ -0,0 +1,162 @@
+"""Decoded Image Cache - Infrastructure Layer"""
+import io
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Hashable
+from PIL import Image
+
+
+class _CacheEntry:
+    """Imagem decodificada e miniaturas derivadas de um mesmo conteúdo"""
+
+    def __init__(self):
+        self.image: Optional[Image.Image] = None
+        self.thumbnails: dict[tuple[int, int], Image.Image] = {}
+
+    @property
+    def nbytes(self) -> int:
+        images = list(self.thumbnails.values())
+        if self.image is not None:
+            images.append(self.image)
+        return sum(image_nbytes(image) for image in images)
+
+
+def image_nbytes(image: Image.Image) -> int:
+    """Memória aproximada ocupada pelos pixels decodificados"""
+    return image.width * image.height * len(image.getbands())
+
+
+class DecodedImageCache:
+    """Cache de imagens decodificadas (e miniaturas) limitado por bytes
+
+    Cada upload é identificado pelo file id; o hash do conteúdo é calculado
+    uma única vez por file id e endereça a entrada, de modo que reenvios do
+    mesmo arquivo compartilham a decodificação. Entradas menos usadas são
+    removidas quando o total passa de max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._digests: dict[Hashable, str] = {}
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def image(self, file_id: Hashable, read_bytes: Callable[[], bytes]) -> Image.Image:
+        """Imagem decodificada (somente leitura: copie antes de alterar)"""
+        digest, data = self._digest(file_id, read_bytes)
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry.image is not None:
+                self._touch(digest)
+                return entry.image
+
+        image = self._decode(data if data is not None else read_bytes())
+        self._store(digest, lambda entry: setattr(entry, 'image', image))
+        return image
+
+    def thumbnail(self, file_id: Hashable, read_bytes: Callable[[], bytes],
+                  size: tuple[int, int] = (200, 200)) -> Image.Image:
+        """Miniatura para exibição (não mantém a imagem inteira em cache)"""
+        size = tuple(size)
+        digest, data = self._digest(file_id, read_bytes)
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and size in entry.thumbnails:
+                self._touch(digest)
+                return entry.thumbnails[size]
+            source = entry.image if entry is not None else None
+
+        if source is not None:
+            thumbnail = source.copy()
+        else:
+            thumbnail = Image.open(io.BytesIO(data if data is not None else read_bytes()))
+            # JPEG: decodificar já reduzido
+            thumbnail.draft('RGB', size)
+        thumbnail.thumbnail(size, Image.Resampling.LANCZOS)
+
+        self._store(digest, lambda entry: entry.thumbnails.__setitem__(size, thumbnail))
+        return thumbnail
+
+    def _digest(self, file_id: Hashable, read_bytes: Callable[[], bytes]) -> tuple[str, Optional[bytes]]:
+        """Hash do conteúdo, calculado só na primeira vez que o file id aparece"""
+        with self._lock:
+            digest = self._digests.get(file_id)
+        if digest is not None:
+            return digest, None
+
+        data = read_bytes()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        with self._lock:
+            self._digests[file_id] = digest
+        return digest, data
+
+    def _decode(self, data: bytes) -> Image.Image:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image
+
+    def _store(self, digest: str, update: Callable[[_CacheEntry], None]) -> None:
+        with self._lock:
+            self.misses += 1
+            entry = self._entries.get(digest)
+            if entry is None:
+                entry = self._entries[digest] = _CacheEntry()
+
+            previous = entry.nbytes
+            update(entry)
+            self._total_bytes += entry.nbytes - previous
+            self._touch(digest, hit=False)
+            self._evict(keep=digest)
+
+    def _touch(self, digest: str, hit: bool = True) -> None:
+        self._entries.move_to_end(digest)
+        if hit:
+            self.hits += 1
+
+    def _evict(self, keep: str) -> None:
+        """Remove entradas menos usadas até voltar ao limite (nunca a atual)"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            digest = next(iter(self._entries))
+            if digest == keep:
+                self._entries.move_to_end(digest)
+                continue
+            entry = self._entries.pop(digest)
+            self._total_bytes -= entry.nbytes
+            self.evictions += 1
+            self.logger.debug(f"Imagem decodificada removida do cache: {digest}")
+
+    def forget(self, active_ids) -> None:
+        """Descarta file ids que não estão mais entre os uploads ativos"""
+        active = set(active_ids)
+        with self._lock:
+            for file_id in list(self._digests):
+                if file_id not in active:
+                    del self._digests[file_id]
+
+    def clear(self) -> None:
+        """Esvazia o cache"""
+        with self._lock:
+            self._digests.clear()
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """Retorna contadores de uso do cache"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_mb': round(self._total_bytes / (1024 * 1024), 2),
+                'max_size_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
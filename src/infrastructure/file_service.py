@@ -7,14 +7,21 @@ from PIL import Image
 import uuid
 from datetime import datetime
 
+from domain.export_profiles import get_export_profile, encode_image
+from infrastructure.async_logging import LogAggregator
+
 
 class FileService:
     """Serviço para operações de arquivo"""
     
-    def __init__(self, base_path: str = "."):
+    def __init__(self, base_path: str = ".", log_interval: float = 30.0):
         self.base_path = Path(base_path)
         self.logger = logging.getLogger(__name__)
         
+        # Cargas e gravações por imagem: resumo periódico em vez de um INFO por arquivo
+        self.loads_log = LogAggregator(self.logger, "Imagens carregadas", log_interval)
+        self.saves_log = LogAggregator(self.logger, "Imagens salvas", log_interval)
+        
         # Diretórios padrão
         self.backgrounds_dir = self.base_path / "backgrounds"
         self.products_dir = self.base_path / "produtos-sem-fundo"
@@ -43,21 +50,38 @@ class FileService:
                 return None
             
             image = Image.open(path)
-            self.logger.info(f"Imagem carregada: {file_path} ({image.size})")
+            self.loads_log.record("%s %s", file_path, image.size)
             return image
             
         except Exception as e:
             self.logger.error(f"Erro ao carregar imagem {file_path}: {e}")
             return None
     
-    def save_image(self, image: Image.Image, file_path: str, quality: int = 95) -> bool:
-        """Salva imagem em arquivo"""
+    def save_image(self, image: Image.Image, file_path: str, quality: int = 95,
+                   profile: Optional[str] = None) -> bool:
+        """Salva imagem em arquivo
+
+        Com profile (fast, balanced, smallest, webp, jpeg) a codificação segue
+        o perfil de export e a extensão de file_path precisa ser a do perfil;
+        sem ele, o formato vem da extensão.
+        """
         try:
             path = Path(file_path)
             
             # Criar diretório pai se necessário
             path.parent.mkdir(parents=True, exist_ok=True)
             
+            if profile is not None:
+                export_profile = get_export_profile(profile, quality)
+                suffix = '.jpg' if path.suffix.lower() == '.jpeg' else path.suffix.lower()
+                if suffix != export_profile.extension:
+                    self.logger.error(f"Extensão de {file_path} não corresponde ao perfil {profile} "
+                                      f"({export_profile.extension})")
+                    return False
+                path.write_bytes(encode_image(image, export_profile))
+                self.saves_log.record("%s (perfil %s)", file_path, profile)
+                return True
+            
             # Determinar formato baseado na extensão
             format_map = {
                 '.png': 'PNG',
@@ -87,8 +111,7 @@ class FileService:
             
             # Verificar se arquivo foi criado
             if path.exists():
-                file_size = path.stat().st_size
-                self.logger.info(f"Imagem salva: {file_path} ({file_size} bytes)")
+                self.saves_log.record("%s (%s bytes)", file_path, path.stat().st_size)
                 return True
             else:
                 self.logger.error(f"Falha ao salvar: {file_path}")
@@ -1,55 +1,120 @@
 """Gradio Client - Infrastructure Layer"""
 import os
+import io
+import base64
 import logging
 import tempfile
-from typing import Optional
-from gradio_client import Client
+import threading
+from importlib.util import find_spec
+from typing import Optional, TYPE_CHECKING
 from PIL import Image
 
-# Fallback local para remoção de fundo
-try:
-    from rembg import remove, new_session
-    REMBG_AVAILABLE = True
-except ImportError:
-    REMBG_AVAILABLE = False
+from infrastructure.health import CircuitBreaker, CircuitState, HealthMonitor
+from infrastructure.rembg_sessions import RembgSessionRegistry, get_session_registry, resolve_model
+
+if TYPE_CHECKING:
+    from gradio_client import Client
+    from infrastructure.batch_segmentation import BatchSegmenter
+
+# Fallback local para remoção de fundo. gradio_client, rembg (onnxruntime) e
+# numpy só são importados no primeiro uso: composições em lote não pagam por
+# eles na inicialização do processo.
+REMBG_AVAILABLE = find_spec("rembg") is not None
+remove = None
+
+
+def _rembg_remove():
+    """rembg.remove, importado na primeira remoção local"""
+    global remove
+    if remove is None:
+        from rembg import remove as rembg_remove
+        remove = rembg_remove
+    return remove
+
+# Formatos enviados à API sem recodificação
+PASSTHROUGH_FORMATS = {'PNG': '.png', 'JPEG': '.jpg', 'WEBP': '.webp'}
+
+# Identificador do modelo remoto usado como parte da chave do cache de resultados
+# (o do rembg local é "rembg-<modelo>")
+BRIA_MODEL_ID = "bria-rmbg-1.4"
 
 
 class GradioBackgroundRemovalClient:
     """Cliente para API Gradio BRIA RMBG-1.4"""
     
-    def __init__(self, endpoint: str = "briaai/BRIA-RMBG-1.4"):
+    def __init__(self, endpoint: str = "briaai/BRIA-RMBG-1.4", result_cache=None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, health_ttl: float = 60.0,
+                 spool_dir: Optional[str] = None, rembg_model: str = "u2net",
+                 session_registry: Optional[RembgSessionRegistry] = None, local_batch_size: int = 4):
         self.endpoint = endpoint
         self.client = None
         self.timeout = 60
+        # Sonda de saúde: deve falhar rápido com o Space fora do ar
+        self.probe_timeout = 5.0
         self.logger = logging.getLogger(__name__)
-        self.use_fallback = False
+        self.result_cache = result_cache
+        self._local = threading.local()
+        self._client_lock = threading.Lock()
+        self.spool_dir = spool_dir or self._default_spool_dir()
         
-        # Inicializar sessão rembg se disponível
-        if REMBG_AVAILABLE:
-            try:
-                self.rembg_session = new_session('u2net')
-                self.logger.info("Fallback local rembg inicializado")
-            except Exception as e:
-                self.logger.warning(f"Erro ao inicializar rembg: {e}")
-                self.rembg_session = None
-        else:
-            self.rembg_session = None
+        # Estado de saúde da API: circuit breaker + sonda com cache
+        self.circuit = circuit_breaker or CircuitBreaker()
+        self.health = HealthMonitor(self._probe, self.circuit, ttl=health_ttl)
+        
+        # Fallback local: sessão rembg compartilhada, carregada no primeiro uso
+        self.rembg_model = resolve_model(rembg_model)
+        self.rembg_model_id = f"rembg-{self.rembg_model}"
+        self.sessions = session_registry or get_session_registry()
+        self.local_batch_size = local_batch_size
+        self._segmenter: Optional["BatchSegmenter"] = None
+    
+    @property
+    def segmenter(self) -> "BatchSegmenter":
+        """Inferência local em lotes (importa numpy no primeiro uso)"""
+        if self._segmenter is None:
+            from infrastructure.batch_segmentation import BatchSegmenter
+            self._segmenter = BatchSegmenter(self.rembg_model, self.local_batch_size, self.sessions)
+        return self._segmenter
     
-    def _get_client(self) -> Client:
+    def _get_client(self) -> "Client":
         """Inicializa cliente Gradio se necessário"""
-        if self.client is None:
-            try:
-                # Usar endpoint do Hugging Face Spaces
-                self.client = Client(self.endpoint)
-                self.logger.info(f"Cliente Gradio conectado: {self.endpoint}")
-            except Exception as e:
-                self.logger.error(f"Erro ao conectar Gradio: {e}")
-                # Ativar fallback imediatamente se não conseguir conectar
-                self.use_fallback = True
-                raise
-        return self.client
+        # Lock evita conexões duplicadas quando várias threads chamam a API
+        with self._client_lock:
+            if self.client is None:
+                try:
+                    from gradio_client import Client
+                    
+                    # Usar endpoint do Hugging Face Spaces
+                    self.client = Client(self.endpoint)
+                    self.logger.info(f"Cliente Gradio conectado: {self.endpoint}")
+                except Exception as e:
+                    self.logger.error(f"Erro ao conectar Gradio: {e}")
+                    raise
+            return self.client
+    
+    @property
+    def use_fallback(self) -> bool:
+        """Indica se as chamadas estão sendo desviadas para o rembg local"""
+        return self.circuit.state != CircuitState.CLOSED
+    
+    @use_fallback.setter
+    def use_fallback(self, value: bool) -> None:
+        if value:
+            self.circuit.trip("fallback_requested")
+        else:
+            self.circuit.reset()
     
-    def predict(self, image_path: str) -> Optional[str]:
+    def _remote_allowed(self) -> bool:
+        """Decide sem bloquear se a API remota deve ser usada"""
+        if self.circuit.allow_request():
+            return True
+        
+        # Backoff expirado: sonda em segundo plano decide se o circuito fecha
+        if self.circuit.state == CircuitState.HALF_OPEN:
+            self.health.refresh_async()
+        return False
+    
+    def predict(self, image_path: str, timeout: Optional[float] = None) -> Optional[str]:
         """Chama API Gradio para remoção de fundo"""
         try:
             client = self._get_client()
@@ -61,10 +126,18 @@ class GradioBackgroundRemovalClient:
             self.logger.debug(f"Enviando imagem para Gradio: {image_path}")
             
             # Chamar API com timeout
-            result = client.predict(
-                image_path,
-                api_name="/predict"
-            )
+            if timeout is None:
+                result = client.predict(
+                    image_path,
+                    api_name="/predict"
+                )
+            else:
+                job = client.submit(image_path, api_name="/predict")
+                try:
+                    result = job.result(timeout=timeout)
+                except TimeoutError:
+                    job.cancel()
+                    raise
             
             if result:
                 self.logger.debug(f"Resultado recebido: {result}")
@@ -79,30 +152,72 @@ class GradioBackgroundRemovalClient:
                 self.logger.debug(f"API Gradio indisponível: {e}")
             else:
                 self.logger.error(f"Erro na chamada Gradio: {e}")
-            # Ativar fallback para próximas chamadas
-            self.use_fallback = True
             raise
     
+    @staticmethod
+    def _default_spool_dir() -> Optional[str]:
+        """Usa tmpfs (/dev/shm) para arquivos de transporte quando disponível"""
+        shm = "/dev/shm"
+        if os.path.isdir(shm) and os.access(shm, os.W_OK):
+            return shm
+        return None
+    
+    def _prepare_transport(self, image: Image.Image, encoded: Optional[bytes] = None) -> tuple[str, bool]:
+        """Retorna caminho a enviar à API e se é um arquivo temporário a remover
+        
+        O cliente Gradio exige um caminho: arquivos originais são enviados
+        como estão; bytes já codificados vão para o spool sem recodificação;
+        só imagens sem origem codificada são convertidas para PNG.
+        """
+        suffix = PASSTHROUGH_FORMATS.get(getattr(image, 'format', None))
+        source_path = getattr(image, 'filename', None)
+        if suffix and source_path and os.path.exists(source_path):
+            return source_path, False
+        
+        if encoded is None or suffix is None:
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG', compress_level=1)
+            encoded, suffix = buffer.getvalue(), '.png'
+        
+        with tempfile.NamedTemporaryFile(
+            dir=self.spool_dir, prefix='thumbnail_temp_', suffix=suffix, delete=False
+        ) as f:
+            f.write(encoded)
+            return f.name, True
+    
+    @staticmethod
+    def _decode_prediction(result) -> tuple[Optional[Image.Image], Optional[str]]:
+        """Decodifica resposta da API em memória; retorna imagem e arquivo a remover"""
+        if isinstance(result, (list, tuple)):
+            result = result[0] if result else None
+        
+        if isinstance(result, bytes):
+            data, result_path = result, None
+        elif isinstance(result, str) and result.startswith('data:image'):
+            data, result_path = base64.b64decode(result.split(',', 1)[1]), None
+        elif isinstance(result, str) and os.path.exists(result):
+            with open(result, 'rb') as f:
+                data = f.read()
+            result_path = result
+        else:
+            return None, None
+        
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image, result_path
+    
     def _remove_background_local(self, image: Image.Image) -> Optional[Image.Image]:
         """Remove fundo usando rembg local como fallback"""
-        if not self.rembg_session:
+        if not REMBG_AVAILABLE:
             self.logger.error("Rembg não disponível para fallback")
             return None
             
         try:
-            self.logger.debug("Usando fallback local rembg")
+            self.logger.debug(f"Usando fallback local rembg ({self.rembg_model})")
             
-            # Converter para bytes
-            import io
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            # Remover fundo
-            output = remove(img_byte_arr, session=self.rembg_session)
-            
-            # Converter de volta para PIL
-            result_image = Image.open(io.BytesIO(output))
+            # rembg aceita e devolve PIL diretamente (sem PNG intermediário)
+            with self.sessions.session(self.rembg_model) as session:
+                result_image = _rembg_remove()(image, session=session)
             
             self.logger.debug("Remoção de fundo local concluída")
             return result_image
@@ -111,29 +226,156 @@ class GradioBackgroundRemovalClient:
             self.logger.error(f"Erro no fallback local: {e}")
             return None
     
-    def remove_background(self, image: Image.Image) -> Optional[Image.Image]:
-        """Remove fundo de uma imagem PIL com fallback local"""
+    def remove_backgrounds_local(self, images: list[Image.Image], matte: bool = False
+                                 ) -> list[tuple[Optional[Image.Image], Optional[str]]]:
+        """Remove fundo de várias imagens localmente, em lotes de inferência
+        
+        Retorna (imagem, origem) na ordem de entrada; origem é cache_hit ou
+        fallback_local (None quando a remoção falhou). Com matte=True
+        retorna e persiste só as máscaras alpha.
+        """
+        results: list[tuple[Optional[Image.Image], Optional[str]]] = [(None, None)] * len(images)
+        digests = [None] * len(images)
+        missing = []
+        for index, image in enumerate(images):
+            if self.result_cache is not None:
+                digests[index] = self.result_cache.digest(image)
+                lookup = self.result_cache.get_matte if matte else self.result_cache.get
+                cached = lookup(digests[index], (self.rembg_model_id, BRIA_MODEL_ID))
+                if cached is not None:
+                    results[index] = (cached[0], "cache_hit")
+                    continue
+            missing.append(index)
+        
+        if not missing:
+            return results
+        if not REMBG_AVAILABLE:
+            self.logger.error("Rembg não disponível para fallback")
+            return results
+        
+        try:
+            removed = self.segmenter.remove([images[index] for index in missing])
+        except Exception as e:
+            self.logger.error(f"Erro no fallback local em lote: {e}")
+            return results
+        
+        for index, result_image in zip(missing, removed):
+            if matte:
+                result_image = self.extract_matte(result_image, images[index].size)
+            results[index] = (result_image, "fallback_local")
+            if digests[index] is None:
+                continue
+            if matte:
+                self.result_cache.put_matte(digests[index], result_image, self.rembg_model_id)
+            else:
+                self.result_cache.put(digests[index], result_image, self.rembg_model_id)
+        return results
+    
+    @property
+    def last_source(self) -> Optional[str]:
+        """Origem do último resultado nesta thread: cache_hit, success ou fallback_local"""
+        return getattr(self._local, 'last_source', None)
+    
+    def remove_background(self, image: Image.Image, timeout: Optional[float] = None,
+                          sticky_fallback: bool = True, encoded: Optional[bytes] = None) -> Optional[Image.Image]:
+        """Remove fundo de uma imagem PIL com fallback local
+        
+        Com sticky_fallback=False uma falha ou timeout da API usa o rembg
+        local apenas para esta imagem, sem desviar as chamadas seguintes.
+        encoded são os bytes originais da imagem, enviados sem recodificação.
+        """
+        self._local.last_source = None
+        
+        # Consultar cache de resultados antes de qualquer chamada de rede
+        digest = None
+        if self.result_cache is not None:
+            digest = self.result_cache.digest(image)
+            cached = self.result_cache.get(digest, self._cached_model_ids())
+            if cached is not None:
+                result_image, model_id = cached
+                self.logger.debug(f"Resultado em cache ({model_id})")
+                self._local.last_source = "cache_hit"
+                return result_image
+        
+        result_image = self._remove_background_uncached(image, timeout, sticky_fallback, encoded)
+        
+        if result_image is not None and digest is not None:
+            model_id = self.rembg_model_id if self._local.last_source == "fallback_local" else BRIA_MODEL_ID
+            self.result_cache.put(digest, result_image, model_id)
+        
+        return result_image
+    
+    def _cached_model_ids(self) -> tuple[str, ...]:
+        """Modelos aceitos na consulta ao cache, em ordem de preferência
+        
+        Resultado do rembg é só um substituto: com a API liberada ele não é
+        servido, e o resultado do BRIA grava a entrada preferida.
+        """
+        if self.circuit.allow_request():
+            return (BRIA_MODEL_ID,)
+        return (BRIA_MODEL_ID, self.rembg_model_id)
+    
+    def remove_matte(self, image: Image.Image, timeout: Optional[float] = None,
+                     sticky_fallback: bool = True, encoded: Optional[bytes] = None,
+                     source: Optional[str] = None) -> Optional[Image.Image]:
+        """Como remove_background, mas retorna e persiste só a máscara alpha ('L')
+        
+        source é uma referência à original gravada junto da máscara no cache.
+        """
+        self._local.last_source = None
+        
+        digest = None
+        if self.result_cache is not None:
+            digest = self.result_cache.digest(image)
+            cached = self.result_cache.get_matte(digest, self._cached_model_ids())
+            if cached is not None:
+                self.logger.debug(f"Máscara em cache ({cached[1]})")
+                self._local.last_source = "cache_hit"
+                return cached[0]
+        
+        result_image = self._remove_background_uncached(image, timeout, sticky_fallback, encoded)
+        if result_image is None:
+            return None
+        
+        matte = self.extract_matte(result_image, image.size)
+        if digest is not None:
+            model_id = self.rembg_model_id if self._local.last_source == "fallback_local" else BRIA_MODEL_ID
+            self.result_cache.put_matte(digest, matte, model_id, source)
+        return matte
+    
+    @staticmethod
+    def extract_matte(result_image: Image.Image, size: tuple[int, int]) -> Image.Image:
+        """Canal alpha do recorte, no tamanho da imagem original"""
+        if 'A' in result_image.getbands():
+            matte = result_image.getchannel('A')
+        else:
+            matte = Image.new('L', result_image.size, 255)
+        if matte.size != tuple(size):
+            matte = matte.resize(size, Image.Resampling.BILINEAR)
+        return matte
+    
+    def _remove_background_uncached(self, image: Image.Image, timeout: Optional[float] = None,
+                                    sticky_fallback: bool = True,
+                                    encoded: Optional[bytes] = None) -> Optional[Image.Image]:
+        """Remove fundo via API Gradio, com fallback para rembg local"""
         temp_input = None
         temp_output = None
         
-        # Sempre tentar API Gradio primeiro se estiver disponível
-        if self.health_check():
-            self.use_fallback = False  # Reset flag se API estiver disponível
-            
-        if not self.use_fallback:
+        # Tentar API Gradio primeiro enquanto o circuito estiver fechado
+        if self._remote_allowed():
             try:
-                # Salvar imagem temporariamente
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
-                    temp_input = f.name
-                    image.save(temp_input, 'PNG')
+                # Caminho de envio (original, spool em tmpfs ou PNG de último caso)
+                input_path, is_temp = self._prepare_transport(image, encoded)
+                if is_temp:
+                    temp_input = input_path
                 
                 # Chamar API
-                result_path = self.predict(temp_input)
+                result = self.predict(input_path, timeout)
+                result_image, temp_output = self._decode_prediction(result)
                 
-                if result_path and os.path.exists(result_path):
-                    # Carregar resultado
-                    result_image = Image.open(result_path)
-                    temp_output = result_path
+                if result_image is not None:
+                    self.circuit.record_success()
+                    self._local.last_source = "success"
                     return result_image
                 else:
                     raise Exception("API retornou resultado vazio")
@@ -144,7 +386,10 @@ class GradioBackgroundRemovalClient:
                     self.logger.debug(f"API Gradio indisponível, usando fallback local")
                 else:
                     self.logger.warning(f"API Gradio falhou: {e}")
-                self.use_fallback = True  # Ativar fallback para próximas chamadas
+                if sticky_fallback:
+                    self.circuit.trip("request_failed")  # Ativar fallback para próximas chamadas
+                else:
+                    self.circuit.record_failure()
                 
             finally:
                 # Limpar arquivos temporários
@@ -156,22 +401,53 @@ class GradioBackgroundRemovalClient:
                             self.logger.warning(f"Erro ao limpar arquivo temporário {temp_file}: {e}")
         
         # Usar fallback local
-        return self._remove_background_local(image)
+        result_image = self._remove_background_local(image)
+        if result_image is not None:
+            self._local.last_source = "fallback_local"
+        return result_image
     
-    def health_check(self) -> bool:
-        """Verifica se API está disponível"""
+    def _probe(self) -> bool:
+        """Sonda de conectividade: requisição leve ao Space, com timeout curto
+        
+        Ter um Client em cache não diz nada sobre a API agora; sem uma
+        requisição real, o circuito fecharia e a próxima remoção pagaria o
+        timeout inteiro.
+        """
         try:
             client = self._get_client()
             
-            # Se chegou até aqui, o cliente foi criado com sucesso
-            # Isso significa que a API está disponível
-            # Verificar se o cliente tem os métodos necessários
-            if hasattr(client, 'predict'):
+            import httpx
+            
+            response = httpx.get(
+                f"{client.src.rstrip('/')}/config",
+                headers=getattr(client, 'headers', None),
+                timeout=self.probe_timeout,
+                follow_redirects=True
+            )
+            if response.status_code == 200:
                 return True
-            else:
-                self.logger.warning("Health check falhou - cliente não tem método predict")
-                return False
+            self.logger.warning(f"Health check falhou - HTTP {response.status_code}")
+            return False
                 
         except Exception as e:
             self.logger.error(f"Health check falhou: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def health_check(self, force: bool = False) -> bool:
+        """Verifica se API está disponível, sem esperar a rede
+
+        Retorna o último estado conhecido; com o cache expirado (ou o
+        circuito em half_open) a sonda roda em segundo plano e vale para as
+        próximas chamadas. force=True executa a sonda de forma síncrona.
+        """
+        if force:
+            return self.health.check(force=True) and self.circuit.allow_request()
+        return self.health.is_available()
+    
+    def is_available(self) -> bool:
+        """Último estado conhecido da API, sem nunca bloquear"""
+        return self.health.is_available()
+    
+    def health_status(self) -> dict:
+        """Estado de saúde e métricas do circuit breaker, sem executar sonda"""
+        return self.health.snapshot()
@@ -0,0 +1,213 @@
+"""Health State - Infrastructure Layer"""
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+
+class CircuitState:
+    """Estados do circuit breaker"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker com backoff exponencial para a API remota
+
+    - closed: requisições liberadas; falhas consecutivas abrem o circuito
+    - open: requisições bloqueadas até o fim do backoff
+    - half_open: backoff expirado, aguardando uma sonda de saúde
+
+    Cada reabertura sem um sucesso real entre elas dobra o backoff,
+    até max_backoff.
+    """
+
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 5.0,
+                 max_backoff: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._backoff_level = 0
+        self._open_until = 0.0
+        self.transitions: dict[str, int] = {}
+        self.history: deque = deque(maxlen=50)
+
+    @property
+    def state(self) -> str:
+        """Estado atual (open passa a half_open quando o backoff expira)"""
+        with self._lock:
+            self._expire_backoff()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Indica se uma requisição remota pode ser feita agora (não bloqueia)"""
+        with self._lock:
+            self._expire_backoff()
+            return self._state == CircuitState.CLOSED
+
+    def record_success(self, reason: str = "request_ok") -> None:
+        """Registra sucesso de uma requisição real"""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._backoff_level = 0
+            self._transition(CircuitState.CLOSED, reason)
+
+    def record_probe_success(self) -> None:
+        """Registra sonda bem-sucedida (fecha o circuito, mas mantém o nível de backoff)"""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._transition(CircuitState.CLOSED, "probe_ok")
+
+    def record_failure(self, reason: str = "request_failed") -> None:
+        """Registra falha; abre o circuito ao atingir o limite"""
+        with self._lock:
+            self._expire_backoff()
+            self._consecutive_failures += 1
+
+            # Após uma reabertura recente, uma única falha já reabre
+            threshold = 1 if self._backoff_level > 0 else self.failure_threshold
+            if self._state != CircuitState.CLOSED or self._consecutive_failures >= threshold:
+                self._open(reason)
+
+    def trip(self, reason: str = "forced") -> None:
+        """Abre o circuito imediatamente"""
+        with self._lock:
+            self._open(reason)
+
+    def reset(self) -> None:
+        """Fecha o circuito e zera contadores de falha"""
+        self.record_success("reset")
+
+    def retry_in(self) -> float:
+        """Segundos restantes até o fim do backoff"""
+        with self._lock:
+            if self._state != CircuitState.OPEN:
+                return 0.0
+            return max(0.0, self._open_until - self.clock())
+
+    def metrics(self) -> dict:
+        """Métricas de estado e transições"""
+        state = self.state
+        with self._lock:
+            return {
+                'state': state,
+                'consecutive_failures': self._consecutive_failures,
+                'backoff_level': self._backoff_level,
+                'transitions': dict(self.transitions),
+                'history': list(self.history)
+            }
+
+    def _open(self, reason: str) -> None:
+        backoff = min(self.max_backoff, self.base_backoff * (2 ** self._backoff_level))
+        self._open_until = self.clock() + backoff
+        self._backoff_level += 1
+        self._transition(CircuitState.OPEN, f"{reason} (backoff {backoff:.0f}s)")
+
+    def _expire_backoff(self) -> None:
+        if self._state == CircuitState.OPEN and self.clock() >= self._open_until:
+            self._transition(CircuitState.HALF_OPEN, "backoff_expired")
+
+    def _transition(self, new_state: str, reason: str) -> None:
+        if new_state == self._state:
+            return
+
+        key = f"{self._state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.history.append({'time': time.time(), 'from': self._state, 'to': new_state, 'reason': reason})
+        self.logger.info(f"Circuit breaker: {self._state} -> {new_state} ({reason})")
+        self._state = new_state
+
+
+class HealthMonitor:
+    """Sonda de saúde com resultado em cache (TTL) e atualização em segundo plano"""
+
+    def __init__(self, probe: Callable[[], bool], breaker: CircuitBreaker, ttl: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.probe = probe
+        self.breaker = breaker
+        self.ttl = ttl
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._available: Optional[bool] = None
+        self._checked_at: Optional[float] = None
+        self._probing = False
+        self.probe_count = 0
+
+    def is_available(self) -> bool:
+        """Último estado conhecido; agenda nova sonda se o cache expirou (não bloqueia)"""
+        # Circuito em half_open aguarda uma sonda para decidir se fecha
+        if self._is_stale() or self.breaker.state == CircuitState.HALF_OPEN:
+            self.refresh_async()
+        return bool(self._available) and self.breaker.allow_request()
+
+    def check(self, force: bool = False) -> bool:
+        """Retorna estado em cache ou executa a sonda de forma síncrona"""
+        if force or self._is_stale():
+            self.refresh()
+        return bool(self._available)
+
+    def refresh(self) -> bool:
+        """Executa a sonda e atualiza cache e circuit breaker"""
+        with self._lock:
+            if self._probing:
+                return bool(self._available)
+            self._probing = True
+
+        try:
+            try:
+                available = bool(self.probe())
+            except Exception as e:
+                self.logger.debug(f"Sonda de saúde falhou: {e}")
+                available = False
+
+            # Sonda falha quando a API está inacessível: abrir o circuito direto
+            if available:
+                self.breaker.record_probe_success()
+            else:
+                self.breaker.trip("probe_failed")
+
+            with self._lock:
+                self._available = available
+                self._checked_at = self.clock()
+                self.probe_count += 1
+            return available
+
+        finally:
+            with self._lock:
+                self._probing = False
+
+    def refresh_async(self) -> None:
+        """Dispara a sonda em uma thread de fundo, se nenhuma estiver em andamento"""
+        with self._lock:
+            if self._probing:
+                return
+        threading.Thread(target=self.refresh, name="gradio-health-probe", daemon=True).start()
+
+    def snapshot(self) -> dict:
+        """Estado atual sem executar sonda"""
+        with self._lock:
+            age = None if self._checked_at is None else round(self.clock() - self._checked_at, 1)
+            available = self._available
+            probe_count = self.probe_count
+
+        return {
+            'available': available,
+            'last_check_age': age,
+            'probe_count': probe_count,
+            'retry_in': round(self.breaker.retry_in(), 1),
+            'circuit': self.breaker.metrics()
+        }
+
+    def _is_stale(self) -> bool:
+        with self._lock:
+            return self._checked_at is None or self.clock() - self._checked_at >= self.ttl
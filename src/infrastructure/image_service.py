@@ -1,25 +1,71 @@
 """Image Service - Infrastructure Layer"""
 import logging
-from typing import Optional
+from dataclasses import astuple
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Union
 from PIL import Image, ImageOps
-import numpy as np
 
-from domain.entities import Transform
+from domain.entities import Transform, AlphaMatte
+from infrastructure.background_cache import BackgroundCache
+from infrastructure.lru_cache import LRUCache
+from infrastructure.affine_transform import AffineTransformEngine
+from infrastructure.preview_renderer import PreviewRenderer
+
+# Motores de composição disponíveis
+COMPOSITORS = ("pil", "numpy")
+
+# Motores de transformação: matriz afim única ou resize + rotate
+TRANSFORM_ENGINES = ("affine", "two_pass")
 
 
 class ImageCompositionService:
     """Serviço para composição de imagens"""
     
-    def __init__(self):
+    def __init__(self, background_cache_size: int = 8, compositor: str = "pil",
+                 transform_engine: str = "affine", preview_size: int = 360, sprite_cache_size: int = 8):
         self.logger = logging.getLogger(__name__)
         self.canvas_size = (1080, 1080)
+        self.background_cache = BackgroundCache(background_cache_size)
+        # Produtos já transformados, por (product_key, Transform)
+        self.sprite_cache = LRUCache(sprite_cache_size, label="Sprite")
+        
+        if compositor not in COMPOSITORS:
+            raise ValueError(f"Motor de composição inválido: {compositor}")
+        self.compositor = compositor
+        self.numpy_compositor = None
+        if compositor == "numpy":
+            # numpy só é importado quando o motor NumPy é escolhido
+            from infrastructure.numpy_compositor import NumpyCompositor
+            self.numpy_compositor = NumpyCompositor()
+        
+        if transform_engine not in TRANSFORM_ENGINES:
+            raise ValueError(f"Motor de transformação inválido: {transform_engine}")
+        self.transform_engine = transform_engine
+        self.affine_engine = AffineTransformEngine()
+        self.preview_renderer = PreviewRenderer(preview_size, self.canvas_size)
     
-    def compose_preview(self, product: Image.Image, background: Image.Image, transform: Transform) -> Image.Image:
-        """Compõe preview combinando produto e background"""
+    def compose_preview(self, product: Image.Image, background: Image.Image, transform: Transform,
+                        product_key: Optional[tuple] = None) -> Image.Image:
+        """Compõe preview combinando produto e background
+
+        product pode ser um AlphaMatte: o recorte é montado só aqui.
+        Com product_key (identidade estável do produto, ex.: caminho e
+        mtime) o produto transformado é reaproveitado entre backgrounds,
+        e o recorte do AlphaMatte só é montado quando o sprite não está em cache.
+        """
         try:
             # Preparar background
             bg_resized = self._prepare_background(background)
             
+            if product_key is not None:
+                sprite, position = self._cached_sprite(product, transform, product_key)
+                return bg_resized.copy() if sprite is None else self._paste(bg_resized, sprite, position)
+            
+            if isinstance(product, AlphaMatte):
+                product = product.apply()
+            
+            if self.transform_engine == "affine":
+                return self._compose_affine(bg_resized, product, transform)
+            
             # Aplicar transformações ao produto
             product_transformed = self._apply_transform(product, transform)
             
@@ -32,8 +78,105 @@ class ImageCompositionService:
             self.logger.error(f"Erro na composição: {e}")
             raise
     
+    def compose_matrix(self, products: Iterable[Image.Image], backgrounds: Sequence[Image.Image],
+                       transforms: Union[Transform, Callable[[int, int], Transform]]
+                       ) -> Iterator[tuple[int, int, Image.Image]]:
+        """Compõe todos os produtos sobre todos os backgrounds, sob demanda
+        
+        transforms é um Transform único ou uma função (índice do produto,
+        índice do background) -> Transform. Cada produto é transformado uma
+        vez por Transform distinto e o sprite é colado em cada background já
+        preparado, em vez de reamostrar o produto para cada par. Entrega
+        (índice do produto, índice do background, composição) na ordem
+        produto x background; só os backgrounds preparados e os sprites do
+        produto atual ficam em memória.
+        """
+        prepared = [self._prepare_background(background) for background in backgrounds]
+        transform_for = transforms if callable(transforms) else (lambda i, j: transforms)
+        
+        for i, product in enumerate(products):
+            if isinstance(product, AlphaMatte):
+                product = product.apply()
+            
+            sprites = {}
+            for j, background in enumerate(prepared):
+                transform = transform_for(i, j)
+                key = astuple(transform)
+                if key not in sprites:
+                    sprites[key] = self.render_sprite(product, transform)
+                sprite, position = sprites[key]
+                
+                composition = background.copy() if sprite is None else self._paste(background, sprite, position)
+                yield i, j, composition
+    
+    def render_sprite(self, product: Image.Image,
+                      transform: Transform) -> tuple[Optional[Image.Image], tuple[int, int]]:
+        """Produto transformado e sua posição no canvas (sprite None se nada ficar visível)"""
+        if self.transform_engine == "affine":
+            return self.affine_engine.render(
+                product,
+                self.canvas_size,
+                transform.scale,
+                transform.rotation,
+                (transform.x, transform.y),
+                clamp=self.numpy_compositor is None
+            )
+        
+        sprite = self._apply_transform(product, transform)
+        return sprite, self._sprite_position(sprite, transform)
+    
+    def compose_preview_proxy(self, product: Image.Image, background: Image.Image, transform: Transform,
+                              product_key: Optional[tuple] = None) -> Image.Image:
+        """Compõe preview interativo em resolução reduzida (não usar para export)"""
+        try:
+            return self.preview_renderer.render(
+                product,
+                background,
+                transform.scale,
+                transform.rotation,
+                (transform.x, transform.y),
+                product_key=product_key,
+                clamp=self.numpy_compositor is None
+            )
+        except Exception as e:
+            self.logger.error(f"Erro no preview: {e}")
+            raise
+    
+    def _cached_sprite(self, product: Union[Image.Image, AlphaMatte], transform: Transform,
+                       product_key: tuple) -> tuple[Optional[Image.Image], tuple[int, int]]:
+        key = (product_key, astuple(transform), self.transform_engine, self.numpy_compositor is None)
+        cached = self.sprite_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        if isinstance(product, AlphaMatte):
+            product = product.apply()
+        rendered = self.render_sprite(product, transform)
+        self.sprite_cache.put(key, rendered)
+        return rendered
+    
+    def get_sprite_cache_stats(self) -> dict:
+        """Retorna estatísticas do cache de produtos transformados"""
+        return self.sprite_cache.stats()
+    
+    def _compose_affine(self, background: Image.Image, product: Image.Image, transform: Transform) -> Image.Image:
+        """Compõe renderizando o produto direto nas coordenadas do canvas"""
+        sprite, position = self.render_sprite(product, transform)
+        
+        if sprite is None:
+            return background.copy()
+        return self._paste(background, sprite, position)
+    
     def _prepare_background(self, background: Image.Image) -> Image.Image:
         """Prepara background para composição"""
+        # Reutilizar background já ajustado (mesmo arquivo, mtime e canvas)
+        cache_key = self.background_cache.make_key(background, self.canvas_size)
+        cached = self.background_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        source = background
+        
         # Redimensionar background para 1080x1080
         if background.size != self.canvas_size:
             # Redimensionar mantendo proporção e depois fazer crop central
@@ -48,8 +191,21 @@ class ImageCompositionService:
         if background.mode != 'RGB':
             background = background.convert('RGB')
         
+        # Não manter a imagem de origem (ainda ligada ao arquivo) no cache
+        if cache_key is not None and background is source:
+            background = background.copy()
+        
+        self.background_cache.put(cache_key, background)
         return background
     
+    def get_cache_stats(self) -> dict:
+        """Retorna estatísticas do cache de backgrounds"""
+        return self.background_cache.stats()
+    
+    def get_preview_cache_stats(self) -> dict:
+        """Retorna estatísticas do cache de proxies do preview"""
+        return self.preview_renderer.stats()
+    
     def _apply_transform(self, image: Image.Image, transform: Transform) -> Image.Image:
         """Aplica transformações (escala, rotação) à imagem"""
         try:
@@ -78,35 +234,48 @@ class ImageCompositionService:
     def _compose_images(self, background: Image.Image, product: Image.Image, transform: Transform) -> Image.Image:
         """Compõe imagem final combinando background e produto"""
         try:
-            # Criar canvas final
-            canvas = background.copy()
-            
-            # Calcular posição do produto
-            canvas_center_x = self.canvas_size[0] // 2
-            canvas_center_y = self.canvas_size[1] // 2
-            
-            # Aplicar offset da transformação
-            product_x = canvas_center_x + transform.x - (product.width // 2)
-            product_y = canvas_center_y + transform.y - (product.height // 2)
-            
-            # Garantir que o produto está dentro dos limites
-            product_x = max(0, min(product_x, self.canvas_size[0] - product.width))
-            product_y = max(0, min(product_y, self.canvas_size[1] - product.height))
-            
-            # Colar produto no canvas
-            if product.mode == 'RGBA':
-                # Usar canal alpha para transparência
-                canvas.paste(product, (product_x, product_y), product)
-            else:
-                # Sem transparência
-                canvas.paste(product, (product_x, product_y))
-            
-            return canvas
+            return self._paste(background, product, self._sprite_position(product, transform))
             
         except Exception as e:
             self.logger.error(f"Erro na composição final: {e}")
             raise
     
+    def _sprite_position(self, product: Image.Image, transform: Transform) -> tuple[int, int]:
+        """Posição do produto já transformado (caminho resize + rotate)"""
+        # Calcular posição do produto
+        canvas_center_x = self.canvas_size[0] // 2
+        canvas_center_y = self.canvas_size[1] // 2
+        
+        # Aplicar offset da transformação
+        product_x = canvas_center_x + transform.x - (product.width // 2)
+        product_y = canvas_center_y + transform.y - (product.height // 2)
+        
+        # Garantir que o produto está dentro dos limites (o motor NumPy
+        # recorta o que sai do canvas, sem reposicionar)
+        if self.numpy_compositor is None:
+            product_x = max(0, min(product_x, self.canvas_size[0] - product.width))
+            product_y = max(0, min(product_y, self.canvas_size[1] - product.height))
+        
+        return product_x, product_y
+    
+    def _paste(self, background: Image.Image, product: Image.Image, position: tuple[int, int]) -> Image.Image:
+        """Cola produto sobre uma cópia do background com o motor configurado"""
+        if self.numpy_compositor is not None:
+            return self.numpy_compositor.compose(background, product, position)
+        
+        # Criar canvas final
+        canvas = background.copy()
+        
+        # Colar produto no canvas
+        if product.mode == 'RGBA':
+            # Usar canal alpha para transparência
+            canvas.paste(product, position, product)
+        else:
+            # Sem transparência
+            canvas.paste(product, position)
+        
+        return canvas
+    
     def create_thumbnail(self, image: Image.Image, size: tuple[int, int] = (150, 150)) -> Image.Image:
         """Cria thumbnail de uma imagem"""
         try:
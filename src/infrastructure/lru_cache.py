@@ -0,0 +1,72 @@
+"""LRU Cache - Infrastructure Layer"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class LRUCache:
+    """Cache LRU thread-safe com contadores de hits, misses e remoções
+
+    Chaves None nunca são armazenadas (itens sem identidade estável).
+    """
+
+    def __init__(self, max_entries: int = 8, label: str = "Item"):
+        self.max_entries = max(0, max_entries)
+        self.label = label
+        self.logger = logging.getLogger(__name__)
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Optional[tuple]) -> Any:
+        """Retorna o valor se estiver em cache"""
+        if key is None or self.max_entries == 0:
+            return None
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+    def put(self, key: Optional[tuple], value: Any) -> None:
+        """Armazena o valor, removendo o menos usado se necessário"""
+        if key is None or self.max_entries == 0:
+            return
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                self.logger.debug(f"{self.label} removido do cache: {evicted_key[0]}")
+
+    def clear(self) -> None:
+        """Esvazia o cache e zera os contadores"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict:
+        """Retorna contadores de uso do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0
+            }
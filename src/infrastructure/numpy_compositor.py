@@ -0,0 +1,96 @@
+"""NumPy Compositor - Infrastructure Layer"""
+import threading
+import numpy as np
+from PIL import Image
+
+
+class NumpyCompositor:
+    """Composição alpha vetorizada com buffers reutilizados entre chamadas
+
+    O produto é misturado ao canvas em uma única passada, usando alpha
+    pré-multiplicado em aritmética inteira com o mesmo arredondamento do
+    Image.paste do PIL (resultado idêntico pixel a pixel). Produtos que
+    saem do canvas são recortados, não reposicionados.
+    """
+
+    def __init__(self):
+        # Buffers por thread: o serviço pode ser usado por um pool de threads
+        self._local = threading.local()
+
+    def _buffer(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        """Retorna buffer reutilizável com pelo menos o tamanho pedido"""
+        buffer = getattr(self._local, name, None)
+        size = int(np.prod(shape))
+        if buffer is None or buffer.size < size or buffer.dtype != dtype:
+            buffer = np.empty(size, dtype=dtype)
+            setattr(self._local, name, buffer)
+        return buffer[:size].reshape(shape)
+
+    def _background_array(self, background: Image.Image) -> np.ndarray:
+        """Pixels do background, reaproveitados quando o mesmo objeto se repete
+
+        Backgrounds vêm do cache do serviço e não são alterados depois de
+        preparados; a referência mantida garante que o id não seja reutilizado.
+        """
+        cached = getattr(self._local, 'background', None)
+        if cached is not None and cached[0] is background:
+            return cached[1]
+
+        array = np.asarray(background)
+        self._local.background = (background, array)
+        return array
+
+    def compose(self, background: Image.Image, product: Image.Image, position: tuple[int, int]) -> Image.Image:
+        """Compõe produto sobre o background com o canto superior esquerdo em position"""
+        if background.mode != 'RGB':
+            background = background.convert('RGB')
+
+        width, height = background.size
+        canvas = self._buffer('canvas', (height, width, 3), np.uint8)
+        np.copyto(canvas, self._background_array(background))
+
+        # Recortar a região do produto que cai dentro do canvas
+        px, py = position
+        x0, y0 = max(0, px), max(0, py)
+        x1, y1 = min(width, px + product.width), min(height, py + product.height)
+
+        if x1 > x0 and y1 > y0:
+            src_box = (x0 - px, y0 - py, x1 - px, y1 - py)
+            region = canvas[y0:y1, x0:x1]
+
+            if product.mode == 'RGBA':
+                self._blend(region, np.asarray(product.crop(src_box)))
+            else:
+                region[...] = np.asarray(product.crop(src_box).convert('RGB'))
+
+        # fromarray copia dados RGB (3 canais), então o buffer pode ser reutilizado
+        return Image.fromarray(canvas, 'RGB')
+
+    def _blend(self, region: np.ndarray, product_rgba: np.ndarray) -> None:
+        """Mistura RGBA sobre a região do canvas (in-place)
+
+        tmp = src * a + dst * (255 - a) + 128
+        out = (tmp + (tmp >> 8)) >> 8     # divisão por 255 arredondada
+        """
+        # Todas as operações em buffers contíguos do mesmo formato (h, w, 3):
+        # evita broadcasting no eixo de canais, que é lento no NumPy
+        shape = region.shape
+        alpha = self._buffer('alpha', shape, np.uint16)
+        work = self._buffer('work', shape, np.uint16)
+        tmp = self._buffer('tmp', shape, np.uint16)
+
+        # Fonte pré-multiplicada pelo alpha (máximo 255 * 255 + 128 cabe em uint16)
+        np.copyto(alpha, product_rgba[..., 3:4])
+        np.multiply(product_rgba[..., :3], alpha, out=work)
+
+        # Destino ponderado por (255 - alpha)
+        np.subtract(255, alpha, out=alpha)
+        np.multiply(region, alpha, out=tmp)
+
+        np.add(work, tmp, out=work)
+        np.add(work, 128, out=work)
+        np.right_shift(work, 8, out=tmp)
+        np.add(work, tmp, out=work)
+        np.right_shift(work, 8, out=work)
+
+        np.copyto(region, work, casting='unsafe')
@@ -0,0 +1,120 @@
+"""Preview Renderer - Infrastructure Layer"""
+import os
+import logging
+from typing import Optional, Union
+from PIL import Image, ImageOps
+
+from infrastructure.lru_cache import LRUCache
+from infrastructure.affine_transform import AffineTransformEngine
+
+
+class PreviewRenderer:
+    """Preview interativo em resolução reduzida com proxies em cache
+
+    Produto e background são reduzidos uma única vez (BILINEAR) e mantidos
+    em um LRU; cada ajuste de posição, escala ou rotação recompõe apenas
+    sobre os proxies. A composição em resolução cheia fica para o export.
+    """
+
+    def __init__(self, preview_size: int = 360, canvas_size: tuple[int, int] = (1080, 1080),
+                 max_entries: int = 16):
+        self.canvas_size = canvas_size
+        self.factor = preview_size / canvas_size[0]
+        self.preview_canvas = (
+            max(1, round(canvas_size[0] * self.factor)),
+            max(1, round(canvas_size[1] * self.factor))
+        )
+        self.logger = logging.getLogger(__name__)
+        # LRU genérico de imagens: chaves distinguem produto e background
+        self.proxies = LRUCache(max_entries, label="Proxy")
+        self.engine = AffineTransformEngine(Image.Resampling.BILINEAR, Image.Resampling.BILINEAR)
+
+    def render(self, product: Image.Image, background: Union[str, Image.Image], scale: float,
+               rotation: float, offset: tuple[int, int] = (0, 0), product_key: Optional[tuple] = None,
+               fit_background: bool = True, clamp: bool = False) -> Image.Image:
+        """Compõe o preview com a mesma geometria da composição em resolução cheia
+
+        fit_background=True ajusta o background com crop central (como o
+        serviço de composição); False apenas redimensiona (como o Streamlit).
+        """
+        background_proxy = self.background_proxy(background, fit_background)
+        product_proxy = self.product_proxy(product, product_key)
+
+        # Escala relativa ao proxy, que já está reduzido
+        render_scale = scale * self.factor * product.width / product_proxy.width
+        preview_offset = (round(offset[0] * self.factor), round(offset[1] * self.factor))
+
+        sprite, position = self.engine.render(
+            product_proxy, self.preview_canvas, render_scale, rotation, preview_offset, clamp=clamp
+        )
+
+        preview = background_proxy.copy()
+        if sprite is not None:
+            preview.paste(sprite, position, sprite)
+        return preview
+
+    def background_proxy(self, background: Union[str, Image.Image], fit: bool = True) -> Image.Image:
+        """Background reduzido ao tamanho do preview (em cache por arquivo e mtime)"""
+        path = background if isinstance(background, (str, os.PathLike)) else getattr(background, 'filename', None)
+        key = self._file_key('background', path, fit)
+
+        cached = self.proxies.get(key)
+        if cached is not None:
+            return cached
+
+        if isinstance(background, (str, os.PathLike)):
+            with Image.open(background) as source:
+                # JPEG: decodificar já reduzido
+                source.draft('RGB', self.preview_canvas)
+                proxy = self._fit_background(source, fit)
+        else:
+            proxy = self._fit_background(background, fit)
+
+        self.proxies.put(key, proxy)
+        return proxy
+
+    def product_proxy(self, product: Image.Image, key: Optional[tuple] = None) -> Image.Image:
+        """Produto reduzido pelo fator do preview (em cache por chave ou arquivo)"""
+        if key is not None:
+            key = ('product', self.factor) + tuple(key)
+        else:
+            key = self._file_key('product', getattr(product, 'filename', None))
+
+        cached = self.proxies.get(key)
+        if cached is not None:
+            return cached
+
+        if product.mode != 'RGBA':
+            product = product.convert('RGBA')
+
+        size = (
+            max(1, round(product.width * self.factor)),
+            max(1, round(product.height * self.factor))
+        )
+        proxy = product.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+        self.proxies.put(key, proxy)
+        return proxy
+
+    def _fit_background(self, background: Image.Image, fit: bool) -> Image.Image:
+        if fit:
+            proxy = ImageOps.fit(background, self.preview_canvas, Image.Resampling.BILINEAR, centering=(0.5, 0.5))
+        else:
+            proxy = background.resize(self.preview_canvas, Image.Resampling.BILINEAR)
+        return proxy.convert('RGB') if proxy.mode != 'RGB' else proxy
+
+    def _file_key(self, kind: str, path: Optional[str], *extra) -> Optional[tuple]:
+        """Chave baseada em caminho e mtime; None para imagens só em memória"""
+        if not path:
+            return None
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        return (kind, self.factor, os.path.abspath(path), mtime) + extra
+
+    def stats(self) -> dict:
+        """Retorna contadores do cache de proxies"""
+        return self.proxies.stats()
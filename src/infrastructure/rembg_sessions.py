@@ -0,0 +1,159 @@
+"""Rembg Sessions - Infrastructure Layer"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+# Modelos aceitos pelo fallback local (nomes do rembg)
+REMBG_MODELS = ("u2net", "u2netp", "isnet-general-use", "silueta")
+MODEL_ALIASES = {"isnet": "isnet-general-use"}
+
+
+def resolve_model(model: str) -> str:
+    """Normaliza o nome do modelo (aceita apelidos como 'isnet')"""
+    model = MODEL_ALIASES.get(model, model)
+    if model not in REMBG_MODELS:
+        raise ValueError(f"Modelo rembg inválido: {model}")
+    return model
+
+
+class _SessionEntry:
+    """Sessão carregada de um modelo e seu uso"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.session = None
+        self.in_use = 0
+        self.last_used = 0.0
+
+
+class RembgSessionRegistry:
+    """Sessões rembg compartilhadas pelo processo, carregadas sob demanda
+
+    Cada modelo é carregado uma única vez, na primeira remoção que precisar
+    dele, e reaproveitado por todos os clientes. Sessões sem uso por mais de
+    idle_timeout segundos são descarregadas por uma thread de limpeza (0
+    desativa); sessões em uso nunca são descarregadas.
+    """
+
+    def __init__(self, idle_timeout: float = 600.0, session_factory: Optional[Callable] = None):
+        self.idle_timeout = idle_timeout
+        self.logger = logging.getLogger(__name__)
+        self._session_factory = session_factory
+        self._entries: dict[str, _SessionEntry] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self.loads = 0
+        self.unloads = 0
+
+    def _new_session(self, model: str):
+        if self._session_factory is None:
+            from rembg import new_session
+            self._session_factory = new_session
+        return self._session_factory(model)
+
+    @contextmanager
+    def session(self, model: str = "u2net") -> Iterator[object]:
+        """Empresta a sessão do modelo (carrega na primeira vez)"""
+        model = resolve_model(model)
+        with self._lock:
+            entry = self._entries.setdefault(model, _SessionEntry())
+            entry.in_use += 1
+
+        try:
+            # Lock por modelo: carregar um modelo não bloqueia os demais
+            with entry.lock:
+                if entry.session is None:
+                    start_time = time.perf_counter()
+                    entry.session = self._new_session(model)
+                    with self._lock:
+                        self.loads += 1
+                    self.logger.info(
+                        f"Sessão rembg '{model}' carregada em {time.perf_counter() - start_time:.1f}s"
+                    )
+                    self._start_reaper()
+                session = entry.session
+            yield session
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def unload_idle(self, max_idle: Optional[float] = None) -> list[str]:
+        """Descarrega sessões ociosas há mais de max_idle segundos"""
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        unloaded = []
+        with self._lock:
+            for model, entry in self._entries.items():
+                if entry.session is None or entry.in_use or now - entry.last_used < max_idle:
+                    continue
+                # Não esperar por um carregamento em andamento
+                if not entry.lock.acquire(blocking=False):
+                    continue
+                try:
+                    entry.session = None
+                    self.unloads += 1
+                    unloaded.append(model)
+                finally:
+                    entry.lock.release()
+
+        for model in unloaded:
+            self.logger.info(f"Sessão rembg '{model}' descarregada por inatividade")
+        return unloaded
+
+    def unload_all(self) -> list[str]:
+        """Descarrega todas as sessões que não estão em uso"""
+        return self.unload_idle(max_idle=0)
+
+    def _start_reaper(self) -> None:
+        if self.idle_timeout <= 0:
+            return
+        with self._lock:
+            # A thread zera _reaper (sob o lock) ao encerrar
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="rembg-session-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(1.0, self.idle_timeout / 2)
+        while True:
+            time.sleep(interval)
+            self.unload_idle()
+            with self._lock:
+                if not any(entry.session is not None for entry in self._entries.values()):
+                    # Nada carregado: encerrar; volta a rodar no próximo carregamento
+                    self._reaper = None
+                    return
+
+    def loaded_models(self) -> list[str]:
+        """Modelos com sessão carregada no momento"""
+        with self._lock:
+            return [model for model, entry in self._entries.items() if entry.session is not None]
+
+    def stats(self) -> dict:
+        """Modelos carregados e contagem de carregamentos/descarregamentos"""
+        return {
+            'loaded': self.loaded_models(),
+            'loads': self.loads,
+            'unloads': self.unloads,
+            'idle_timeout': self.idle_timeout
+        }
+
+
+# Registro compartilhado pelo processo
+_registry: Optional[RembgSessionRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_session_registry(idle_timeout: Optional[float] = None) -> RembgSessionRegistry:
+    """Registro de sessões do processo (idle_timeout ajusta o registro existente)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = RembgSessionRegistry() if idle_timeout is None else RembgSessionRegistry(idle_timeout)
+        elif idle_timeout is not None:
+            _registry.idle_timeout = idle_timeout
+        return _registry
@@ -0,0 +1,190 @@
+"""Background Removal Cache - Infrastructure Layer"""
+import os
+import io
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Iterable
+from PIL import Image, PngImagePlugin
+
+
+class BackgroundRemovalCache:
+    """Cache persistente (em disco) de resultados de remoção de fundo
+
+    As entradas são endereçadas pelo conteúdo: hash dos pixels de entrada
+    combinado ao identificador do modelo que gerou o resultado. A ordem LRU
+    é mantida pelo mtime dos arquivos, atualizado a cada acerto. Além do
+    RGBA completo, o cache guarda só a máscara alpha (modo 'L'), que
+    referencia a imagem original pelo mesmo hash.
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: int = 500):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def digest(self, image: Image.Image) -> str:
+        """Calcula hash dos pixels de entrada (independe do formato do arquivo)"""
+        hasher = hashlib.sha256()
+        hasher.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+        hasher.update(image.tobytes())
+        return hasher.hexdigest()
+
+    def _entry_path(self, digest: str, model_id: str, kind: str = "rgba") -> Path:
+        name = f"{digest}:{model_id}" if kind == "rgba" else f"{digest}:{model_id}:{kind}"
+        key = hashlib.sha256(name.encode()).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.png"
+
+    def get(self, digest: str, model_ids: Iterable[str]) -> Optional[tuple[Image.Image, str]]:
+        """Busca resultado em cache, na ordem de preferência dos modelos"""
+        return self._get(digest, model_ids, "rgba")
+
+    def get_matte(self, digest: str, model_ids: Iterable[str]) -> Optional[tuple[Image.Image, str]]:
+        """Busca máscara alpha em cache, na ordem de preferência dos modelos"""
+        return self._get(digest, model_ids, "matte")
+
+    def _get(self, digest: str, model_ids: Iterable[str], kind: str) -> Optional[tuple[Image.Image, str]]:
+        for model_id in model_ids:
+            path = self._entry_path(digest, model_id, kind)
+            try:
+                with Image.open(path) as cached:
+                    cached.load()
+                    result = cached.copy()
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                self.logger.warning(f"Entrada de cache inválida {path.name}: {e}")
+                self._discard(path)
+                continue
+
+            # Atualizar mtime para manter a ordem LRU
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+            with self._lock:
+                self.hits += 1
+            return result, model_id
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, digest: str, result: Image.Image, model_id: str) -> bool:
+        """Grava resultado de forma atômica (arquivo temporário + rename)"""
+        return self._put(self._entry_path(digest, model_id), result, compress_level=1)
+
+    def put_matte(self, digest: str, matte: Image.Image, model_id: str, source: Optional[str] = None) -> bool:
+        """Grava só a máscara alpha (8 bits, comprimida) com referência à original
+
+        source (ex.: caminho da imagem original) vai num chunk de texto do PNG.
+        """
+        pnginfo = PngImagePlugin.PngInfo()
+        pnginfo.add_text("digest", digest)
+        if source:
+            pnginfo.add_text("source", source)
+        return self._put(self._entry_path(digest, model_id, "matte"), matte.convert('L'),
+                         compress_level=6, pnginfo=pnginfo)
+
+    def _put(self, path: Path, image: Image.Image, **save_options) -> bool:
+        temp_path = None
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG', **save_options)
+            data = buffer.getvalue()
+
+            with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as f:
+                temp_path = f.name
+                f.write(data)
+
+            previous_size = path.stat().st_size if path.exists() else 0
+            os.replace(temp_path, path)
+            temp_path = None
+
+            with self._lock:
+                if self._total_bytes is not None:
+                    self._total_bytes += len(data) - previous_size
+                over_limit = self._current_size() > self.max_size_bytes
+
+            if over_limit:
+                self._evict()
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"Erro ao gravar cache de remoção de fundo: {e}")
+            return False
+
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+
+        for path in self.cache_dir.glob("*/*.png"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _current_size(self) -> int:
+        """Tamanho total do cache (calculado uma vez e mantido incrementalmente)"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        return self._total_bytes
+
+    def _evict(self) -> None:
+        """Remove entradas menos usadas até voltar ao limite de tamanho"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+
+            for _, size, path in entries:
+                if total <= self.max_size_bytes:
+                    break
+                if self._discard(path):
+                    total -= size
+                    self.evictions += 1
+
+            self._total_bytes = total
+
+    def _discard(self, path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except OSError:
+            return False
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            for _, _, path in self._entries():
+                self._discard(path)
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """Retorna contadores de uso do cache"""
+        with self._lock:
+            return {
+                'cache_dir': str(self.cache_dir),
+                'size_mb': round(self._current_size() / (1024 * 1024), 2),
+                'max_size_mb': round(self.max_size_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,58 @@
+"""Transparency Preview - Infrastructure Layer"""
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+
+
+class TransparencyPreviewRenderer:
+    """Exibe imagens RGBA sobre fundo xadrez, já na largura de exibição
+
+    O padrão xadrez é gerado com operações vetorizadas uma vez por tamanho
+    e mantido em um pequeno LRU; a imagem é reduzida antes da composição.
+    """
+
+    def __init__(self, tile_size: int = 10, light: tuple = (240, 240, 240),
+                 dark: tuple = (200, 200, 200), max_patterns: int = 16):
+        self.tile_size = tile_size
+        self.light = np.array(light, dtype=np.uint8)
+        self.dark = np.array(dark, dtype=np.uint8)
+        self.max_patterns = max_patterns
+        self._patterns: "OrderedDict[tuple[int, int], Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def checkerboard(self, size: tuple[int, int]) -> Image.Image:
+        """Padrão xadrez RGB do tamanho pedido (em cache, somente leitura)"""
+        size = tuple(size)
+        with self._lock:
+            pattern = self._patterns.get(size)
+            if pattern is not None:
+                self._patterns.move_to_end(size)
+                return pattern
+
+        width, height = size
+        rows = (np.arange(height) // self.tile_size)[:, None]
+        cols = (np.arange(width) // self.tile_size)[None, :]
+        dark = ((rows + cols) % 2).astype(bool)
+        pattern = Image.fromarray(np.where(dark[..., None], self.dark, self.light), 'RGB')
+
+        with self._lock:
+            self._patterns[size] = pattern
+            while len(self._patterns) > self.max_patterns:
+                self._patterns.popitem(last=False)
+        return pattern
+
+    def render(self, image: Image.Image, width: int = 200) -> Image.Image:
+        """Imagem reduzida à largura de exibição; transparência sobre o xadrez"""
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            display = image.resize((width, height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        else:
+            display = image
+
+        if display.mode != 'RGBA':
+            return display
+
+        preview = self.checkerboard(display.size).copy()
+        preview.paste(display, (0, 0), display)
+        return preview
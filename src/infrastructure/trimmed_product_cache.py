@@ -0,0 +1,36 @@
+"""Trimmed Product Cache - Infrastructure Layer"""
+import os
+from PIL import Image
+
+from domain.alpha_trim import trim_to_alpha
+from infrastructure.lru_cache import LRUCache
+
+
+class TrimmedProductCache:
+    """Produtos carregados de arquivo já recortados ao conteúdo visível
+
+    Cada arquivo é decodificado e recortado uma vez; a chave combina
+    caminho e mtime, então um produto alterado em disco é recarregado.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        # LRU genérico de imagens
+        self.products = LRUCache(max_entries, label="Produto")
+
+    def load(self, path: str) -> Image.Image:
+        """Produto recortado (somente leitura: copie antes de alterar)"""
+        key = ('trimmed', os.path.abspath(path), os.stat(path).st_mtime_ns)
+        cached = self.products.get(key)
+        if cached is not None:
+            return cached
+
+        with Image.open(path) as source:
+            product = source.convert('RGBA')
+        product = trim_to_alpha(product)
+
+        self.products.put(key, product)
+        return product
+
+    def stats(self) -> dict:
+        """Retorna contadores do cache"""
+        return self.products.stats()
@@ -1,30 +1,14 @@
 """Main Application - Thumbnail Generator MVP"""
 import logging
-import sys
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 from PIL import Image
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('thumbnail_generator.log')
-    ]
-)
-
-# Silenciar logs verbosos de bibliotecas externas
-logging.getLogger('httpx').setLevel(logging.WARNING)
-logging.getLogger('urllib3').setLevel(logging.WARNING)
-logging.getLogger('gradio_client').setLevel(logging.WARNING)
-logging.getLogger('PIL').setLevel(logging.WARNING)
-
 # Imports do projeto
 try:
     # Imports relativos (quando usado como módulo)
-    from .domain.entities import Transform, AppState
+    from .config import AppConfig
+    from .domain.entities import Transform, AppState, BackgroundInfo, AlphaMatte
     from .application.use_cases import (
         ImageValidationUseCase,
         BackgroundRemovalUseCase,
@@ -32,11 +16,18 @@ try:
         ThumbnailExportUseCase
     )
     from .infrastructure.gradio_client import GradioBackgroundRemovalClient
+    from .infrastructure.health import CircuitBreaker
     from .infrastructure.image_service import ImageCompositionService
     from .infrastructure.file_service import FileService
+    from .infrastructure.removal_cache import BackgroundRemovalCache
+    from .infrastructure.background_index import BackgroundIndex
+    from .infrastructure.trimmed_product_cache import TrimmedProductCache
+    from .infrastructure.async_logging import configure_logging, LogAggregator
+    from .infrastructure.rembg_sessions import get_session_registry
 except ImportError:
     # Imports absolutos (quando executado diretamente)
-    from domain.entities import Transform, AppState
+    from config import AppConfig
+    from domain.entities import Transform, AppState, BackgroundInfo, AlphaMatte
     from application.use_cases import (
         ImageValidationUseCase,
         BackgroundRemovalUseCase,
@@ -44,8 +35,14 @@ except ImportError:
         ThumbnailExportUseCase
     )
     from infrastructure.gradio_client import GradioBackgroundRemovalClient
+    from infrastructure.health import CircuitBreaker
     from infrastructure.image_service import ImageCompositionService
     from infrastructure.file_service import FileService
+    from infrastructure.removal_cache import BackgroundRemovalCache
+    from infrastructure.background_index import BackgroundIndex
+    from infrastructure.trimmed_product_cache import TrimmedProductCache
+    from infrastructure.async_logging import configure_logging, LogAggregator
+    from infrastructure.rembg_sessions import get_session_registry
 
 
 class ThumbnailGeneratorApp:
@@ -54,17 +51,65 @@ class ThumbnailGeneratorApp:
     def __init__(self, base_path: str = "."):
         self.logger = logging.getLogger(__name__)
         self.base_path = Path(base_path)
+        self.config = AppConfig(base_path)
+        
+        # Logging assíncrono (fila + thread), configurado uma vez por processo
+        configure_logging(self.config.logging)
         
         # Inicializar serviços de infraestrutura
-        self.file_service = FileService(base_path)
-        self.gradio_client = GradioBackgroundRemovalClient()
-        self.image_service = ImageCompositionService()
+        self.file_service = FileService(base_path, self.config.logging.summary_interval)
+        self.removal_cache = None
+        if self.config.removal_cache.enabled:
+            self.removal_cache = BackgroundRemovalCache(
+                self.config.base_path / self.config.removal_cache.cache_dir,
+                self.config.removal_cache.max_size_mb
+            )
+        self.gradio_client = GradioBackgroundRemovalClient(
+            result_cache=self.removal_cache,
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=self.config.gradio.circuit_failure_threshold,
+                base_backoff=self.config.gradio.circuit_base_backoff,
+                max_backoff=self.config.gradio.circuit_max_backoff
+            ),
+            health_ttl=self.config.gradio.health_ttl,
+            rembg_model=self.config.rembg.model,
+            session_registry=get_session_registry(self.config.rembg.idle_timeout),
+            local_batch_size=self.config.rembg.batch_size
+        )
+        self.image_service = ImageCompositionService(
+            self.config.image.background_cache_size,
+            self.config.image.compositor,
+            self.config.image.transform_engine,
+            self.config.image.preview_size
+        )
+        # Produtos de arquivo recortados ao alpha uma vez por caminho/mtime
+        self.trimmed_products = TrimmedProductCache() if self.config.image.trim_products else None
         
         # Inicializar casos de uso
         self.image_validator = ImageValidationUseCase()
-        self.background_remover = BackgroundRemovalUseCase(self.gradio_client)
-        self.background_loader = BackgroundLoaderUseCase("backgrounds")
-        self.thumbnail_exporter = ThumbnailExportUseCase("thumbnails-prontas")
+        self.background_remover = BackgroundRemovalUseCase(
+            self.gradio_client,
+            self.config.rembg.batch_size,
+            self.config.removal_cache.output_mode,
+            self.config.image.trim_products
+        )
+        self.background_index = None
+        if self.config.background_index.enabled:
+            self.background_index = BackgroundIndex(
+                self.config.paths.backgrounds_dir,
+                self.config.base_path / self.config.background_index.index_dir,
+                self.config.background_index.preview_size
+            )
+        self.background_loader = BackgroundLoaderUseCase(
+            str(self.config.paths.backgrounds_dir),
+            self.background_index
+        )
+        self.thumbnail_exporter = ThumbnailExportUseCase(
+            "thumbnails-prontas",
+            self.config.image.export_profile,
+            self.config.image.default_quality,
+            self.config.image.export_quantize
+        )
         
         # Estado da aplicação
         self.app_state = AppState(
@@ -76,6 +121,10 @@ class ThumbnailGeneratorApp:
             composition=None
         )
         
+        # Eventos por imagem resumidos periodicamente
+        self.previews_log = LogAggregator(self.logger, "Previews compostos", self.config.logging.summary_interval)
+        self.exports_log = LogAggregator(self.logger, "Thumbnails exportadas", self.config.logging.summary_interval)
+        
         self.logger.info("ThumbnailGeneratorApp inicializada")
     
     def initialize(self) -> bool:
@@ -91,10 +140,10 @@ class ThumbnailGeneratorApp:
                 self.logger.error("Sem permissões de escrita no diretório de saída")
                 return False
             
-            # Health check da API Gradio
+            # Health check da API Gradio em segundo plano: a inicialização não espera a rede
             if not self.gradio_client.health_check():
-                self.logger.warning("API Gradio não está disponível")
-                # Continuar mesmo assim, pois pode ser temporário
+                self.logger.info("Disponibilidade da API Gradio em verificação (segundo plano)")
+                # Continuar mesmo assim; até a sonda responder vale o circuit breaker
             
             self.logger.info("Aplicação inicializada com sucesso")
             return True
@@ -129,10 +178,12 @@ class ThumbnailGeneratorApp:
             
             result = self.background_remover.execute(image_path)
             
-            if result.success and result.image_no_bg:
-                self.app_state.processed_image = result.image_no_bg
+            if result.success:
+                # Modo máscara: guarda o AlphaMatte; o recorte é montado na composição
+                processed = result.image_no_bg if result.image_no_bg is not None else result.matte
+                self.app_state.processed_image = processed
                 self.logger.info(f"Fundo removido com sucesso em {result.processing_time:.2f}s")
-                return result.image_no_bg
+                return processed
             else:
                 self.logger.error(f"Falha na remoção de fundo: {result.error}")
                 return None
@@ -141,6 +192,14 @@ class ThumbnailGeneratorApp:
             self.logger.error(f"Erro na remoção de fundo: {e}")
             return None
     
+    def list_background_infos(self) -> list[BackgroundInfo]:
+        """Backgrounds disponíveis com dimensões e miniatura"""
+        try:
+            return self.background_loader.execute()
+        except Exception as e:
+            self.logger.error(f"Erro ao carregar backgrounds: {e}")
+            return []
+    
     def load_backgrounds(self) -> list[str]:
         """Carrega lista de backgrounds disponíveis"""
         try:
@@ -160,8 +219,14 @@ class ThumbnailGeneratorApp:
         """Lista backgrounds disponíveis (alias para load_backgrounds)"""
         return self.load_backgrounds()
     
-    def compose_preview(self, product_path: str, background_path: str, transform: Transform = None) -> Optional[Image.Image]:
-        """Compõe preview da thumbnail"""
+    def compose_preview(self, product_path: Union[str, Image.Image, AlphaMatte], background_path: str,
+                        transform: Transform = None) -> Optional[Image.Image]:
+        """Compõe preview da thumbnail
+        
+        product_path aceita também o resultado de remove_background (imagem
+        ou AlphaMatte), como no workflow completo; esse já vem recortado ao
+        alpha pelo caso de uso e não é recortado de novo aqui.
+        """
         try:
             self.app_state.current_step = "composing"
             
@@ -169,8 +234,17 @@ class ThumbnailGeneratorApp:
             if transform is None:
                 transform = Transform(x=0, y=0, scale=1.0, rotation=0)
             
-            # Carregar imagens
-            product = self.file_service.load_image(product_path)
+            # Carregar imagens (AlphaMatte por duck typing: o pacote é importado
+            # como src.* e como módulos soltos, com classes distintas)
+            if hasattr(product_path, 'apply'):
+                product = product_path.apply()
+            elif isinstance(product_path, Image.Image):
+                product = product_path
+            elif self.trimmed_products is not None:
+                # Margens transparentes fora antes de escalar/rotacionar
+                product = self.trimmed_products.load(product_path)
+            else:
+                product = self.file_service.load_image(product_path)
             background = self.file_service.load_image(background_path)
             
             if not product or not background:
@@ -180,7 +254,7 @@ class ThumbnailGeneratorApp:
             # Compor imagem
             composition = self.image_service.compose_preview(product, background, transform)
             
-            self.logger.info("Preview composto com sucesso")
+            self.previews_log.record("%s + %s", product_path, background_path)
             return composition
             
         except Exception as e:
@@ -196,7 +270,7 @@ class ThumbnailGeneratorApp:
             
             if result.success:
                 self.app_state.current_step = "completed"
-                self.logger.info(f"Thumbnail exportada: {result.file_path} ({result.size_mb}MB)")
+                self.exports_log.record("%s (%sMB)", result.file_path, result.size_mb)
                 return result.file_path
             else:
                 self.logger.error(f"Erro na exportação: {result.error}")
@@ -246,8 +320,15 @@ class ThumbnailGeneratorApp:
             'current_step': self.app_state.current_step,
             'original_image': self.app_state.original_image,
             'processed_image': self.app_state.processed_image,
-            'gradio_available': self.gradio_client.health_check(),
-            'backgrounds_count': len(self.load_backgrounds())
+            'gradio_available': self.gradio_client.is_available(),
+            'gradio_health': self.gradio_client.health_status(),
+            'backgrounds_count': len(self.load_backgrounds()),
+            'background_cache': self.image_service.get_cache_stats(),
+            'sprite_cache': self.image_service.get_sprite_cache_stats(),
+            'preview_cache': self.image_service.get_preview_cache_stats(),
+            'removal_cache': self.removal_cache.stats() if self.removal_cache else None,
+            'background_index': self.background_index.stats() if self.background_index else None,
+            'rembg_sessions': self.gradio_client.sessions.stats()
         }
 
 
@@ -2,12 +2,9 @@ import streamlit as st
 import sys
 from pathlib import Path
 from PIL import Image
-import io
-import base64
+import os
 import time
-import zipfile
-import tempfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import itertools
 from typing import Optional, List, Dict, Any
 import json
 
@@ -16,7 +13,27 @@ src_path = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_path))
 
 from main import ThumbnailGeneratorApp
+from application.render_pipeline import ThumbnailRenderPipeline
 from domain.entities import Transform, AppState
+from infrastructure.affine_transform import AffineTransformEngine
+from infrastructure.decoded_image_cache import DecodedImageCache
+from infrastructure.transparency_preview import TransparencyPreviewRenderer
+from infrastructure.archive_builder import StreamingArchiveBuilder
+from domain.export_profiles import EXPORT_PROFILE_NAMES, get_export_profile, encode_image
+from domain.alpha_trim import alpha_bbox
+from config import ImageConfig
+
+# Motor de transformação compartilhado (sem estado)
+AFFINE_ENGINE = AffineTransformEngine()
+
+# Preview de transparência (padrões xadrez em cache por tamanho)
+TRANSPARENCY_PREVIEW = TransparencyPreviewRenderer()
+
+# ZIP de resultados montado em disco, sem recompressão
+ARCHIVE_BUILDER = StreamingArchiveBuilder()
+
+# Geração dos recortes processados (chave dos proxies do preview)
+PREVIEW_GENERATION = itertools.count()
 
 # Configuração da página mobile-friendly
 st.set_page_config(
@@ -54,9 +71,35 @@ def initialize_session_state():
         st.session_state.current_tab = 0
     if 'notifications' not in st.session_state:
         st.session_state.notifications = []
+    if 'preview_products' not in st.session_state:
+        st.session_state.preview_products = {}
+    if 'image_cache' not in st.session_state:
+        app = st.session_state.get('app')
+        cache_mb = app.config.image.decoded_cache_mb if app else ImageConfig.decoded_cache_mb
+        st.session_state.image_cache = DecodedImageCache(cache_mb * 1024 * 1024)
+
+def upload_id(uploaded_file):
+    """Identificador do upload (file_id nas versões recentes do Streamlit)"""
+    return getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+
+def load_uploaded_image(uploaded_file):
+    """Imagem decodificada do upload, reaproveitada entre reruns (somente leitura)"""
+    return st.session_state.image_cache.image(upload_id(uploaded_file), uploaded_file.getvalue)
+
+def load_uploaded_thumbnail(uploaded_file, size=(200, 200)):
+    """Miniatura do upload, reaproveitada entre reruns"""
+    return st.session_state.image_cache.thumbnail(upload_id(uploaded_file), uploaded_file.getvalue, size)
 
 def load_available_backgrounds():
-    """Carrega backgrounds disponíveis"""
+    """Carrega backgrounds disponíveis (pelo índice da aplicação, quando houver)"""
+    app = st.session_state.get('app')
+    if app:
+        infos = app.list_background_infos()
+        st.session_state.background_infos = {info.filename: info for info in infos}
+        st.session_state.available_backgrounds = [info.path for info in infos]
+        return
+    
+    st.session_state.background_infos = {}
     backgrounds_dir = Path("backgrounds")
     if backgrounds_dir.exists():
         backgrounds = []
@@ -86,6 +129,7 @@ def render_upload_section():
     
     if uploaded_files:
         st.session_state.uploaded_files = uploaded_files
+        st.session_state.image_cache.forget(upload_id(f) for f in uploaded_files)
         
         # Mostrar arquivos carregados
         with st.expander(f"{len(uploaded_files)} arquivo(s) carregado(s)", expanded=True):
@@ -115,8 +159,8 @@ def render_background_removal_section():
     for idx, uploaded_file in enumerate(st.session_state.uploaded_files):
         col_idx = idx % 3
         with cols[col_idx]:
-            # Mostrar imagem original
-            image = Image.open(uploaded_file)
+            # Mostrar imagem original (miniatura decodificada uma única vez)
+            image = load_uploaded_thumbnail(uploaded_file)
             st.image(image, caption=f"Original: {uploaded_file.name}", width=200)
     
     st.markdown("---")
@@ -144,35 +188,37 @@ def render_background_removal_section():
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            # Processar todas as imagens
-            for idx, uploaded_file in enumerate(st.session_state.uploaded_files):
-                progress = (idx + 1) / total_images
-                progress_bar.progress(progress)
-                status_text.text(f"Removendo fundo de {uploaded_file.name}... ({idx+1}/{total_images})")
-                
-                try:
-                    # Salvar arquivo temporário
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-                        tmp_file.write(uploaded_file.getvalue())
-                        temp_path = tmp_file.name
-                    
-                    try:
-                        # Remover fundo via API Gradio
-                        result = st.session_state.app.background_remover.execute(temp_path)
-                        
-                        if result.success:
-                            st.session_state.processed_images[uploaded_file.name] = result.image_no_bg
-                            add_notification(f"Fundo removido de {uploaded_file.name}", "success")
-                        else:
-                            add_notification(f"Erro ao remover fundo de {uploaded_file.name}: {result.error}", "error")
+            app = st.session_state.app
+            
+            # Bytes do upload seguem em memória (sem arquivo temporário)
+            sources = {f.name: f.getvalue() for f in st.session_state.uploaded_files}
+            
+            try:
+                # Várias requisições simultâneas; resultados chegam conforme terminam
+                completed = 0
+                for filename, result in app.background_remover.execute_many(
+                    sources,
+                    max_in_flight=app.config.gradio.max_in_flight
+                ):
+                    completed += 1
+                    progress_bar.progress(completed / total_images)
+                    status_text.text(f"Fundo removido de {filename} ({completed}/{total_images})")
                     
-                    finally:
-                        # Limpar arquivo temporário
-                        if Path(temp_path).exists():
-                            Path(temp_path).unlink()
+                    if result.success:
+                        store_processed_image(filename, result.cutout())
+                        add_notification(f"Fundo removido de {filename}", "success")
+                    else:
+                        add_notification(f"Erro ao remover fundo de {filename}: {result.error}", "error")
                         
-                except Exception as e:
-                    add_notification(f"Erro ao processar {uploaded_file.name}: {str(e)}", "error")
+            except Exception as e:
+                add_notification(f"Erro ao processar imagens: {str(e)}", "error")
+            
+            # Manter a ordem do upload (resultados chegam fora de ordem)
+            processed = st.session_state.processed_images
+            st.session_state.processed_images = {
+                f.name: processed[f.name]
+                for f in st.session_state.uploaded_files if f.name in processed
+            }
             
             status_text.text("✅ Processamento concluído!")
             progress_bar.progress(1.0)
@@ -186,32 +232,9 @@ def render_background_removal_section():
         for idx, (filename, processed_image) in enumerate(st.session_state.processed_images.items()):
             col_idx = idx % 3
             with processed_cols[col_idx]:
-                # Verificar se imagem tem transparência
-                if processed_image.mode == 'RGBA':
-                    # Criar uma versão com fundo xadrez para mostrar transparência
-                    import numpy as np
-                    
-                    # Criar padrão xadrez
-                    checker_size = 20
-                    h, w = processed_image.size[1], processed_image.size[0]
-                    checker = np.zeros((h, w, 3), dtype=np.uint8)
-                    
-                    for i in range(0, h, checker_size):
-                        for j in range(0, w, checker_size):
-                            if (i // checker_size + j // checker_size) % 2 == 0:
-                                checker[i:i+checker_size, j:j+checker_size] = [240, 240, 240]
-                            else:
-                                checker[i:i+checker_size, j:j+checker_size] = [200, 200, 200]
-                    
-                    checker_img = Image.fromarray(checker, 'RGB')
-                    
-                    # Compor imagem sobre o fundo xadrez
-                    display_img = checker_img.copy()
-                    display_img.paste(processed_image, (0, 0), processed_image)
-                    
-                    st.image(display_img, caption=f"Sem fundo: {filename}", width=200)
-                else:
-                    st.image(processed_image, caption=f"Sem fundo: {filename}", width=200)
+                # Transparência sobre fundo xadrez, já na largura de exibição
+                display_img = TRANSPARENCY_PREVIEW.render(processed_image, width=200)
+                st.image(display_img, caption=f"Sem fundo: {filename}", width=200)
         
         # Botão para avançar
         if st.button("Selecionar Background", key="advance_to_bg", type="primary"):
@@ -245,6 +268,12 @@ def render_background_section():
         )
         st.session_state.selected_background = selected_bg_path
         add_notification(f"Background selecionado: {selected_bg_name}", "success")
+        
+        # Miniatura gerada pelo índice (não decodifica o background inteiro)
+        info = st.session_state.background_infos.get(selected_bg_name)
+        if info:
+            st.image(info.thumbnail_path, width=160,
+                     caption=f"{info.dimensions[0]}x{info.dimensions[1]}")
 
 def render_preview_controls():
     """Renderiza controles de preview configurável com layout lado a lado"""
@@ -300,19 +329,29 @@ def render_preview_controls():
         st.markdown("**Preview da Composição:**")
         try:
             
+            # Preview rápido em baixa resolução; alta resolução sob demanda
+            full_resolution = st.checkbox(
+                "Preview em resolução cheia (1080px)",
+                value=False,
+                key="full_resolution_preview"
+            )
+            
             # Criar preview com as configurações atuais
             preview_image = create_preview_composition(
                 selected_image,
+                selected_image_name,
                 st.session_state.selected_background,
                 st.session_state.transform_settings['x_position'],
                 st.session_state.transform_settings['y_position'],
                 st.session_state.transform_settings['scale'],
                 st.session_state.transform_settings['rotation'],
-                use_auto_scale
+                use_auto_scale,
+                low_res=not full_resolution
             )
             
             if preview_image:
-                st.image(preview_image, caption="Composição final")
+                caption = "Composição final" if full_resolution else f"Preview rápido ({preview_image.width}px)"
+                st.image(preview_image, caption=caption, use_column_width=True)
             else:
                 st.warning("[AVISO] Não foi possível gerar preview")
                 
@@ -400,8 +439,9 @@ def render_preview_controls():
 def calculate_auto_scale(product_image, canvas_size=1080, target_coverage=0.6):
     """Calcula escala automática baseada no tamanho do produto para manter consistência visual"""
     try:
-        # Obter dimensões do produto
-        width, height = product_image.size
+        # Dimensões do conteúdo visível (ignora margens transparentes)
+        left, top, right, bottom = alpha_bbox(product_image) or (0, 0, *product_image.size)
+        width, height = right - left, bottom - top
         
         # Calcular a maior dimensão
         max_dimension = max(width, height)
@@ -420,50 +460,104 @@ def calculate_auto_scale(product_image, canvas_size=1080, target_coverage=0.6):
     except Exception:
         return 1.0  # Fallback para escala padrão
 
-def create_preview_composition(image_input, background_path, x_pos, y_pos, scale, rotation, use_auto_scale=True):
-    """Cria uma composição de preview com as configurações especificadas"""
+def get_compositor():
+    """Compositor NumPy configurado na aplicação (None = PIL)"""
+    app = st.session_state.get('app')
+    return getattr(getattr(app, 'image_service', None), 'numpy_compositor', None)
+
+def paste_product(background_image, product_image, paste_x, paste_y, compositor=None):
+    """Cola o produto no background (NumPy quando houver compositor, senão PIL)"""
+    if compositor is not None:
+        return compositor.compose(background_image, product_image, (paste_x, paste_y))
+    
+    result = background_image.copy()
+    if product_image.mode == 'RGBA':
+        result.paste(product_image, (paste_x, paste_y), product_image)
+    else:
+        result.paste(product_image, (paste_x, paste_y))
+    return result
+
+def compose_transformed(background_image, product_image, scale, rotation, x_pos, y_pos, compositor=None):
+    """Renderiza o produto (escala, rotação e posição) em uma única passada e compõe
+
+    Não acessa st.session_state: pode rodar em threads do pool de processamento.
+    """
+    sprite, (paste_x, paste_y) = AFFINE_ENGINE.render(
+        product_image, background_image.size, scale, rotation, (x_pos, y_pos)
+    )
+    if sprite is None:
+        return background_image.copy()
+    return paste_product(background_image, sprite, paste_x, paste_y, compositor)
+
+def processed_product_info(filename, image):
+    """Chave do proxy (nova a cada recorte) e escala automática de um recorte"""
+    return {
+        'key': ('processed', filename, next(PREVIEW_GENERATION)),
+        'auto_scale': calculate_auto_scale(image)
+    }
+
+def store_processed_image(filename, image):
+    """Guarda o recorte com a chave do proxy e a escala automática do preview (calculadas uma vez)"""
+    st.session_state.processed_images[filename] = image
+    st.session_state.preview_products[filename] = processed_product_info(filename, image)
+
+def preview_product_info(image_input, image_name):
+    """Chave do proxy e escala automática do produto, sem trabalho em resolução cheia a cada rerun
+
+    Só lê/preenche o cache preview_products; quem guarda recortes é
+    store_processed_image.
+    """
+    products = st.session_state.preview_products
+    if isinstance(image_input, Image.Image):
+        if image_name not in products:
+            products[image_name] = processed_product_info(image_name, image_input)
+        return products[image_name]
+    
+    key = ('upload', upload_id(image_input))
+    if key not in products:
+        products[key] = {'key': key, 'auto_scale': calculate_auto_scale(load_uploaded_image(image_input))}
+    return products[key]
+
+def create_preview_composition(image_input, image_name, background_path, x_pos, y_pos, scale, rotation,
+                               use_auto_scale=True, low_res=False):
+    """Cria uma composição de preview com as configurações especificadas
+
+    Com low_res=True compõe em resolução reduzida sobre proxies em cache
+    (feedback interativo); o export sempre usa resolução cheia.
+    """
     try:
-        # Carregar imagens - aceita tanto UploadedFile quanto PIL Image
+        # Carregar imagens - aceita tanto UploadedFile quanto PIL Image (somente leitura)
         if isinstance(image_input, Image.Image):
-            # Já é uma imagem PIL (processada)
-            product_image = image_input.copy()
+            product_image = image_input
         else:
-            # É um UploadedFile do Streamlit
-            product_image = Image.open(image_input)
+            # É um UploadedFile do Streamlit (decodificado uma vez por sessão)
+            product_image = load_uploaded_image(image_input)
+        
+        info = preview_product_info(image_input, image_name)
+        final_scale = scale * info['auto_scale'] if use_auto_scale else scale
+        
+        app = st.session_state.get('app')
+        if low_res and app is not None:
+            # Proxy reduzido em cache pela chave: o produto só é lido na primeira vez
+            return app.image_service.preview_renderer.render(
+                product_image,
+                background_path,
+                final_scale,
+                rotation,
+                (x_pos, y_pos),
+                product_key=info['key'],
+                fit_background=False
+            )
         
         background_image = Image.open(background_path)
         
         # Redimensionar background para 1080x1080
         background_image = background_image.resize((1080, 1080), Image.Resampling.LANCZOS)
         
-        # Aplicar escala automática se habilitada
-        final_scale = scale
-        if use_auto_scale:
-            auto_scale = calculate_auto_scale(product_image)
-            final_scale = scale * auto_scale
-        
-        # Aplicar transformações na imagem do produto
-        if final_scale != 1.0:
-            new_size = (int(product_image.width * final_scale), int(product_image.height * final_scale))
-            product_image = product_image.resize(new_size, Image.Resampling.LANCZOS)
-        
-        if rotation != 0:
-            product_image = product_image.rotate(rotation, expand=True)
-        
-        # Calcular posição de colagem
-        paste_x = (background_image.width - product_image.width) // 2 + x_pos
-        paste_y = (background_image.height - product_image.height) // 2 + y_pos
-        
-        # Criar composição
-        result = background_image.copy()
-        
-        # Colar imagem do produto
-        if product_image.mode == 'RGBA':
-            result.paste(product_image, (paste_x, paste_y), product_image)
-        else:
-            result.paste(product_image, (paste_x, paste_y))
-        
-        return result
+        # Aplicar transformações e criar composição
+        return compose_transformed(
+            background_image, product_image, final_scale, rotation, x_pos, y_pos, get_compositor()
+        )
         
     except Exception as e:
         st.error(f"[ERRO] Falha na composição: {e}")
@@ -502,6 +596,16 @@ def render_processing_controls():
             help="Qualidade da imagem final (70-100%)"
         )
         
+        app = st.session_state.get('app')
+        default_profile = app.config.image.export_profile if app else "balanced"
+        export_profile = st.selectbox(
+            "Perfil de export",
+            options=list(EXPORT_PROFILE_NAMES),
+            index=list(EXPORT_PROFILE_NAMES).index(default_profile),
+            help="fast: PNG rápido | balanced: PNG padrão | smallest: PNG menor | "
+                 "webp/jpeg: com perdas, usam a qualidade acima"
+        )
+        
         # Controle de redimensionamento automático para processamento
         use_auto_scale_processing = st.checkbox(
             "🎯 Aplicar Redimensionamento Automático no Processamento",
@@ -519,10 +623,15 @@ def render_processing_controls():
 
         disabled=st.session_state.processing_status.get('active', False)
     ):
-        start_processing(True, quality)  # True para aplicar remoção de fundo no processamento final
+        start_processing(True, quality, export_profile)  # True para aplicar remoção de fundo no processamento final
 
-def start_processing(remove_background=True, quality=95):
-    """Inicia o processamento das imagens"""
+def start_processing(remove_background=True, quality=95, export_profile="balanced"):
+    """Inicia o processamento das imagens em pipeline
+
+    1. remoção de fundo concorrente (só para imagens ainda sem resultado)
+    2. composição + codificação em um pool de threads (PIL libera o GIL)
+    3. gravação dos arquivos na thread principal, conforme ficam prontos
+    """
     st.session_state.processing_status = {'active': True, 'progress': 0}
     st.session_state.batch_results = []
     
@@ -530,186 +639,159 @@ def start_processing(remove_background=True, quality=95):
     status_text = st.empty()
     
     try:
-        total_files = len(st.session_state.uploaded_files)
+        app = st.session_state.get('app')
+        if not app:
+            raise RuntimeError("Sistema não inicializado")
         
-        for i, uploaded_file in enumerate(st.session_state.uploaded_files):
-            progress = (i + 1) / total_files
-            progress_bar.progress(progress)
-            status_text.text(f"Processando {uploaded_file.name}... ({i+1}/{total_files})")
-            
-            try:
-                # Processar imagem
-                result = process_single_image(
-                    uploaded_file,
-                    st.session_state.selected_background,
-                    remove_background,
-                    quality
-                )
-                st.session_state.batch_results.append(result)
-                
-            except Exception as e:
-                st.session_state.batch_results.append({
-                    'filename': uploaded_file.name,
-                    'status': 'error',
-                    'error': str(e)
-                })
+        uploads = list(st.session_state.uploaded_files)
+        total_files = len(uploads)
         
-        st.session_state.processing_status = {'active': False, 'completed': True}
-        status_text.text("[OK] Processamento concluído!")
-        
-    except Exception as e:
-        st.session_state.processing_status = {'active': False, 'error': str(e)}
-        st.error(f"Erro no processamento: {e}")
-
-def process_single_image(uploaded_file, background_path, remove_background, quality):
-    """Processa uma única imagem com configurações de transformação"""
-    try:
-        if not st.session_state.get('app'):
-            return {
-                'filename': uploaded_file.name,
-                'status': 'error',
-                'message': 'Sistema não inicializado'
-            }
-        
-        app = st.session_state.app
-        
-        # Obter configurações de transformação
-        transform_settings = st.session_state.get('transform_settings', {
+        # Configurações lidas uma vez (threads do pool não acessam session_state)
+        transform_settings = dict(st.session_state.get('transform_settings', {
             'x_position': 0,
             'y_position': 0,
             'scale': 1.0,
             'rotation': 0
-        })
-        
-        # Obter configuração de redimensionamento automático
+        }))
         use_auto_scale = st.session_state.get('use_auto_scale_processing', True)
+        background_image = load_processing_background(st.session_state.selected_background)
+        compositor = get_compositor()
+        quantize = app.config.image.export_quantize
+        profile = get_export_profile(export_profile, quality, quantize)
         
-        # Salvar arquivo temporário
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            temp_path = tmp_file.name
-        
-        try:
-            # Processar imagem com transformações customizadas
-            result_path = process_image_with_transforms(
-                temp_path,
-                background_path,
-                transform_settings,
-                remove_background,
-                uploaded_file.name,
-                use_auto_scale
-            )
-            
-            if result_path and Path(result_path).exists():
-                # Ler resultado
-                with open(result_path, 'rb') as f:
-                    image_data = f.read()
-                
-                return {
-                    'filename': uploaded_file.name,
-                    'status': 'success',
-                    'data': base64.b64encode(image_data).decode(),
-                    'size': len(image_data),
-                    'path': result_path
-                }
-            else:
-                return {
-                    'filename': uploaded_file.name,
-                    'status': 'error',
-                    'message': 'Falha no processamento'
-                }
-                
-        finally:
-            # Limpar arquivo temporário
-            if Path(temp_path).exists():
-                Path(temp_path).unlink()
-                
-    except Exception as e:
-        return {
-            'filename': uploaded_file.name,
-            'status': 'error',
-            'message': str(e)
-        }
-
-def process_image_with_transforms(image_path, background_path, transform_settings, remove_background=True, original_filename=None, use_auto_scale=True):
-    """Processa imagem aplicando transformações customizadas"""
-    try:
-        # Carregar imagens
-        product_image = Image.open(image_path)
-        background_image = Image.open(background_path)
-        
-        # Remover fundo se necessário
-        if remove_background and st.session_state.get('app'):
-            app = st.session_state.app
-            # Usar a API do Gradio para remover fundo
-            try:
-                result_image = app.gradio_client.remove_background(product_image)
-                if result_image:
-                    product_image = result_image
-            except Exception as e:
-                st.warning(f"[AVISO] Falha na remoção de fundo: {e}")
-        
-        # Redimensionar background para 1080x1080
-        background_image = background_image.resize((1080, 1080), Image.Resampling.LANCZOS)
-        
-        # Aplicar transformações
-        scale = transform_settings.get('scale', 1.0)
-        rotation = transform_settings.get('rotation', 0)
-        x_pos = transform_settings.get('x_position', 0)
-        y_pos = transform_settings.get('y_position', 0)
-        
-        # Aplicar escala automática se habilitada
-        final_scale = scale
-        if use_auto_scale:
-            auto_scale = calculate_auto_scale(product_image)
-            final_scale = scale * auto_scale
-        
-        if final_scale != 1.0:
-            new_size = (int(product_image.width * final_scale), int(product_image.height * final_scale))
-            product_image = product_image.resize(new_size, Image.Resampling.LANCZOS)
-        
-        if rotation != 0:
-            product_image = product_image.rotate(rotation, expand=True)
-        
-        # Calcular posição de colagem
-        paste_x = (background_image.width - product_image.width) // 2 + x_pos
-        paste_y = (background_image.height - product_image.height) // 2 + y_pos
-        
-        # Criar composição final
-        result = background_image.copy()
-        
-        # Colar imagem do produto
-        if product_image.mode == 'RGBA':
-            result.paste(product_image, (paste_x, paste_y), product_image)
-        else:
-            result.paste(product_image, (paste_x, paste_y))
-        
-        # Salvar resultado
-        output_dir = Path("thumbnails-prontas")
-        output_dir.mkdir(exist_ok=True)
-        
-        # Usar nome original do arquivo se fornecido, senão usar o nome do arquivo temporário
-        if original_filename:
-            base_name = Path(original_filename).stem
-        else:
-            base_name = Path(image_path).stem
-        
-        output_path = output_dir / f"{base_name}_thumb.png"
+        # Reaproveitar fundos já removidos na aba "Remover Fundo"
+        if 'processed_images' not in st.session_state:
+            st.session_state.processed_images = {}
+        processed = st.session_state.processed_images
         
-        # Garantir nome único
-        counter = 1
-        while output_path.exists():
-            output_path = output_dir / f"{base_name}_thumb_{counter}.png"
-            counter += 1
+        def record(filename, result):
+            progress_bar.progress(pipeline.completed / total_files)
+            status_text.text(f"Processado {filename} ({pipeline.completed}/{total_files})")
         
-        # Salvar como PNG
-        result.save(output_path, "PNG", optimize=True)
+        def write(image_data, filename):
+            return write_thumbnail(image_data, filename, profile.extension)
         
-        return str(output_path)
+        pipeline = ThumbnailRenderPipeline(
+            render_thumbnail, write, workers=app.config.image.batch_workers, on_result=record
+        )
+        batch_start = time.perf_counter()
+        
+        with pipeline:
+            def submit(filename, product_source):
+                # Escala automática calculada uma vez, na thread principal (mesma do preview)
+                auto_scale = preview_product_info(product_source, filename)['auto_scale'] if use_auto_scale else 1.0
+                product_image = product_source
+                if not isinstance(product_source, Image.Image):
+                    product_image = load_uploaded_image(product_source)
+                pipeline.submit(
+                    filename, product_image, background_image,
+                    transform_settings, auto_scale, compositor, profile
+                )
+            
+            pending_removal = {}
+            for uploaded_file in uploads:
+                if uploaded_file.name in processed:
+                    submit(uploaded_file.name, processed[uploaded_file.name])
+                elif remove_background:
+                    pending_removal[uploaded_file.name] = uploaded_file.getvalue()
+                else:
+                    submit(uploaded_file.name, uploaded_file)
+            
+            # Remoções concorrentes; cada resultado já segue para composição
+            if pending_removal:
+                for filename, removal in app.background_remover.execute_many(
+                    pending_removal,
+                    max_in_flight=app.config.gradio.max_in_flight
+                ):
+                    if removal.success:
+                        # Sessão guarda o recorte pronto (preview interativo)
+                        store_processed_image(filename, removal.cutout())
+                        submit(filename, processed[filename])
+                    else:
+                        pipeline.fail(filename, removal.error)
+                    pipeline.collect()
+            
+            pipeline.finish()
+        
+        # Resultados e fundos removidos na ordem do upload
+        results = {result['filename']: result for result in pipeline.results()}
+        st.session_state.batch_results = [results[f.name] for f in uploads if f.name in results]
+        st.session_state.processed_images = {f.name: processed[f.name] for f in uploads if f.name in processed}
+        
+        # Estimativa, não medição: tempo de composição somado das threads / tempo total
+        # do lote (não há rodada serial para comparar)
+        wall_seconds = time.perf_counter() - batch_start
+        compose_seconds = pipeline.compose_seconds
+        parallelism = compose_seconds / wall_seconds if wall_seconds > 0 else 0.0
+        encoded_count = sum(1 for r in results.values() if r['status'] == 'success')
+        avg_kb = pipeline.encoded_bytes / encoded_count / 1024 if encoded_count else 0.0
+        avg_encode_ms = pipeline.encode_ms / encoded_count if encoded_count else 0.0
+        st.session_state.processing_status = {
+            'active': False,
+            'completed': True,
+            'wall_seconds': round(wall_seconds, 2),
+            'compose_seconds': round(compose_seconds, 2),
+            'estimated_parallelism': round(parallelism, 2),
+            'workers': pipeline.workers,
+            'export_profile': profile.name,
+            'avg_kb': round(avg_kb, 1),
+            'avg_encode_ms': round(avg_encode_ms, 1)
+        }
+        status_text.text(
+            f"[OK] Processamento concluído em {wall_seconds:.1f}s com {pipeline.workers} threads "
+            f"(composição somada {compose_seconds:.1f}s, paralelismo estimado ~{parallelism:.1f}x) | "
+            f"perfil {profile.name}: {avg_kb:.1f} KB e {avg_encode_ms:.0f} ms de codificação por imagem"
+        )
         
     except Exception as e:
-        st.error(f"[ERRO] Falha no processamento: {e}")
-        return None
+        st.session_state.processing_status = {'active': False, 'error': str(e)}
+        st.error(f"Erro no processamento: {e}")
+
+def load_processing_background(background_path):
+    """Background ajustado ao canvas, carregado uma vez por lote"""
+    with Image.open(background_path) as background_image:
+        return background_image.resize((1080, 1080), Image.Resampling.LANCZOS)
+
+def render_thumbnail(product_image, background_image, transform_settings, auto_scale=1.0,
+                     compositor=None, export_profile=None):
+    """Compõe e codifica uma thumbnail; retorna (bytes, segundos, ms de codificação)
+
+    Roda nas threads do pool: recebe tudo por parâmetro, inclusive a escala
+    automática já calculada (1.0 quando desabilitada).
+    """
+    start_time = time.perf_counter()
+    
+    result = compose_transformed(
+        background_image,
+        product_image,
+        transform_settings.get('scale', 1.0) * auto_scale,
+        transform_settings.get('rotation', 0),
+        transform_settings.get('x_position', 0),
+        transform_settings.get('y_position', 0),
+        compositor
+    )
+    
+    encode_start = time.perf_counter()
+    image_data = encode_image(result, export_profile or get_export_profile("balanced"))
+    encode_ms = (time.perf_counter() - encode_start) * 1000
+    return image_data, time.perf_counter() - start_time, encode_ms
+
+def write_thumbnail(image_data, original_filename, extension=".png"):
+    """Grava a thumbnail com nome único em thumbnails-prontas"""
+    output_dir = Path("thumbnails-prontas")
+    output_dir.mkdir(exist_ok=True)
+    
+    base_name = Path(original_filename).stem
+    output_path = output_dir / f"{base_name}_thumb{extension}"
+    
+    # Garantir nome único
+    counter = 1
+    while output_path.exists():
+        output_path = output_dir / f"{base_name}_thumb_{counter}{extension}"
+        counter += 1
+    
+    output_path.write_bytes(image_data)
+    return str(output_path)
 
 def render_results_section():
     """Renderiza seção de resultados"""
@@ -740,16 +822,14 @@ def render_results_section():
                 if result['status'] == 'success':
                     col_idx = idx % 4
                     with cols[col_idx]:
-                        img_data = base64.b64decode(result['data'])
-                        
                         # Calcular tamanho da imagem
-                        img_size_kb = len(img_data) // 1024
+                        img_size_kb = result['size'] // 1024
                         
                         # Container para a imagem
                         container = st.container()
                         with container:
-                            # Mostrar imagem
-                            st.image(img_data, width=150)
+                            # Mostrar imagem direto do arquivo exportado
+                            st.image(result['path'], width=150)
                             
                             # Informações da imagem
                             st.caption(f"**{result['filename']}**")
@@ -759,15 +839,23 @@ def render_results_section():
         
         # Botão de download
         if st.button("Baixar Todas as Imagens"):
-            zip_data = create_results_zip()
-            if zip_data:
-                st.download_button(
-                    label="Download ZIP",
-                    data=zip_data,
-                    file_name=f"thumbnails_{int(time.time())}.zip",
-                    mime="application/zip",
-        
-                )
+            zip_path = create_results_zip()
+            # download_button lê o arquivo inteiro para a memória do servidor:
+            # o ZIP em disco só limita a memória da montagem, não a do download
+            app = st.session_state.get('app')
+            max_mb = app.config.image.archive_download_max_mb if app else ImageConfig.archive_download_max_mb
+            zip_mb = os.path.getsize(zip_path) / (1024 * 1024) if zip_path else 0
+            if zip_path and zip_mb > max_mb:
+                st.warning(f"ZIP com {zip_mb:.0f} MB excede o limite de download ({max_mb} MB). "
+                           "As thumbnails estão em thumbnails-prontas/.")
+            elif zip_path:
+                with open(zip_path, 'rb') as zip_file:
+                    st.download_button(
+                        label="Download ZIP",
+                        data=zip_file,
+                        file_name=f"thumbnails_{int(time.time())}.zip",
+                        mime="application/zip",
+                    )
     
     # Mostrar erros se houver
     if failed > 0:
@@ -777,18 +865,18 @@ def render_results_section():
                     add_notification(f"Erro em {result['filename']}: {result['message']}", "error")
 
 def create_results_zip():
-    """Cria arquivo ZIP com os resultados"""
+    """Cria arquivo ZIP (em disco) com os resultados e retorna seu caminho"""
     try:
-        zip_buffer = io.BytesIO()
+        # Descartar ZIP de uma geração anterior
+        ARCHIVE_BUILDER.discard(st.session_state.get('archive_path'))
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for result in st.session_state.batch_results:
-                if result['status'] == 'success':
-                    img_data = base64.b64decode(result['data'])
-                    filename = f"thumb_{result['filename']}"
-                    zip_file.writestr(filename, img_data)
-        
-        return zip_buffer.getvalue()
+        files = [
+            (result['path'], f"thumb_{Path(result['filename']).stem}{Path(result['path']).suffix}")
+            for result in st.session_state.batch_results
+            if result['status'] == 'success'
+        ]
+        st.session_state.archive_path = ARCHIVE_BUILDER.build(files)
+        return st.session_state.archive_path
     except Exception as e:
         st.error(f"Erro ao criar ZIP: {e}")
         return None
@@ -0,0 +1,190 @@
+"""Testes para o motor de processamento em lote"""
+import pytest
+from PIL import Image
+import tempfile
+from pathlib import Path
+
+from src.batch_engine import BatchThumbnailEngine
+from src.domain.entities import BatchWorkItem, Transform
+
+
+class TestBatchThumbnailEngine:
+    """Testes para BatchThumbnailEngine"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = Path(self.temp_dir) / "saida"
+
+        # Criar produtos e backgrounds pequenos
+        self.products = []
+        for idx, color in enumerate([(255, 0, 0, 255), (0, 0, 255, 255)]):
+            path = Path(self.temp_dir) / f"produto_{idx}.png"
+            Image.new('RGBA', (120, 80), color=color).save(path)
+            self.products.append(str(path))
+
+        self.backgrounds = []
+        for idx, color in enumerate(['white', 'green']):
+            path = Path(self.temp_dir) / f"bg_{idx}.png"
+            Image.new('RGB', (300, 200), color=color).save(path)
+            self.backgrounds.append(str(path))
+
+    def teardown_method(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _work_items(self):
+        transform = Transform(x=0, y=0, scale=1.0, rotation=0)
+        return [
+            BatchWorkItem(
+                product_path=product,
+                background_path=background,
+                transform=transform,
+                output_name=f"{Path(product).stem}_com_{Path(background).stem}"
+            )
+            for product in self.products
+            for background in self.backgrounds
+        ]
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_run_generates_all_items(self, workers):
+        """Testa geração de todas as combinações, em série e em paralelo"""
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), workers=workers)
+
+        results = list(engine.run(self._work_items()))
+
+        assert len(results) == 4
+        assert all(result.success for result in results)
+        assert {Path(result.file_path).name for result in results} == {
+            f"{Path(p).stem}_com_{Path(b).stem}_thumb.png"
+            for p in self.products for b in self.backgrounds
+        }
+        for result in results:
+            with Image.open(result.file_path) as exported:
+                assert exported.size == (1080, 1080)
+
+    def test_serial_run_reuses_background_cache(self):
+        """Testa que o worker mantém o cache de backgrounds entre itens"""
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), workers=1)
+
+        list(engine.run(self._work_items()))
+
+        stats = engine.get_cache_stats()
+        assert stats['workers'] == 1
+        assert stats['misses'] == 2
+        assert stats['hits'] == 2
+
+    def test_missing_product_reports_error(self):
+        """Testa que falha em um item não interrompe o lote"""
+        items = self._work_items()
+        items[0].product_path = str(Path(self.temp_dir) / "inexistente.png")
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), workers=1)
+
+        results = list(engine.run(items))
+
+        assert len(results) == 4
+        assert sum(1 for result in results if not result.success) == 1
+        assert "carregar" in results[0].error
+
+
+    def test_export_profile_per_batch(self):
+        """Testa perfil de export escolhido por lote (webp)"""
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), workers=1, export_profile="webp")
+
+        results = list(engine.run(self._work_items()))
+
+        assert all(result.success for result in results)
+        assert all(result.file_path.endswith("_thumb.webp") for result in results)
+        assert all(result.encode_ms > 0 for result in results)
+        with Image.open(results[0].file_path) as exported:
+            assert exported.format == "WEBP"
+
+    def test_incremental_run_skips_unchanged_outputs(self):
+        """Testa que o segundo lote incremental só recompõe o que mudou"""
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), workers=1)
+        list(engine.run(self._work_items(), incremental=True))
+        assert engine.get_build_stats()['built'] == 4
+
+        results = list(engine.run(self._work_items(), incremental=True))
+        assert all(result.success and result.skipped for result in results)
+        assert engine.get_build_stats() == {'built': 0, 'skipped': 4, 'pruned': 0}
+
+        # Produto alterado: só as saídas dele são refeitas
+        Image.new('RGBA', (120, 80), color=(0, 255, 0, 255)).save(self.products[0])
+        items = self._work_items()
+        items[-1].transform = Transform(x=10, y=0, scale=1.0, rotation=0)
+        results = list(engine.run(items, incremental=True))
+        rebuilt = {result.item.output_name for result in results if not result.skipped}
+        assert rebuilt == {items[0].output_name, items[1].output_name, items[-1].output_name}
+
+    def test_full_run_records_manifest(self):
+        """Testa que um lote completo (não incremental) deixa o manifesto pronto para o incremental"""
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), workers=1)
+        list(engine.run(self._work_items(), incremental=False))
+        assert engine.get_build_stats()['built'] == 4
+
+        results = list(engine.run(self._work_items(), incremental=True))
+
+        assert all(result.skipped for result in results)
+        assert engine.get_build_stats() == {'built': 0, 'skipped': 4, 'pruned': 0}
+
+    def test_trimmed_products_decoded_once_per_file(self):
+        """Testa que com recorte ativo o produto é decodificado só pelo cache de recorte"""
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), workers=1, trim_products=True)
+
+        results = list(engine.run(self._work_items()))
+
+        assert all(result.success for result in results)
+        # Só os backgrounds passam pelo FileService; cada produto é lido uma vez
+        assert all(result.log_counts['Imagens carregadas'] == 1 for result in results)
+
+    def test_profile_change_replaces_outputs(self):
+        """Testa que outro perfil de export invalida as saídas anteriores"""
+        list(BatchThumbnailEngine(output_dir=str(self.output_dir)).run(self._work_items(), incremental=True))
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), export_profile="jpeg")
+
+        results = list(engine.run(self._work_items(), incremental=True))
+
+        assert not any(result.skipped for result in results)
+        assert sorted(path.suffix for path in self.output_dir.glob("*_thumb.*")) == [".jpg"] * 4
+
+    def test_prune_removes_orphaned_outputs(self):
+        """Testa remoção das saídas de combinações fora do lote"""
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), workers=1)
+        items = self._work_items()
+        list(engine.run(items, incremental=True))
+
+        results = list(engine.run(items[:2], incremental=True, prune=True))
+
+        assert all(result.skipped for result in results)
+        assert engine.get_build_stats()['pruned'] == 2
+        assert len(list(self.output_dir.glob("*_thumb.png"))) == 2
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_worker_log_counts_summarized_by_engine(self, workers, caplog):
+        """Testa que as contagens de log dos workers chegam ao resumo do processo principal"""
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), workers=workers)
+
+        with caplog.at_level("INFO", logger="src.batch_engine"):
+            results = list(engine.run(self._work_items()))
+
+        # Produto e background carregados por item; o export não passa pelo FileService
+        assert all(result.log_counts == {'Imagens carregadas': 2, 'Imagens salvas': 0} for result in results)
+        summaries = [record.getMessage() for record in caplog.records
+                     if record.name == "src.batch_engine" and record.getMessage().startswith("Imagens")]
+        assert len(summaries) == 1
+        assert summaries[0].startswith("Imagens carregadas: 8 em")
+
+    @pytest.mark.parametrize("option", [{'compositor': "numpy"}, {'transform_engine': "two_pass"}])
+    def test_render_option_change_invalidates_outputs(self, option):
+        """Testa que trocar compositor ou motor de transformação recompõe as saídas"""
+        list(BatchThumbnailEngine(output_dir=str(self.output_dir)).run(self._work_items(), incremental=True))
+        engine = BatchThumbnailEngine(output_dir=str(self.output_dir), **option)
+
+        results = list(engine.run(self._work_items(), incremental=True))
+
+        assert not any(result.skipped for result in results)
+        assert engine.get_build_stats()['built'] == 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -8,6 +8,19 @@ from pathlib import Path
 
 from src.infrastructure.file_service import FileService
 from src.infrastructure.image_service import ImageCompositionService
+from src.infrastructure.affine_transform import AffineTransformEngine
+from src.infrastructure.removal_cache import BackgroundRemovalCache
+from src.infrastructure.decoded_image_cache import DecodedImageCache
+from src.infrastructure.transparency_preview import TransparencyPreviewRenderer
+from src.infrastructure.archive_builder import StreamingArchiveBuilder
+from src.infrastructure.gradio_client import GradioBackgroundRemovalClient
+from src.infrastructure.rembg_sessions import RembgSessionRegistry, resolve_model
+from src.infrastructure.batch_segmentation import BatchSegmenter
+from src.infrastructure.trimmed_product_cache import TrimmedProductCache
+from src.infrastructure.background_index import BackgroundIndex
+from src.infrastructure.async_logging import LogAggregator, configure_logging, shutdown_logging
+from src.domain.alpha_trim import alpha_bbox, trim_to_alpha
+from src.infrastructure.health import CircuitBreaker, CircuitState, HealthMonitor
 from src.domain.entities import Transform
 
 
@@ -61,6 +74,17 @@ class TestFileService:
         loaded = Image.open(test_path)
         assert loaded.size == (100, 100)
     
+    def test_save_image_with_profile_requires_matching_extension(self):
+        """Testa que o perfil não grava WebP em arquivo .png"""
+        test_image = Image.new('RGB', (100, 100), color='blue')
+        
+        assert self.file_service.save_image(test_image, str(Path(self.temp_dir) / "x.png"), profile="webp") is False
+        assert not (Path(self.temp_dir) / "x.png").exists()
+        
+        assert self.file_service.save_image(test_image, str(Path(self.temp_dir) / "x.webp"), profile="webp") is True
+        with Image.open(Path(self.temp_dir) / "x.webp") as saved:
+            assert saved.format == "WEBP"
+    
     def test_list_backgrounds(self):
         """Testa listagem de backgrounds"""
         self.file_service.ensure_directories()
@@ -218,7 +242,1135 @@ class TestImageCompositionService:
         # Deve funcionar sem erro, produto deve ser reposicionado
         assert result is not None
         assert result.size == (1080, 1080)
+    
+    def test_prepare_background_uses_cache(self):
+        """Testa reutilização do background ajustado a partir do mesmo arquivo"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            bg_path = Path(temp_dir) / "bg.png"
+            Image.new('RGB', (500, 300), color='blue').save(bg_path)
+            
+            first = self.service._prepare_background(Image.open(bg_path))
+            second = self.service._prepare_background(Image.open(bg_path))
+            
+            stats = self.service.get_cache_stats()
+            assert second is first
+            assert stats['hits'] == 1
+            assert stats['misses'] == 1
+    
+    def test_prepare_background_cache_invalidated_by_mtime(self):
+        """Testa que arquivo alterado em disco gera nova entrada no cache"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            bg_path = Path(temp_dir) / "bg.png"
+            Image.new('RGB', (500, 300), color='blue').save(bg_path)
+            self.service._prepare_background(Image.open(bg_path))
+            
+            Image.new('RGB', (500, 300), color='red').save(bg_path)
+            os.utime(bg_path, ns=(0, 0))
+            prepared = self.service._prepare_background(Image.open(bg_path))
+            
+            assert prepared.getpixel((540, 540)) == (255, 0, 0)
+            assert self.service.get_cache_stats()['misses'] == 2
+    
+    def test_background_cache_lru_eviction(self):
+        """Testa remoção do background menos usado quando o cache enche"""
+        service = ImageCompositionService(background_cache_size=1)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for name in ("a.png", "b.png"):
+                path = Path(temp_dir) / name
+                Image.new('RGB', (200, 200), color='green').save(path)
+                paths.append(path)
+            
+            for path in paths + paths[:1]:
+                service._prepare_background(Image.open(path))
+            
+            stats = service.get_cache_stats()
+            assert stats['entries'] == 1
+            assert stats['evictions'] == 2
+            assert stats['hits'] == 0
+    
+    def test_prepare_background_in_memory_not_cached(self):
+        """Testa que imagens sem arquivo de origem não entram no cache"""
+        self.service._prepare_background(Image.new('RGB', (500, 300)))
+        
+        assert self.service.get_cache_stats()['entries'] == 0
+
+    def test_numpy_compositor_matches_pil(self):
+        """Testa paridade pixel a pixel entre os motores numpy e pil"""
+        import numpy as np
+
+        rng = np.random.default_rng(7)
+        background = Image.fromarray(rng.integers(0, 256, (1080, 1080, 3), dtype=np.uint8), 'RGB')
+        product = Image.fromarray(rng.integers(0, 256, (300, 200, 4), dtype=np.uint8), 'RGBA')
+        transform = Transform(x=40, y=-25, scale=1.3, rotation=17)
+
+        expected = self.service.compose_preview(product, background, transform)
+        numpy_service = ImageCompositionService(compositor="numpy")
+
+        # Duas chamadas seguidas: buffers reutilizados não podem vazar resultados
+        numpy_service.compose_preview(product, Image.new('RGB', (1080, 1080)), transform)
+        result = numpy_service.compose_preview(product, background, transform)
+
+        diff = np.abs(np.asarray(result, dtype=np.int16) - np.asarray(expected, dtype=np.int16))
+        assert result.size == expected.size
+        assert diff.max() <= 1
+
+    def test_numpy_compositor_clips_off_canvas(self):
+        """Testa que o motor numpy recorta o produto fora do canvas sem reposicionar"""
+        service = ImageCompositionService(compositor="numpy")
+        product = Image.new('RGBA', (200, 200), color=(255, 0, 0, 255))
+        background = Image.new('RGB', (1080, 1080), color=(0, 0, 255))
+
+        # Centro do produto na borda esquerda: metade fica fora do canvas
+        result = service.compose_preview(product, background, Transform(x=-540, y=0, scale=1.0, rotation=0))
+
+        assert result.getpixel((0, 540)) == (255, 0, 0)
+        assert result.getpixel((99, 540)) == (255, 0, 0)
+        assert result.getpixel((100, 540)) == (0, 0, 255)
+
+    def test_preview_proxy_size_and_cache(self):
+        """Testa preview reduzido com proxies de produto e background em cache"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            bg_path = Path(temp_dir) / "bg.jpg"
+            product_path = Path(temp_dir) / "produto.png"
+            Image.new('RGB', (1600, 1200), color='blue').save(bg_path)
+            Image.new('RGBA', (400, 300), color=(255, 0, 0, 255)).save(product_path)
+
+            transform = Transform(x=30, y=0, scale=1.5, rotation=20)
+            for _ in range(3):
+                preview = self.service.compose_preview_proxy(
+                    Image.open(product_path), Image.open(bg_path), transform
+                )
+
+            stats = self.service.get_preview_cache_stats()
+            assert preview.size == (360, 360)
+            assert stats['misses'] == 2
+            assert stats['hits'] == 4
+
+    def test_preview_proxy_matches_downscaled_export(self):
+        """Testa que o preview reproduz a geometria da composição final"""
+        import numpy as np
+
+        background = Image.new('RGB', (1080, 1080), color=(0, 0, 255))
+        product = Image.new('RGBA', (300, 300), color=(255, 0, 0, 255))
+        transform = Transform(x=90, y=-60, scale=1.2, rotation=0)
+
+        preview = self.service.compose_preview_proxy(product, background, transform, product_key=("p",))
+        full = self.service.compose_preview(product, background, transform).resize((360, 360), Image.Resampling.BILINEAR)
+
+        diff = np.abs(np.asarray(preview, dtype=np.int16) - np.asarray(full, dtype=np.int16))
+        assert diff.mean() < 2
+
+    def test_export_unaffected_by_preview(self):
+        """Testa que o export após previews é idêntico a uma composição direta"""
+        import numpy as np
+
+        background = Image.linear_gradient('L').convert('RGB').resize((1200, 900))
+        product = Image.radial_gradient('L').convert('RGBA').resize((400, 260))
+        transform = Transform(x=-45, y=70, scale=1.3, rotation=25)
+
+        for scale in (0.5, 1.0, 2.0):
+            preview_transform = Transform(x=transform.x, y=transform.y, scale=scale, rotation=transform.rotation)
+            self.service.compose_preview_proxy(product, background, preview_transform, product_key=("p",))
+        exported = self.service.compose_preview(product, background, transform)
+        direct = ImageCompositionService().compose_preview(product, background, transform)
+
+        assert np.array_equal(np.asarray(exported), np.asarray(direct))
+
+    def test_compose_matrix_matches_pairwise(self):
+        """Testa matriz produto x background igual à composição par a par"""
+        import numpy as np
+
+        products = [Image.radial_gradient('L').convert('RGBA').resize((300, 200)),
+                    Image.new('RGBA', (150, 150), (255, 0, 0, 200))]
+        backgrounds = [Image.new('RGB', (1080, 1080), 'white'),
+                       Image.linear_gradient('L').convert('RGB').resize((1200, 900))]
+        transforms = [Transform(x=0, y=0, scale=1.0, rotation=0), Transform(x=-40, y=60, scale=1.5, rotation=20)]
+        transform_for = lambda i, j: transforms[(i + j) % 2]
+
+        results = list(self.service.compose_matrix(iter(products), backgrounds, transform_for))
+
+        assert [(i, j) for i, j, _ in results] == [(0, 0), (0, 1), (1, 0), (1, 1)]
+        for i, j, composition in results:
+            direct = ImageCompositionService().compose_preview(products[i], backgrounds[j], transform_for(i, j))
+            assert np.array_equal(np.asarray(composition), np.asarray(direct))
+
+    def test_compose_matrix_transforms_once_per_transform(self):
+        """Testa O(P x T) reamostragens em vez de O(P x B)"""
+        products = [Image.new('RGBA', (200, 200), (255, 0, 0, 255)) for _ in range(2)]
+        backgrounds = [Image.new('RGB', (1080, 1080), color) for color in ('white', 'black', 'blue')]
+
+        with patch.object(self.service, 'render_sprite', wraps=self.service.render_sprite) as render:
+            results = list(self.service.compose_matrix(products, backgrounds, Transform(x=0, y=0, scale=1.2, rotation=15)))
+
+        assert len(results) == 6
+        assert render.call_count == 2
+
+    def test_compose_preview_reuses_sprite_by_product_key(self):
+        """Testa produto transformado reaproveitado entre backgrounds"""
+        product = Image.new('RGBA', (200, 200), (255, 0, 0, 255))
+        transform = Transform(x=10, y=0, scale=0.8, rotation=5)
+
+        for color in ('white', 'black'):
+            self.service.compose_preview(product, Image.new('RGB', (1080, 1080), color), transform,
+                                         product_key=("produto.png", 1))
+
+        stats = self.service.get_sprite_cache_stats()
+        assert (stats['hits'], stats['misses']) == (1, 1)
+
+    def test_compose_preview_builds_matte_cutout_only_on_sprite_miss(self):
+        """Testa AlphaMatte montado só quando o sprite não está em cache"""
+        from src.infrastructure import image_service as image_service_module
+        
+        matte = image_service_module.AlphaMatte(
+            source=Image.new('RGB', (200, 200), (255, 0, 0)),
+            matte=Image.new('L', (200, 200), 255)
+        )
+        transform = Transform(x=0, y=0, scale=0.8, rotation=0)
+        
+        with patch.object(type(matte), 'apply', autospec=True, side_effect=type(matte).apply) as apply:
+            for color in ('white', 'black', 'blue'):
+                self.service.compose_preview(matte, Image.new('RGB', (1080, 1080), color), transform,
+                                             product_key=("produto.png", 1))
+        
+        assert apply.call_count == 1
+        # Sprites têm estatísticas próprias, separadas das de backgrounds
+        assert self.service.get_sprite_cache_stats()['hits'] == 2
+        assert self.service.get_cache_stats()['hits'] == 0
+
+    def test_invalid_compositor(self):
+        """Testa rejeição de motor de composição desconhecido"""
+        with pytest.raises(ValueError):
+            ImageCompositionService(compositor="opencv")
+
+
+class TestAffineTransformEngine:
+    """Testes para AffineTransformEngine"""
+    
+    def setup_method(self):
+        self.engine = AffineTransformEngine()
+        self.product = Image.new('RGBA', (300, 200), color=(255, 0, 0, 255))
+    
+    def test_scale_only_matches_two_pass(self):
+        """Testa que sem rotação o resultado é idêntico ao caminho resize + paste"""
+        import numpy as np
+        
+        background = Image.new('RGB', (1080, 1080), color=(0, 255, 0))
+        product = Image.linear_gradient('L').convert('RGBA').resize((300, 200))
+        transform = Transform(x=25, y=-40, scale=1.7, rotation=0)
+        
+        affine = ImageCompositionService().compose_preview(product, background, transform)
+        two_pass = ImageCompositionService(transform_engine="two_pass").compose_preview(product, background, transform)
+        
+        assert np.array_equal(np.asarray(affine), np.asarray(two_pass))
+    
+    def test_rotation_matches_two_pass_geometry(self):
+        """Testa tamanho e posição do produto rotacionado em uma única passada"""
+        sprite, position = self.engine.render(self.product, (1080, 1080), 1.5, 30, (20, 10))
+        expected = self.product.resize((450, 300)).rotate(30, expand=True)
+        
+        assert abs(sprite.width - expected.width) <= 2
+        assert abs(sprite.height - expected.height) <= 2
+        # Centro do produto no centro do canvas + offset
+        assert abs(position[0] + sprite.width / 2 - 560) <= 1
+        assert abs(position[1] + sprite.height / 2 - 550) <= 1
+        # Rotação anti-horária: canto superior direito sobe
+        bbox = sprite.getchannel('A').point(lambda a: 255 if a > 128 else 0).getbbox()
+        assert bbox[1] <= 1
+    
+    def test_clips_without_clamp(self):
+        """Testa que apenas a parte visível é renderizada"""
+        sprite, position = self.engine.render(self.product, (1080, 1080), 1.0, 45, (-540, 0))
+        
+        assert position[0] == 0
+        assert sprite.width < 200
+    
+    def test_clamp_keeps_product_inside(self):
+        """Testa clamp equivalente ao do compositor PIL"""
+        sprite, position = self.engine.render(self.product, (1080, 1080), 1.0, 45, (540, 540), clamp=True)
+        
+        assert position[0] + sprite.width == 1080
+        assert position[1] + sprite.height == 1080
+        assert sprite.width > 300
+    
+    def test_off_canvas_returns_none(self):
+        """Testa produto totalmente fora do canvas"""
+        sprite, _ = self.engine.render(self.product, (100, 100), 0.1, 10, (500, 500))
+        
+        assert sprite is None
+
+
+class TestDecodedImageCache:
+    """Testes para DecodedImageCache"""
+    
+    def _png_bytes(self, size=(100, 80), color='red'):
+        import io
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color=color).save(buffer, format='PNG')
+        return buffer.getvalue()
+    
+    def test_decodes_each_upload_once(self):
+        """Testa que reruns reaproveitam a imagem decodificada sem reler os bytes"""
+        cache = DecodedImageCache()
+        data = self._png_bytes()
+        reads = Mock(return_value=data)
+        
+        first = cache.image("upload-1", reads)
+        second = cache.image("upload-1", reads)
+        
+        assert second is first
+        assert first.size == (100, 80)
+        assert reads.call_count == 1
+        assert cache.stats()['hits'] == 1
+    
+    def test_same_content_shares_entry(self):
+        """Testa que uploads com o mesmo conteúdo compartilham a decodificação"""
+        cache = DecodedImageCache()
+        data = self._png_bytes()
+        
+        first = cache.image("upload-1", lambda: data)
+        second = cache.image("upload-2", lambda: data)
+        
+        assert second is first
+        assert cache.stats()['entries'] == 1
+    
+    def test_thumbnail_cached_per_size(self):
+        """Testa miniaturas em cache por tamanho"""
+        cache = DecodedImageCache()
+        data = self._png_bytes((400, 200))
+        
+        thumb = cache.thumbnail("upload-1", lambda: data, (100, 100))
+        again = cache.thumbnail("upload-1", lambda: data, (100, 100))
+        
+        assert again is thumb
+        assert thumb.size == (100, 50)
+    
+    def test_evicts_least_recently_used_by_bytes(self):
+        """Testa remoção por limite de bytes mantendo a entrada mais recente"""
+        # Cada imagem ocupa 100 * 100 * 3 bytes
+        cache = DecodedImageCache(max_bytes=70000)
+        uploads = {f"upload-{i}": self._png_bytes((100, 100), color) for i, color in enumerate(['red', 'green', 'blue'])}
+        
+        for file_id, data in uploads.items():
+            cache.image(file_id, lambda data=data: data)
+        cache.image("upload-0", lambda: uploads["upload-0"])
+        
+        stats = cache.stats()
+        assert stats['entries'] == 2
+        assert stats['evictions'] == 2
+        assert stats['size_mb'] <= 70000 / (1024 * 1024)
+
+
+class TestTransparencyPreviewRenderer:
+    """Testes para TransparencyPreviewRenderer"""
+    
+    def setup_method(self):
+        self.renderer = TransparencyPreviewRenderer(tile_size=10)
+    
+    def test_checkerboard_pattern_cached(self):
+        """Testa padrão xadrez gerado uma vez por tamanho"""
+        pattern = self.renderer.checkerboard((40, 30))
+        
+        assert self.renderer.checkerboard((40, 30)) is pattern
+        assert pattern.getpixel((0, 0)) == (240, 240, 240)
+        assert pattern.getpixel((10, 0)) == (200, 200, 200)
+        assert pattern.getpixel((10, 10)) == (240, 240, 240)
+    
+    def test_render_at_display_width(self):
+        """Testa composição na largura de exibição"""
+        image = Image.new('RGBA', (1000, 500), color=(0, 0, 0, 0))
+        image.paste((255, 0, 0, 255), (0, 0, 500, 500))
+        
+        preview = self.renderer.render(image, width=200)
+        
+        assert preview.size == (200, 100)
+        assert preview.mode == 'RGB'
+        assert preview.getpixel((50, 50)) == (255, 0, 0)
+        assert preview.getpixel((160, 0)) == (240, 240, 240)
+    
+    def test_render_opaque_image_unchanged_mode(self):
+        """Testa que imagens sem alpha só são reduzidas"""
+        preview = self.renderer.render(Image.new('RGB', (400, 400), color='blue'), width=200)
+        
+        assert preview.size == (200, 200)
+        assert preview.getpixel((0, 0)) == (0, 0, 255)
+
+
+class TestStreamingArchiveBuilder:
+    """Testes para StreamingArchiveBuilder"""
+    
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.builder = StreamingArchiveBuilder(spool_dir=self.temp_dir)
+    
+    def teardown_method(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _export(self, name, color):
+        path = Path(self.temp_dir) / name
+        Image.new('RGB', (50, 50), color=color).save(path)
+        return str(path)
+    
+    def test_build_stored_entries_from_files(self):
+        """Testa ZIP sem recompressão com o conteúdo idêntico aos arquivos"""
+        import zipfile
+        
+        first = self._export("a_thumb.png", 'red')
+        second = self._export("b_thumb.png", 'blue')
+        
+        archive_path = self.builder.build([(first, "thumb_a.png"), (second, "thumb_b.png")])
+        
+        with zipfile.ZipFile(archive_path) as archive:
+            infos = archive.infolist()
+            assert [info.filename for info in infos] == ["thumb_a.png", "thumb_b.png"]
+            assert all(info.compress_type == zipfile.ZIP_STORED for info in infos)
+            assert archive.read("thumb_a.png") == Path(first).read_bytes()
+    
+    def test_duplicate_names_and_missing_files(self):
+        """Testa nomes duplicados renomeados e arquivos ausentes ignorados"""
+        import zipfile
+        
+        path = self._export("a_thumb.png", 'red')
+        missing = str(Path(self.temp_dir) / "inexistente.png")
+        
+        archive_path = self.builder.build([(path, "thumb.png"), (path, "thumb.png"), (missing, "x.png")])
+        
+        with zipfile.ZipFile(archive_path) as archive:
+            assert archive.namelist() == ["thumb.png", "thumb_1.png"]
+    
+    def test_discard_removes_archive(self):
+        """Testa remoção do ZIP temporário"""
+        archive_path = self.builder.build([])
+        
+        self.builder.discard(archive_path)
+        
+        assert not Path(archive_path).exists()
+
+
+class TestBackgroundRemovalCache:
+    """Testes para BackgroundRemovalCache"""
+    
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = BackgroundRemovalCache(self.temp_dir, max_size_mb=10)
+        self.input_image = Image.new('RGB', (64, 64), color='blue')
+        self.result_image = Image.new('RGBA', (64, 64), color=(0, 0, 255, 128))
+    
+    def teardown_method(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_put_and_get_roundtrip(self):
+        """Testa gravação e leitura de resultado em cache"""
+        digest = self.cache.digest(self.input_image)
+        
+        assert self.cache.put(digest, self.result_image, "bria-rmbg-1.4") is True
+        cached = self.cache.get(digest, ["bria-rmbg-1.4"])
+        
+        assert cached is not None
+        image, model_id = cached
+        assert model_id == "bria-rmbg-1.4"
+        assert image.mode == 'RGBA'
+        assert image.getpixel((0, 0)) == (0, 0, 255, 128)
+        assert list(Path(self.temp_dir).rglob("*.tmp")) == []
+    
+    def test_matte_entries_are_separate_and_small(self):
+        """Testa máscara alpha em cache: modo 'L', referência à original e menor que o RGBA"""
+        import numpy as np
+        rng = np.random.default_rng(0)
+        noisy = Image.fromarray(rng.integers(0, 256, (64, 64, 3), dtype=np.uint8), 'RGB')
+        matte = Image.new('L', (64, 64), 0)
+        matte.paste(255, (16, 16, 48, 48))
+        cutout = noisy.convert('RGBA')
+        cutout.putalpha(matte)
+        digest = self.cache.digest(noisy)
+        
+        self.cache.put(digest, cutout, "bria-rmbg-1.4")
+        assert self.cache.get_matte(digest, ["bria-rmbg-1.4"]) is None
+        assert self.cache.put_matte(digest, matte, "bria-rmbg-1.4", source="/fotos/produto.jpg")
+        
+        cached, model_id = self.cache.get_matte(digest, ["bria-rmbg-1.4"])
+        assert cached.mode == 'L'
+        assert cached.tobytes() == matte.tobytes()
+        assert cached.info['source'] == "/fotos/produto.jpg"
+        
+        sizes = sorted(path.stat().st_size for path in Path(self.temp_dir).rglob("*.png"))
+        assert sizes[0] * 10 < sizes[1]
+    
+    def test_digest_depends_on_pixels(self):
+        """Testa que o hash muda quando os pixels mudam"""
+        other = Image.new('RGB', (64, 64), color='red')
+        
+        assert self.cache.digest(self.input_image) == self.cache.digest(self.input_image.copy())
+        assert self.cache.digest(self.input_image) != self.cache.digest(other)
+    
+    def test_get_respects_model_id(self):
+        """Testa que resultados de outro modelo não são usados por engano"""
+        digest = self.cache.digest(self.input_image)
+        self.cache.put(digest, self.result_image, "rembg-u2net")
+        
+        assert self.cache.get(digest, ["bria-rmbg-1.4"]) is None
+        assert self.cache.get(digest, ["bria-rmbg-1.4", "rembg-u2net"])[1] == "rembg-u2net"
+        assert self.cache.stats()['hits'] == 1
+        assert self.cache.stats()['misses'] == 1
+    
+    def test_eviction_removes_least_recently_used(self):
+        """Testa remoção LRU quando o limite de tamanho é excedido"""
+        import random
+        
+        def noisy_image(seed):
+            rng = random.Random(seed)
+            return Image.frombytes('RGBA', (256, 256), bytes(rng.getrandbits(8) for _ in range(256 * 256 * 4)))
+        
+        cache = BackgroundRemovalCache(self.temp_dir, max_size_mb=1)
+        digests = []
+        for seed in range(5):
+            digest = cache.digest(noisy_image(seed))
+            cache.put(digest, noisy_image(seed), "bria-rmbg-1.4")
+            digests.append(digest)
+            # Garantir mtimes distintos para a ordem LRU
+            for path in Path(self.temp_dir).rglob("*.png"):
+                os.utime(path, (path.stat().st_mtime - 1, path.stat().st_mtime - 1))
+        
+        assert cache.stats()['evictions'] > 0
+        assert cache.stats()['size_mb'] <= 1
+        assert cache.get(digests[-1], ["bria-rmbg-1.4"]) is not None
+        assert cache.get(digests[0], ["bria-rmbg-1.4"]) is None
+
+
+class TestGradioBackgroundRemovalClient:
+    """Testes para GradioBackgroundRemovalClient (sem acesso à rede)"""
+    
+    def setup_method(self):
+        self.client = GradioBackgroundRemovalClient()
+        self.image = Image.new('RGB', (32, 32), color='red')
+        self.local_result = Image.new('RGBA', (32, 32))
+    
+    def test_per_item_fallback_keeps_api_enabled(self):
+        """Testa que timeout com sticky_fallback=False não desvia chamadas seguintes"""
+        with patch.object(self.client, 'health_check', return_value=True), \
+             patch.object(self.client, 'predict', side_effect=TimeoutError()), \
+             patch.object(self.client, '_remove_background_local', return_value=self.local_result):
+            result = self.client.remove_background(self.image, timeout=1, sticky_fallback=False)
+        
+        assert result is self.local_result
+        assert self.client.last_source == "fallback_local"
+        assert self.client.use_fallback is False
+    
+    def test_sticky_fallback_by_default(self):
+        """Testa que falha da API ativa o fallback para as próximas chamadas"""
+        with patch.object(self.client, 'health_check', return_value=False), \
+             patch.object(self.client, 'predict', side_effect=Exception("API Error")), \
+             patch.object(self.client, '_remove_background_local', return_value=self.local_result):
+            self.client.remove_background(self.image)
+        
+        assert self.client.use_fallback is True
+
+    
+    def test_transport_passes_original_file_through(self):
+        """Testa que imagem aberta de arquivo é enviada pelo caminho original"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "produto.jpg")
+            self.image.save(path, 'JPEG')
+            
+            input_path, is_temp = self.client._prepare_transport(Image.open(path))
+        
+        assert input_path == path
+        assert is_temp is False
+    
+    def test_transport_spools_encoded_bytes_unchanged(self):
+        """Testa que bytes originais vão para o spool sem recodificação"""
+        import io
+        buffer = io.BytesIO()
+        self.image.save(buffer, 'JPEG', quality=70)
+        encoded = buffer.getvalue()
+        image = Image.open(io.BytesIO(encoded))
+        image.load()
+        
+        input_path, is_temp = self.client._prepare_transport(image, encoded)
+        try:
+            assert is_temp is True
+            assert input_path.endswith('.jpg')
+            assert Path(input_path).read_bytes() == encoded
+        finally:
+            os.unlink(input_path)
+    
+    def test_decode_prediction_from_memory(self):
+        """Testa decodificação de resposta em bytes e data URL"""
+        import io
+        import base64
+        buffer = io.BytesIO()
+        self.local_result.save(buffer, 'PNG')
+        data = buffer.getvalue()
+        
+        from_bytes, path = self.client._decode_prediction(data)
+        assert from_bytes.size == (32, 32) and path is None
+        
+        data_url = "data:image/png;base64," + base64.b64encode(data).decode()
+        from_url, path = self.client._decode_prediction([data_url])
+        assert from_url.mode == 'RGBA' and path is None
+        
+        assert self.client._decode_prediction(None) == (None, None)
+    
+    def test_remove_background_does_not_probe_health(self):
+        """Testa que remoção por imagem não executa health check"""
+        with patch.object(self.client, '_probe') as probe, \
+             patch.object(self.client, 'predict', return_value=None), \
+             patch.object(self.client, '_remove_background_local', return_value=self.local_result):
+            self.client.remove_background(self.image)
+            self.client.remove_background(self.image)
+        
+        probe.assert_not_called()
+    
+    def test_health_check_probes_in_background(self):
+        """Testa que health_check retorna o estado em cache e sonda em segundo plano"""
+        with patch.object(self.client.health, 'probe') as probe, \
+             patch.object(self.client.health, 'refresh_async') as refresh_async:
+            assert self.client.health_check() is False
+        
+        probe.assert_not_called()
+        refresh_async.assert_called_once()
+    
+    def test_health_check_force_probes_synchronously(self):
+        """Testa sonda síncrona apenas com force=True"""
+        with patch.object(self.client.health, 'probe', return_value=True) as probe:
+            assert self.client.health_check(force=True) is True
+            assert self.client.health_check() is True
+        
+        probe.assert_called_once()
+    
+    def test_cached_fallback_result_replaced_when_api_recovers(self):
+        """Testa que resultado do rembg em cache só é servido com a API indisponível"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = GradioBackgroundRemovalClient(result_cache=BackgroundRemovalCache(temp_dir))
+            fallback = Image.new('RGBA', (32, 32), (0, 0, 0, 0))
+            bria = Image.new('RGBA', (32, 32), (255, 0, 0, 255))
+            
+            client.circuit.trip()
+            with patch.object(client, '_remove_background_local', return_value=fallback):
+                client.remove_background(self.image)
+            assert client.remove_background(self.image).getpixel((0, 0)) == (0, 0, 0, 0)
+            assert client.last_source == "cache_hit"
+            
+            client.circuit.reset()
+            with patch.object(client, '_remove_background_uncached', return_value=bria) as remote:
+                assert client.remove_background(self.image) is bria
+            remote.assert_called_once()
+            
+            assert client.remove_background(self.image).getpixel((0, 0)) == (255, 0, 0, 255)
+            assert client.last_source == "cache_hit"
+    
+    def test_half_open_probe_keeps_circuit_open_when_endpoint_down(self):
+        """Testa que cliente em cache não basta: sonda sem resposta mantém o circuito aberto"""
+        import httpx
+        clock = FakeClock()
+        client = GradioBackgroundRemovalClient(circuit_breaker=CircuitBreaker(base_backoff=10, clock=clock))
+        client.client = Mock(src="https://bria.example/", headers={})
+        client.circuit.trip()
+        clock.now = 10
+        assert client.circuit.state == CircuitState.HALF_OPEN
+        
+        with patch('httpx.get', side_effect=httpx.ConnectError("endpoint fora do ar")) as get:
+            assert client.health.refresh() is False
+        
+        assert get.call_args.args[0] == "https://bria.example/config"
+        assert get.call_args.kwargs['timeout'] == client.probe_timeout
+        assert client.circuit.state == CircuitState.OPEN
+        
+        clock.now = 40
+        with patch('httpx.get', return_value=Mock(status_code=200)):
+            assert client.health.refresh() is True
+        assert client.circuit.state == CircuitState.CLOSED
+    
+    def test_open_circuit_skips_remote_call(self):
+        """Testa que circuito aberto desvia direto para o fallback local"""
+        self.client.circuit.trip()
+        
+        with patch.object(self.client, 'predict') as predict, \
+             patch.object(self.client, '_remove_background_local', return_value=self.local_result):
+            result = self.client.remove_background(self.image)
+        
+        predict.assert_not_called()
+        assert result is self.local_result
+        assert self.client.use_fallback is True
+
+
+class TestRembgSessionRegistry:
+    """Testes para o registro compartilhado de sessões rembg"""
+    
+    def setup_method(self):
+        self.factory = Mock(side_effect=lambda model: f"sessao-{model}")
+        self.registry = RembgSessionRegistry(idle_timeout=0, session_factory=self.factory)
+    
+    def test_clients_load_lazily_and_share_sessions(self):
+        """Testa que criar clientes não carrega modelo e que a sessão é compartilhada"""
+        clients = [GradioBackgroundRemovalClient(session_registry=self.registry) for _ in range(3)]
+        self.factory.assert_not_called()
+        
+        with patch('src.infrastructure.gradio_client.REMBG_AVAILABLE', True), \
+             patch('src.infrastructure.gradio_client.remove', create=True,
+                   side_effect=lambda image, session: image) as remove:
+            for client in clients:
+                client._remove_background_local(Image.new('RGB', (8, 8)))
+        
+        self.factory.assert_called_once_with("u2net")
+        assert {call.kwargs['session'] for call in remove.call_args_list} == {"sessao-u2net"}
+    
+    def test_concurrent_first_use_loads_once(self):
+        """Testa carregamento único com várias threads pedindo o mesmo modelo"""
+        from concurrent.futures import ThreadPoolExecutor
+        import time
+        
+        def slow_factory(model):
+            time.sleep(0.05)
+            return object()
+        
+        registry = RembgSessionRegistry(idle_timeout=0, session_factory=Mock(side_effect=slow_factory))
+        
+        def use(_):
+            with registry.session("u2netp") as session:
+                return session
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            sessions = set(pool.map(use, range(16)))
+        
+        assert len(sessions) == 1
+        assert registry.stats()['loads'] == 1
+    
+    def test_models_are_selectable(self):
+        """Testa um carregamento por modelo e o apelido isnet"""
+        with self.registry.session("silueta"), self.registry.session("isnet") as session:
+            assert session == "sessao-isnet-general-use"
+        
+        assert sorted(self.registry.loaded_models()) == ["isnet-general-use", "silueta"]
+        with pytest.raises(ValueError):
+            resolve_model("modelo-inexistente")
+    
+    def test_unload_idle_keeps_sessions_in_use(self):
+        """Testa descarregamento de sessões ociosas, nunca das que estão em uso"""
+        with self.registry.session("u2net"):
+            with self.registry.session("u2netp"):
+                pass
+            assert self.registry.unload_idle(max_idle=0) == ["u2netp"]
+        
+        assert self.registry.unload_idle(max_idle=3600) == []
+        assert self.registry.unload_all() == ["u2net"]
+        
+        # Próximo uso recarrega sob demanda
+        with self.registry.session("u2net"):
+            pass
+        assert self.registry.stats()['loads'] == 3
+
+
+class FakeOnnxSession:
+    """Sessão ONNX falsa: máscara = canal vermelho normalizado da entrada"""
+    
+    def __init__(self, max_batch=None):
+        self.max_batch = max_batch
+        self.batch_sizes = []
+        self.inner_session = self
+    
+    def get_inputs(self):
+        return [Mock(name="input")]
+    
+    def run(self, outputs, feed):
+        batch = next(iter(feed.values()))
+        if self.max_batch is not None and len(batch) > self.max_batch:
+            raise RuntimeError("dimensão de lote inválida")
+        self.batch_sizes.append(len(batch))
+        return [batch[:, :1]]
+
+
+class TestBatchSegmenter:
+    """Testes para a inferência local em lotes"""
+    
+    def make_segmenter(self, session, batch_size):
+        registry = RembgSessionRegistry(idle_timeout=0, session_factory=lambda model: session)
+        return BatchSegmenter("u2netp", batch_size, registry)
+    
+    def make_images(self, count):
+        images = []
+        for idx in range(count):
+            image = Image.new('RGB', (64 + idx, 48), color=(0, 0, 0))
+            image.paste((255, 255, 255), (0, 0, 32, 48))
+            images.append(image)
+        return images
+    
+    def test_runs_session_once_per_batch(self):
+        """Testa uma inferência por lote, com o último lote parcial"""
+        session = FakeOnnxSession()
+        segmenter = self.make_segmenter(session, batch_size=4)
+        images = self.make_images(10)
+        
+        results = segmenter.remove(images)
+        
+        assert session.batch_sizes == [4, 4, 2]
+        assert [result.size for result in results] == [image.size for image in images]
+        assert all(result.mode == 'RGBA' for result in results)
+    
+    def test_mask_applied_to_decoded_image(self):
+        """Testa recorte: região clara opaca, região escura transparente"""
+        segmenter = self.make_segmenter(FakeOnnxSession(), batch_size=2)
+        
+        result = segmenter.remove(self.make_images(1))[0]
+        
+        assert result.getpixel((5, 24)) == (255, 255, 255, 255)
+        assert result.getpixel((60, 24))[3] == 0
+    
+    def test_falls_back_to_single_image_inference(self):
+        """Testa modelo com lote fixo em 1: mesma saída, uma inferência por imagem"""
+        session = FakeOnnxSession(max_batch=1)
+        segmenter = self.make_segmenter(session, batch_size=4)
+        
+        results = segmenter.remove(self.make_images(3))
+        
+        assert len(results) == 3
+        assert session.batch_sizes == [1, 1, 1]
+    
+    def test_client_batches_only_cache_misses(self):
+        """Testa que o cliente consulta o cache e infere só o que falta"""
+        session = FakeOnnxSession()
+        registry = RembgSessionRegistry(idle_timeout=0, session_factory=lambda model: session)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = BackgroundRemovalCache(temp_dir)
+            client = GradioBackgroundRemovalClient(result_cache=cache, session_registry=registry,
+                                                   local_batch_size=8)
+            images = self.make_images(3)
+            cache.put(cache.digest(images[1]), Image.new('RGBA', images[1].size), client.rembg_model_id)
+            
+            with patch('src.infrastructure.gradio_client.REMBG_AVAILABLE', True):
+                results = client.remove_backgrounds_local(images)
+        
+        assert [source for _, source in results] == ["fallback_local", "cache_hit", "fallback_local"]
+        assert session.batch_sizes == [2]
+    
+    @pytest.mark.parametrize("model", ["u2netp", "isnet-general-use"])
+    def test_batched_masks_match_rembg_predict(self, model):
+        """Testa que a máscara em lote bate com o predict por imagem da sessão do rembg"""
+        import numpy as np
+        rembg = pytest.importorskip("rembg")
+        session = rembg.new_session(model)
+        registry = RembgSessionRegistry(idle_timeout=0, session_factory=lambda name: session)
+        segmenter = BatchSegmenter(model, 3, registry)
+        images = self.make_images(3)
+        
+        with registry.session(model) as shared:
+            batch = np.stack([segmenter.preprocess(image) for image in images])
+            masks = segmenter.masks_from_output(segmenter._run(shared, batch), [image.size for image in images])
+        
+        for image, mask in zip(images, masks):
+            expected = np.asarray(session.predict(image)[0], dtype=np.int16)
+            assert np.abs(np.asarray(mask, dtype=np.int16) - expected).max() <= 2
+
+
+class TestBackgroundIndex:
+    """Testes para o índice persistido de backgrounds"""
+    
+    def test_refresh_indexes_and_generates_previews(self):
+        """Testa dimensões, hash e miniatura reduzida"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            backgrounds_dir = os.path.join(temp_dir, "backgrounds")
+            os.makedirs(backgrounds_dir)
+            Image.new('RGB', (800, 400), 'blue').save(os.path.join(backgrounds_dir, "b.png"))
+            Image.new('RGB', (300, 300), 'red').save(os.path.join(backgrounds_dir, "a.jpg"))
+            Path(backgrounds_dir, "notas.txt").write_text("ignorar")
+            
+            index = BackgroundIndex(backgrounds_dir, os.path.join(temp_dir, "index"), preview_size=64)
+            infos = index.refresh()
+            
+            assert [info.filename for info in infos] == ["a.jpg", "b.png"]
+            assert infos[1].dimensions == (800, 400)
+            assert infos[1].digest
+            with Image.open(infos[1].thumbnail_path) as preview:
+                assert preview.size == (64, 32)
+    
+    def test_refresh_reopens_only_changed_files(self):
+        """Testa reaproveitamento por mtime, inclusive entre instâncias"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            backgrounds_dir = os.path.join(temp_dir, "backgrounds")
+            index_dir = os.path.join(temp_dir, "index")
+            os.makedirs(backgrounds_dir)
+            for name in ("a.png", "b.png"):
+                Image.new('RGB', (100, 100), 'white').save(os.path.join(backgrounds_dir, name))
+            BackgroundIndex(backgrounds_dir, index_dir).refresh()
+            
+            Image.new('RGB', (200, 100), 'black').save(os.path.join(backgrounds_dir, "b.png"))
+            os.utime(os.path.join(backgrounds_dir, "b.png"), ns=(1, 1))
+            
+            index = BackgroundIndex(backgrounds_dir, index_dir)
+            with patch("src.infrastructure.background_index.Image.open", wraps=Image.open) as opened:
+                infos = index.refresh()
+            
+            assert opened.call_count == 1
+            assert index.stats()['reused'] == 1
+            assert infos[1].dimensions == (200, 100)
+    
+    def test_removed_background_drops_its_preview(self):
+        """Testa remoção da entrada e da miniatura órfã"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            backgrounds_dir = os.path.join(temp_dir, "backgrounds")
+            os.makedirs(backgrounds_dir)
+            Image.new('RGB', (50, 50), 'green').save(os.path.join(backgrounds_dir, "a.png"))
+            index = BackgroundIndex(backgrounds_dir, os.path.join(temp_dir, "index"))
+            preview = index.refresh()[0].thumbnail_path
+            
+            os.unlink(os.path.join(backgrounds_dir, "a.png"))
+            
+            assert index.refresh() == []
+            assert not os.path.exists(preview)
+            assert index.get("a.png") is None
+
+
+class TestAlphaTrim:
+    """Testes para o recorte ao conteúdo visível"""
+    
+    def make_product(self):
+        product = Image.new('RGBA', (200, 100), (0, 0, 0, 0))
+        product.paste((255, 0, 0, 255), (50, 20, 90, 80))
+        return product
+    
+    def test_trim_to_alpha_bbox(self):
+        """Testa caixa do alpha e recorte das margens transparentes"""
+        product = self.make_product()
+        
+        assert alpha_bbox(product) == (50, 20, 90, 80)
+        assert trim_to_alpha(product).size == (40, 60)
+        assert alpha_bbox(Image.new('RGB', (10, 10))) == (0, 0, 10, 10)
+        assert alpha_bbox(Image.new('RGBA', (10, 10))) is None
+    
+    def test_untrimmed_image_is_returned_as_is(self):
+        """Testa que imagem sem margens não é copiada"""
+        opaque = Image.new('RGBA', (10, 10), (1, 2, 3, 255))
+        assert trim_to_alpha(opaque) is opaque
+    
+    def test_trimmed_product_cache_loads_once_per_file(self):
+        """Testa produto recortado decodificado uma vez por arquivo/mtime"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "produto.png")
+            self.make_product().save(path)
+            cache = TrimmedProductCache()
+            
+            first = cache.load(path)
+            second = cache.load(path)
+        
+        assert first is second
+        assert first.size == (40, 60)
+        assert cache.stats()['hits'] == 1
+
+
+class FakeClock:
+    """Relógio controlável para testes de backoff"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Testes para CircuitBreaker"""
+    
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, base_backoff=10, max_backoff=40, clock=self.clock)
+    
+    def test_opens_after_threshold(self):
+        """Testa abertura após falhas consecutivas"""
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitState.CLOSED
+        
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitState.OPEN
+        assert self.breaker.allow_request() is False
+    
+    def test_half_open_after_backoff(self):
+        """Testa passagem para half_open quando o backoff expira"""
+        self.breaker.trip()
+        
+        self.clock.now = 9.9
+        assert self.breaker.state == CircuitState.OPEN
+        
+        self.clock.now = 10
+        assert self.breaker.state == CircuitState.HALF_OPEN
+        assert self.breaker.allow_request() is False
+    
+    def test_exponential_backoff(self):
+        """Testa que reaberturas sem sucesso dobram o backoff até o máximo"""
+        retries = []
+        for _ in range(4):
+            self.breaker.trip()
+            retries.append(self.breaker.retry_in())
+            self.clock.now += retries[-1]
+        
+        assert retries == [10, 20, 40, 40]
+        
+        self.breaker.record_success()
+        self.breaker.trip()
+        assert self.breaker.retry_in() == 10
+    
+    def test_transition_metrics(self):
+        """Testa contadores de transições de estado"""
+        self.breaker.trip()
+        self.clock.now = 10
+        self.breaker.state
+        self.breaker.record_success()
+        
+        metrics = self.breaker.metrics()
+        assert metrics['transitions'] == {
+            'closed->open': 1,
+            'open->half_open': 1,
+            'half_open->closed': 1
+        }
+        assert len(metrics['history']) == 3
+
+
+class TestHealthMonitor:
+    """Testes para HealthMonitor"""
+    
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(clock=self.clock)
+        self.probe = Mock(return_value=True)
+        self.monitor = HealthMonitor(self.probe, self.breaker, ttl=30, clock=self.clock)
+    
+    def test_check_caches_result_for_ttl(self):
+        """Testa que a sonda só é repetida após o TTL"""
+        assert self.monitor.check() is True
+        assert self.monitor.check() is True
+        assert self.probe.call_count == 1
+        
+        self.clock.now = 30
+        self.monitor.check()
+        assert self.probe.call_count == 2
+    
+    def test_failed_probe_opens_circuit(self):
+        """Testa que sonda com falha abre o circuito"""
+        self.probe.return_value = False
+        
+        assert self.monitor.check() is False
+        assert self.breaker.state == CircuitState.OPEN
+    
+    def test_snapshot_does_not_probe(self):
+        """Testa que snapshot lê apenas o estado em cache"""
+        snapshot = self.monitor.snapshot()
+        
+        self.probe.assert_not_called()
+        assert snapshot['available'] is None
+        assert snapshot['circuit']['state'] == CircuitState.CLOSED
+
+
+class TestAsyncLogging:
+    """Testes para logging em fila e resumo de eventos por imagem"""
+    
+    def setup_method(self):
+        shutdown_logging()
+    
+    def teardown_method(self):
+        shutdown_logging()
+    
+    def test_aggregator_summarizes_per_interval(self):
+        """Testa um INFO por intervalo em vez de um por imagem"""
+        import logging
+        
+        clock = FakeClock()
+        logger = Mock()
+        logger.isEnabledFor.return_value = False
+        aggregator = LogAggregator(logger, "Imagens carregadas", interval=10, clock=clock)
+        
+        for _ in range(50):
+            aggregator.record("%s", "produto.png")
+        assert logger.info.call_count == 0
+        logger.debug.assert_not_called()
+        
+        clock.now = 10
+        aggregator.record("%s", "produto.png")
+        aggregator.record("%s", "produto.png")
+        aggregator.flush()
+        
+        assert [call.args[0] % call.args[1:] for call in logger.info.call_args_list] == [
+            "Imagens carregadas: 51 em 10.0s (total 51)",
+            "Imagens carregadas: 1 em 0.0s (total 52)"
+        ]
+    
+    def test_aggregator_debug_uses_lazy_arguments(self):
+        """Testa DEBUG por imagem com formatação lazy (evento e mensagem como args)"""
+        logger = Mock()
+        logger.isEnabledFor.return_value = True
+        aggregator = LogAggregator(logger, "100% carregadas", interval=10, clock=FakeClock())
+        
+        aggregator.record("%s (%d KB)", "produto.png", 12)
+        
+        logger.debug.assert_called_once_with("%s: %s (%d KB)", "100% carregadas", "produto.png", 12)
+    
+    def test_configure_logging_writes_through_queue_with_rotation(self):
+        """Testa QueueHandler no root e arquivo rotativo gravado pelo listener"""
+        import logging
+        from logging.handlers import QueueHandler, RotatingFileHandler
+        from src.config import LoggingConfig
+        
+        root = logging.getLogger()
+        previous_level = root.level
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_path = os.path.join(temp_dir, "app.log")
+            config = LoggingConfig(file_path=log_path, max_file_size=2048, backup_count=2)
+            listener = configure_logging(config)
+            try:
+                assert configure_logging(config) is listener
+                assert any(isinstance(handler, QueueHandler) for handler in root.handlers)
+                rotating = [h for h in listener.handlers if isinstance(h, RotatingFileHandler)][0]
+                assert (rotating.maxBytes, rotating.backupCount) == (2048, 2)
+                
+                logging.getLogger("teste.async").warning("mensagem enfileirada")
+            finally:
+                shutdown_logging()
+                root.setLevel(previous_level)
+            
+            assert "mensagem enfileirada" in Path(log_path).read_text(encoding='utf-8')
+            assert not any(isinstance(handler, QueueHandler) for handler in root.handlers)
+    
+    def test_configure_logging_rebuilds_on_config_change(self):
+        """Testa que outra configuração troca o listener em vez de ser ignorada"""
+        import logging
+        from logging.handlers import QueueHandler, RotatingFileHandler
+        from src.config import LoggingConfig
+        
+        root = logging.getLogger()
+        previous_level = root.level
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = configure_logging(LoggingConfig(file_path=os.path.join(temp_dir, "a.log")))
+            try:
+                second = configure_logging(LoggingConfig(file_path=os.path.join(temp_dir, "b.log"),
+                                                         max_file_size=4096, backup_count=1))
+                
+                assert second is not first
+                assert sum(isinstance(handler, QueueHandler) for handler in root.handlers) == 1
+                rotating = [h for h in second.handlers if isinstance(h, RotatingFileHandler)][0]
+                assert (rotating.maxBytes, rotating.backupCount) == (4096, 1)
+            finally:
+                shutdown_logging()
+                root.setLevel(previous_level)
+    
+    def test_aggregator_drain_hands_counts_to_another(self):
+        """Testa repasse das contagens de um worker para o agregador do processo principal"""
+        clock = FakeClock()
+        worker_logger, parent_logger = Mock(), Mock()
+        worker_logger.isEnabledFor.return_value = False
+        worker = LogAggregator(worker_logger, "Imagens salvas", interval=float('inf'), clock=clock)
+        parent = LogAggregator(parent_logger, "Imagens salvas", interval=10, clock=clock)
+        
+        worker.record()
+        worker.record()
+        parent.add(worker.drain())
+        worker.flush()
+        parent.flush()
+        
+        worker_logger.info.assert_not_called()
+        info_args = parent_logger.info.call_args.args
+        assert info_args[0] % info_args[1:] == "Imagens salvas: 2 em 0.0s (total 2)"
 
 
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
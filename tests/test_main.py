@@ -0,0 +1,77 @@
+"""Testes para a aplicação (composition root)"""
+from unittest.mock import Mock
+from PIL import Image
+
+from src.main import ThumbnailGeneratorApp
+from src.infrastructure.async_logging import shutdown_logging
+
+
+class TestThumbnailGeneratorApp:
+    """Testes para ThumbnailGeneratorApp"""
+    
+    def teardown_method(self):
+        shutdown_logging()
+    
+    def _app(self, tmp_path, monkeypatch, **env):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("REMOVAL_CACHE_ENABLED", "false")
+        monkeypatch.setenv("LOG_FILE", str(tmp_path / "app.log"))
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return ThumbnailGeneratorApp(str(tmp_path))
+    
+    def test_compose_preview_trims_each_product_file_once(self, tmp_path, monkeypatch):
+        """Testa recorte ao alpha em cache por arquivo e sem recorte repetido do resultado da remoção"""
+        product_path = tmp_path / "produto.png"
+        product = Image.new('RGBA', (200, 100), (0, 0, 0, 0))
+        product.paste((255, 0, 0, 255), (50, 25, 150, 75))
+        product.save(product_path)
+        background_path = tmp_path / "bg.png"
+        Image.new('RGB', (300, 300), color='white').save(background_path)
+        app = self._app(tmp_path, monkeypatch, TRIM_PRODUCTS="true")
+        
+        assert app.compose_preview(str(product_path), str(background_path)) is not None
+        assert app.compose_preview(str(product_path), str(background_path)) is not None
+        assert app.compose_preview(product, str(background_path)) is not None
+        
+        stats = app.trimmed_products.stats()
+        assert (stats['misses'], stats['hits']) == (1, 1)
+    
+    def test_initialize_does_not_wait_for_health_probe(self, tmp_path, monkeypatch):
+        """Testa que a inicialização não executa a sonda da API na thread chamadora"""
+        app = self._app(tmp_path, monkeypatch)
+        app.gradio_client.health.probe = Mock(return_value=True)
+        app.gradio_client.health.refresh_async = Mock()
+        
+        assert app.initialize() is True
+        
+        app.gradio_client.health.probe.assert_not_called()
+        app.gradio_client.health.refresh_async.assert_called_once()
+    
+    def test_trim_is_off_by_default(self, tmp_path, monkeypatch):
+        """Testa que o recorte ao alpha é opcional (muda o posicionamento existente)"""
+        monkeypatch.delenv("TRIM_PRODUCTS", raising=False)
+        app = self._app(tmp_path, monkeypatch)
+        
+        assert app.config.image.trim_products is False
+        assert app.trimmed_products is None
+    
+    def test_complete_workflow_in_matte_mode(self, tmp_path, monkeypatch):
+        """Testa o workflow completo com REMOVAL_OUTPUT=matte (AlphaMatte até a composição)"""
+        product_path = tmp_path / "produto.png"
+        Image.new('RGB', (200, 100), color=(255, 0, 0)).save(product_path)
+        background_path = tmp_path / "bg.png"
+        Image.new('RGB', (300, 300), color='white').save(background_path)
+        
+        app = self._app(tmp_path, monkeypatch, REMOVAL_OUTPUT="matte")
+        client = Mock(use_fallback=False, last_source="success")
+        client.remove_matte.return_value = Image.new('L', (200, 100), 255)
+        app.background_remover.gradio_client = client
+        
+        final_path = app.process_complete_workflow(str(product_path), str(background_path))
+        
+        assert final_path is not None
+        client.remove_matte.assert_called_once()
+        with Image.open(final_path) as exported:
+            assert exported.size == (1080, 1080)
+            assert exported.convert('RGB').getpixel((540, 540)) == (255, 0, 0)
@@ -0,0 +1,37 @@
+"""Testes do custo de inicialização (imports) da aplicação e dos workers
+
+O tempo de import fica em benchmarks/bench_startup.py; aqui só se verifica
+que as dependências pesadas não são carregadas no import.
+"""
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).parent.parent
+SRC_DIR = ROOT_DIR / "src"
+
+# Dependências pesadas que só podem ser importadas no primeiro uso
+HEAVY_MODULES = ("gradio_client", "httpx", "huggingface_hub", "rembg", "onnxruntime", "numpy")
+
+
+def loaded_modules(module: str, cwd: Path) -> set[str]:
+    """Importa o módulo em um processo novo e retorna sys.modules"""
+    code = f"import sys, {module}; print(','.join(sys.modules))"
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join([str(ROOT_DIR), str(SRC_DIR)])}
+    )
+    return set(completed.stdout.strip().split(","))
+
+
+@pytest.mark.parametrize("module", ["src.main", "src.batch_engine", "main", "batch_engine"])
+def test_heavy_dependencies_load_lazily(module, tmp_path):
+    """Testa que CLI/workers de composição não importam API, rembg nem numpy"""
+    loaded = loaded_modules(module, tmp_path)
+
+    assert module in loaded
+    assert not [name for name in HEAVY_MODULES if name in loaded]
@@ -3,6 +3,7 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from PIL import Image
 import tempfile
+import threading
 import os
 
 from src.domain.entities import ValidationResult, BackgroundRemovalResult, Transform
@@ -12,6 +13,7 @@ from src.application.use_cases import (
     BackgroundLoaderUseCase,
     ThumbnailExportUseCase
 )
+from src.application.render_pipeline import ThumbnailRenderPipeline
 
 
 class TestImageValidationUseCase:
@@ -69,6 +71,8 @@ class TestBackgroundRemovalUseCase:
     
     def setup_method(self):
         self.mock_client = Mock()
+        # Mock() é truthy em qualquer atributo: fixar o estado do fallback
+        self.mock_client.use_fallback = False
         self.use_case = BackgroundRemovalUseCase(self.mock_client)
     
     def test_successful_background_removal(self):
@@ -114,6 +118,163 @@ class TestBackgroundRemovalUseCase:
         finally:
             os.unlink(temp_path)
     
+    def test_cache_hit_status(self):
+        """Testa que resultado vindo do cache é reportado como cache_hit"""
+        from src.infrastructure.gradio_client import GradioBackgroundRemovalClient, BRIA_MODEL_ID
+        from src.infrastructure.removal_cache import BackgroundRemovalCache
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = BackgroundRemovalCache(os.path.join(temp_dir, "cache"))
+            client = GradioBackgroundRemovalClient(result_cache=cache)
+            use_case = BackgroundRemovalUseCase(client)
+            
+            temp_path = os.path.join(temp_dir, "produto.png")
+            test_image = Image.new('RGB', (100, 100), color='blue')
+            test_image.save(temp_path)
+            cache.put(cache.digest(test_image), Image.new('RGBA', (100, 100)), BRIA_MODEL_ID)
+            
+            with patch.object(client, '_remove_background_uncached') as uncached:
+                result = use_case.execute(temp_path)
+            
+            uncached.assert_not_called()
+            assert result.success is True
+            assert result.api_status == "cache_hit"
+            assert result.processing_time < 1
+    
+    def test_execute_many_yields_all_results(self):
+        """Testa remoção em lote entregando um resultado por imagem"""
+        self.mock_client.remove_background.return_value = Image.new('RGBA', (100, 100))
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for idx in range(5):
+                path = os.path.join(temp_dir, f"img_{idx}.png")
+                Image.new('RGB', (100, 100), color='blue').save(path)
+                paths.append(path)
+            
+            results = dict(self.use_case.execute_many(paths, max_in_flight=2, timeout=5))
+        
+        assert set(results) == set(paths)
+        assert all(result.success for result in results.values())
+        for call in self.mock_client.remove_background.call_args_list:
+            assert call.kwargs == {'timeout': 5, 'sticky_fallback': False}
+    
+    def test_execute_accepts_encoded_bytes(self):
+        """Testa remoção a partir de bytes em memória, sem arquivo temporário"""
+        import io
+        buffer = io.BytesIO()
+        Image.new('RGB', (100, 100), color='blue').save(buffer, 'PNG')
+        self.mock_client.remove_background.return_value = Image.new('RGBA', (100, 100))
+        
+        result = self.use_case.execute(buffer.getvalue())
+        
+        assert result.success is True
+        call = self.mock_client.remove_background.call_args
+        assert call.kwargs['encoded'] == buffer.getvalue()
+        assert call.args[0].size == (100, 100)
+    
+    def test_execute_many_uses_local_batches_in_fallback(self):
+        """Testa que com fallback ativo as imagens seguem em lotes para o rembg local"""
+        use_case = BackgroundRemovalUseCase(self.mock_client, local_batch_size=2)
+        self.mock_client.use_fallback = True
+        self.mock_client.remove_backgrounds_local.side_effect = lambda images, matte=False: [
+            (Image.new('RGBA', image.size), "fallback_local") for image in images
+        ]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for idx in range(5):
+                path = os.path.join(temp_dir, f"img_{idx}.png")
+                Image.new('RGB', (10, 10)).save(path)
+                paths.append(path)
+            
+            results = dict(use_case.execute_many(paths))
+        
+        assert set(results) == set(paths)
+        assert all(result.api_status == "fallback_local" for result in results.values())
+        batch_sizes = [len(call.args[0]) for call in self.mock_client.remove_backgrounds_local.call_args_list]
+        assert batch_sizes == [2, 2, 1]
+        self.mock_client.remove_background.assert_not_called()
+    
+    def test_matte_mode_returns_matte_referencing_original(self):
+        """Testa modo máscara: só a alpha volta, o recorte é montado da original"""
+        use_case = BackgroundRemovalUseCase(self.mock_client, output_mode="matte")
+        matte = Image.new('L', (20, 10), 0)
+        matte.paste(255, (0, 0, 10, 10))
+        self.mock_client.remove_matte.return_value = matte
+        self.mock_client.last_source = "success"
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "produto.png")
+            Image.new('RGB', (20, 10), color=(200, 10, 10)).save(path)
+            
+            result = use_case.execute(path)
+            
+            assert result.success is True
+            assert result.image_no_bg is None
+            assert result.matte.matte is matte
+            assert result.matte.source == path
+            assert self.mock_client.remove_matte.call_args.kwargs['source'] == os.path.abspath(path)
+            self.mock_client.remove_background.assert_not_called()
+            
+            cutout = result.cutout()
+        
+        assert cutout.mode == 'RGBA'
+        assert cutout.getpixel((2, 2)) == (200, 10, 10, 255)
+        assert cutout.getpixel((15, 2))[3] == 0
+    
+    def test_trim_crops_result_to_visible_content(self):
+        """Testa recorte do resultado ao alpha, nos modos imagem e máscara"""
+        cutout = Image.new('RGBA', (100, 80), (0, 0, 0, 0))
+        cutout.paste((0, 255, 0, 255), (10, 20, 60, 50))
+        self.mock_client.remove_background.return_value = cutout
+        self.mock_client.remove_matte.return_value = cutout.getchannel('A')
+        self.mock_client.last_source = "success"
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "produto.png")
+            Image.new('RGB', (100, 80), color='green').save(path)
+            
+            image_result = BackgroundRemovalUseCase(self.mock_client, trim=True).execute(path)
+            matte_result = BackgroundRemovalUseCase(self.mock_client, output_mode="matte", trim=True).execute(path)
+            matte_cutout = matte_result.cutout()
+        
+        assert image_result.trim_box == (10, 20, 60, 50)
+        assert image_result.image_no_bg.size == (50, 30)
+        assert matte_result.matte.box == (10, 20, 60, 50)
+        assert matte_cutout.size == (50, 30)
+    
+    def test_execute_many_limits_in_flight_requests(self):
+        """Testa que no máximo max_in_flight requisições rodam ao mesmo tempo"""
+        import threading
+        import time
+        
+        lock = threading.Lock()
+        state = {'current': 0, 'peak': 0}
+        
+        def slow_remove(image, **kwargs):
+            with lock:
+                state['current'] += 1
+                state['peak'] = max(state['peak'], state['current'])
+            time.sleep(0.05)
+            with lock:
+                state['current'] -= 1
+            return Image.new('RGBA', image.size)
+        
+        self.mock_client.remove_background.side_effect = slow_remove
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for idx in range(8):
+                path = os.path.join(temp_dir, f"img_{idx}.png")
+                Image.new('RGB', (10, 10)).save(path)
+                paths.append(path)
+            
+            results = list(self.use_case.execute_many(paths, max_in_flight=3))
+        
+        assert len(results) == 8
+        assert 1 < state['peak'] <= 3
+    
     def test_invalid_image_path(self):
         """Testa caminho de imagem inválido"""
         result = self.use_case.execute("/invalid/path.png")
@@ -161,6 +322,18 @@ class TestBackgroundLoaderUseCase:
             assert isinstance(result, list)
             assert len(result) == 0
     
+    def test_load_backgrounds_from_index(self):
+        """Testa listagem delegada ao índice (sem abrir os arquivos)"""
+        from src.domain.entities import BackgroundInfo
+        
+        index = Mock()
+        index.refresh.return_value = [BackgroundInfo("a.png", "bg/a.png", "previews/x.jpg", (10, 10))]
+        
+        result = BackgroundLoaderUseCase("/pasta/que/nao/existe", index).execute()
+        
+        assert [info.thumbnail_path for info in result] == ["previews/x.jpg"]
+        index.refresh.assert_called_once()
+    
     def test_load_backgrounds_error(self):
         """Testa pasta inexistente"""
         use_case = BackgroundLoaderUseCase("/pasta/que/nao/existe")
@@ -222,5 +395,152 @@ class TestThumbnailExportUseCase:
         assert "Composição inválida" in result.error
 
 
+class TestThumbnailExportProfiles:
+    """Testes dos perfis de export"""
+    
+    def test_profiles_set_extension_and_format(self, tmp_path):
+        """Cada perfil grava no formato e extensão correspondentes"""
+        composition = Image.new('RGB', (1080, 1080), color='green')
+        expected = {'fast': 'PNG', 'balanced': 'PNG', 'smallest': 'PNG', 'webp': 'WEBP', 'jpeg': 'JPEG'}
+        
+        for name, image_format in expected.items():
+            use_case = ThumbnailExportUseCase(str(tmp_path / name), profile=name)
+            result = use_case.execute(composition, original_name="produto.png")
+            
+            assert result.success is True
+            assert result.profile == name
+            assert result.filename == f"produto_thumb{use_case.profile.extension}"
+            assert result.encode_ms > 0
+            assert result.size_mb == pytest.approx(os.path.getsize(result.file_path) / (1024 * 1024))
+            with Image.open(result.file_path) as saved:
+                assert saved.format == image_format
+                assert saved.size == (1080, 1080)
+    
+    def test_smallest_quantize_uses_palette(self, tmp_path):
+        """Perfil smallest com quantize grava PNG em paleta"""
+        composition = Image.new('RGBA', (1080, 1080), color=(10, 200, 30, 128))
+        use_case = ThumbnailExportUseCase(str(tmp_path), profile="smallest", quantize=True)
+        
+        result = use_case.execute(composition, original_name="produto.png")
+        
+        with Image.open(result.file_path) as saved:
+            assert saved.mode == 'P'
+    
+    def test_jpeg_flattens_alpha_on_white(self, tmp_path):
+        """JPEG não tem alpha: transparência vira branco"""
+        composition = Image.new('RGBA', (1080, 1080), color=(0, 0, 0, 0))
+        use_case = ThumbnailExportUseCase(str(tmp_path), profile="jpeg", quality=90)
+        
+        result = use_case.execute(composition, original_name="produto.png")
+        
+        with Image.open(result.file_path) as saved:
+            assert saved.mode == 'RGB'
+            assert all(channel > 250 for channel in saved.getpixel((540, 540)))
+    
+    def test_profile_is_immutable_and_hashable(self):
+        """Perfil congelado de fato: opções em tupla, sem dict mutável"""
+        from src.domain.export_profiles import get_export_profile
+        profile = get_export_profile("webp", quality=80)
+        
+        assert profile == get_export_profile("webp", quality=80)
+        assert hash(profile) == hash(get_export_profile("webp", quality=80))
+        assert profile.options == {'quality': 80, 'method': 4}
+        with pytest.raises(TypeError):
+            profile.save_options['quality'] = 10
+    
+    def test_invalid_profile(self):
+        """Perfil desconhecido é rejeitado"""
+        with pytest.raises(ValueError):
+            ThumbnailExportUseCase(profile="gif")
+
+
+class TestThumbnailRenderPipeline:
+    """Testes do pipeline de render em threads + gravação na thread chamadora"""
+    
+    def setup_method(self):
+        self.written = []
+        self.write_threads = set()
+    
+    def write(self, image_data, key):
+        self.written.append(key)
+        self.write_threads.add(threading.get_ident())
+        return f"out/{key}"
+    
+    def test_results_follow_submission_order(self):
+        """Testa ordem de submissão nos resultados, com conclusão fora de ordem"""
+        second_done = threading.Event()
+        
+        def render(key):
+            if key == "primeiro":
+                assert second_done.wait(5)
+            else:
+                second_done.set()
+            return key.encode(), 0.5, 2.0
+        
+        with ThumbnailRenderPipeline(render, self.write, workers=2) as pipeline:
+            pipeline.submit("primeiro", "primeiro")
+            pipeline.submit("segundo", "segundo")
+            pipeline.fail("terceiro", "remoção falhou")
+            results = pipeline.finish()
+        
+        assert [r['filename'] for r in results] == ["primeiro", "segundo", "terceiro"]
+        assert [r['status'] for r in results] == ["success", "success", "error"]
+        assert results[0]['path'] == "out/primeiro"
+        assert self.written == ["segundo", "primeiro"]
+        assert self.write_threads == {threading.get_ident()}
+        assert pipeline.compose_seconds == pytest.approx(1.0)
+        assert pipeline.encoded_bytes == len(b"primeiro") + len(b"segundo")
+    
+    def test_render_and_write_errors_become_item_results(self):
+        """Testa que falhas no render ou na gravação não interrompem o lote"""
+        def render(key):
+            if key == "render_falha":
+                raise ValueError("composição inválida")
+            return b"data", 0.1, 1.0
+        
+        def write(image_data, key):
+            if key == "disco_cheio":
+                raise OSError("sem espaço")
+            return self.write(image_data, key)
+        
+        seen = []
+        with ThumbnailRenderPipeline(render, write, workers=2,
+                                     on_result=lambda key, result: seen.append(key)) as pipeline:
+            for key in ("ok", "render_falha", "disco_cheio"):
+                pipeline.submit(key, key)
+            results = pipeline.finish()
+        
+        by_key = {r['filename']: r for r in results}
+        assert by_key["ok"]['status'] == "success"
+        assert by_key["render_falha"] == {
+            'filename': "render_falha", 'status': 'error', 'message': "composição inválida"
+        }
+        assert by_key["disco_cheio"]['message'] == "sem espaço"
+        assert sorted(seen) == sorted(by_key)
+        assert pipeline.encoded_bytes == len(b"data")
+        assert pipeline.completed == 3
+    
+    def test_collect_does_not_block_on_pending_renders(self):
+        """Testa que collect() grava só as thumbnails prontas"""
+        release = threading.Event()
+        
+        def render(key):
+            assert release.wait(5)
+            return b"data", 0.1, 1.0
+        
+        with ThumbnailRenderPipeline(render, self.write, workers=1) as pipeline:
+            pipeline.submit("lento", "lento")
+            pipeline.collect()
+            assert pipeline.results() == []
+            release.set()
+            assert [r['status'] for r in pipeline.finish()] == ["success"]
+    
+    def test_zero_workers_uses_all_cores(self):
+        """Testa workers=0 como todos os núcleos, igual ao lote"""
+        pipeline = ThumbnailRenderPipeline(Mock(), Mock(), workers=0)
+        
+        assert pipeline.workers == (os.cpu_count() or 1)
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file